@@ -0,0 +1,160 @@
+"""Defines many words at once, outside of ulauncher.
+
+Each word is resolved like the extension does: from the offline store if it is there, else from the definition cache, else from the DLE. Fetches run concurrently on a bounded pool of workers and share a token bucket, so the DLE sees at most --rate requests per second. Fetched pages are added to the cache that the extension uses.
+
+Results are written as JSON lines as soon as they are ready: offline and cached words first, in input order, then fetched words in completion order. Each line has the word, where it came from ("offline", "cache" or "online") and the parsed page, or an "error".
+
+Usage (from the repository root):
+    python batch.py [WORDS_FILE | -] [--workers 4] [--rate 2] [--output results.jsonl]
+"""
+import argparse
+import json
+import logging
+import sys
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from cache import CACHE_MAX_ENTRIES, CACHE_PATH, CACHE_TTL, DefinitionCache
+from dle import BASE_URL, Case, make_session
+from offline_store import OFFLINE_SOURCE, OFFLINE_STORE_PATH, OfflineStore
+from top_words.corpus_builder import FetchError, TokenBucket, fetch_word
+
+logger = logging.getLogger(__name__)
+
+
+def offline_result(store: OfflineStore, word: str) -> Optional[Dict]:
+    """The stored definitions of word, in the format of dle.parse_page.
+
+    Args:
+        store (OfflineStore): The offline store.
+        word (str): The word to define.
+
+    Returns:
+        Optional[Dict]: The result, or None if the word isn't stored (not even as a variant or form, see OfflineStore.resolve).
+    """
+    headword = store.resolve(word)
+    if headword is None:
+        return None
+    definitions = [
+        {key: entry[key] for key in ("word", "abbrs", "definition", "html_code")}
+        for entry in store.get(headword)
+    ]
+    return {"case": Case.EXACT_STORED_MATCH.name, "definitions": definitions}
+
+
+def define(
+    words: Iterable[str],
+    store: OfflineStore,
+    cache: Optional[DefinitionCache],
+    workers: int = 4,
+    bucket: Optional[TokenBucket] = None,
+    base_url: str = BASE_URL,
+    retries: int = 5,
+    backoff: float = 1,
+) -> Iterator[Dict]:
+    """Defines words, yielding each result as soon as it is ready.
+
+    Args:
+        words (Iterable[str]): The words to define. Duplicates are defined once.
+        store (OfflineStore): Offline store, checked first.
+        cache (Optional[DefinitionCache]): Cache checked before fetching, and updated with what is fetched, including words without match (see DefinitionCache.add_miss). Truncated cached pages, as the extension stores them, are fetched again in full. None to always fetch.
+        workers (int, optional): Maximum amount of concurrent requests. Defaults to 4.
+        bucket (Optional[TokenBucket], optional): Rate limiter shared by all workers. Defaults to None, meaning 2 requests per second with bursts of 4.
+        base_url (str, optional): Root of the dictionary. Defaults to BASE_URL.
+        retries (int, optional): Retries per word. Defaults to 5.
+        backoff (float, optional): Base wait in seconds between retries. Defaults to 1.
+
+    Yields:
+        Dict: The word under "word", where it came from under "source", and either the parsed page under "result" or the reason it failed under "error".
+    """
+    if bucket is None:
+        bucket = TokenBucket(2, 4)
+
+    pending: List[str] = []
+    for word in dict.fromkeys(words):
+        result = offline_result(store, word)
+        if result is not None:
+            yield {"word": word, "source": "offline", "result": result}
+            continue
+        result = cache.get(word) if cache is not None else None
+        if result is not None and result.get("truncated"):
+            # Stored by the extension with only its first max_shown_definitions definitions.
+            logger.debug(f"Cached {word=} is truncated. Fetching it again.")
+            result = None
+        if result is None and cache is not None and cache.is_miss(word):
+            result = {"case": Case.NO_MATCH.name}
+        if result is not None:
+            yield {"word": word, "source": "cache", "result": result}
+            continue
+        pending.append(word)
+
+    if not pending:
+        return
+    logger.info(f"{len(pending)} words to fetch.")
+    session = make_session(pool_size=workers)
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {
+            executor.submit(fetch_word, session, word, bucket, base_url, retries, backoff): word
+            for word in pending
+        }
+        for future in as_completed(futures):
+            word = futures[future]
+            try:
+                result = future.result()
+            except FetchError as e:
+                yield {"word": word, "source": "online", "error": str(e)}
+                continue
+            if cache is not None and result["case"] != Case.NO_MATCH.name:
+                cache.set(word, result)
+            elif cache is not None:
+                cache.add_miss(word)
+            yield {"word": word, "source": "online", "result": result}
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("words", nargs="?", default="-", help="Word list file, one per line, or - for stdin (default).")
+    parser.add_argument("--output", type=Path, help="JSONL destination. Defaults to stdout.")
+    parser.add_argument("--base-url", default=BASE_URL)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--rate", type=float, default=2, help="Requests per second.")
+    parser.add_argument("--burst", type=float, default=4, help="Token bucket capacity.")
+    parser.add_argument("--retries", type=int, default=5)
+    parser.add_argument("--backoff", type=float, default=1, help="Base retry wait in seconds.")
+    parser.add_argument("--no-cache", action="store_true", help="Neither read nor update the definition cache.")
+    parser.add_argument("-v", "--verbose", action="store_true")
+    args = parser.parse_args(argv)
+    logging.basicConfig(
+        level=logging.DEBUG if args.verbose else logging.INFO,
+        format="%(asctime)s %(levelname)s %(message)s",
+    )
+
+    lines = sys.stdin if args.words == "-" else Path(args.words).open("r")
+    words = (line.strip() for line in lines if line.strip())
+    store = OfflineStore(OFFLINE_SOURCE, OFFLINE_STORE_PATH)
+    cache = None if args.no_cache else DefinitionCache(CACHE_PATH, CACHE_TTL, CACHE_MAX_ENTRIES)
+    output = sys.stdout if args.output is None else args.output.open("w")
+
+    failed = 0
+    for record in define(
+        words,
+        store,
+        cache,
+        args.workers,
+        TokenBucket(args.rate, args.burst),
+        args.base_url,
+        args.retries,
+        args.backoff,
+    ):
+        failed += "error" in record
+        output.write(json.dumps(record, ensure_ascii=False) + "\n")
+        output.flush()
+    if failed:
+        logger.error(f"{failed} words failed.")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,71 @@
+"""Measures batch.define throughput (words per second) against a local FixtureServer.
+
+Online throughput is measured with an empty offline store and no cache, so every word is fetched, for several worker counts. The rate limit is set high enough not to matter, so the numbers show how well workers hide the server latency. Offline and cached throughput are measured over the same words for comparison.
+
+Usage (from the repository root):
+    python benchmarks/batch_throughput.py FIXTURES_FOLDER [--words 300] [--latency 0.05] [--workers 1 4 8 16]
+"""
+import argparse
+import json
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from batch import define  # noqa: E402
+from cache import DefinitionCache  # noqa: E402
+from fixture_server import NO_MATCH_FIXTURE, FixtureServer  # noqa: E402
+from offline_store import OFFLINE_SOURCE, OfflineStore  # noqa: E402
+from top_words.corpus_builder import TokenBucket  # noqa: E402
+
+
+def run(words, store, cache, workers, url) -> float:
+    start = time.perf_counter()
+    count = sum(
+        1
+        for record in define(words, store, cache, workers, TokenBucket(1e6, 1e6), url, retries=0)
+        if "result" in record
+    )
+    assert count == len(words), f"Only {count} of {len(words)} words were defined."
+    return len(words) / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("fixtures", type=Path)
+    parser.add_argument("--words", type=int, default=300, help="Fixtures to fetch, at most all of them.")
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4, 8, 16])
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    pages = [p.stem for p in args.fixtures.glob("*.html") if p.name != NO_MATCH_FIXTURE]
+    words = random.Random(args.seed).sample(pages, min(args.words, len(pages)))
+
+    with tempfile.TemporaryDirectory() as tmp, FixtureServer(args.fixtures, latency=args.latency) as server:
+        tmp = Path(tmp)
+        empty_source = tmp / "empty.json"
+        empty_source.write_text(json.dumps({"last_checked": 0, "words": {}}))
+        empty_store = OfflineStore(empty_source, tmp / "empty.sqlite3")
+        cache = DefinitionCache(tmp / "cache.sqlite3", ttl=1e9, max_entries=len(words))
+
+        print(f"{len(words)} words, {args.latency * 1000:.0f} ms server latency")
+        print(f"{'mode':<16}{'words/s':>10}")
+        for workers in args.workers:
+            print(f"{f'online x{workers}':<16}{run(words, empty_store, None, workers, server.url):>10.1f}")
+
+        run(words, empty_store, cache, max(args.workers), server.url)  # Fill the cache.
+        print(f"{'cache':<16}{run(words, empty_store, cache, 1, server.url):>10.1f}")
+
+        offline_store = OfflineStore(OFFLINE_SOURCE, tmp / "offline.sqlite3")
+        stored = offline_store.headwords()[: args.words]
+        print(f"{'offline':<16}{run(stored, offline_store, None, 1, server.url):>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""Compares wrap.chunkize_sentence against the implementation it replaced.
+
+Every definition in top_words/top_1k_spanish_words.json is wrapped with both, and the output must be identical. The previous implementation kept runs of spaces as empty words, so the comparison uses definitions with their whitespace already collapsed. Reported is the throughput over the corpus and over longer texts made by joining definitions, where the quadratic cost of the previous implementation shows.
+
+tests/test_wrap.py runs the same comparison under pytest, along with the cases the previous implementation got wrong (runs of whitespace, words longer than the width). tests/test_wrap_benchmark.py is the pytest-benchmark version of the timings.
+
+Usage (from the repository root):
+    python benchmarks/chunkize.py [--width 80] [--repeat 5]
+"""
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+from typing import Callable, List
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from wrap import chunkize_sentence  # noqa: E402
+
+
+def legacy_chunkize_sentence(sentence: str, max_characters_per_chunk: int) -> List[str]:
+    """The implementation used before wrap.chunkize_sentence, kept verbatim for comparison. It never returns if a word is longer than max_characters_per_chunk."""
+    words = sentence.split(" ")
+    lines = []
+
+    word_idx, anchor = 1, 0
+    while anchor <= len(words):
+        partial = " ".join(words[anchor : anchor + word_idx])
+
+        if len(partial) > max_characters_per_chunk:
+            lines.append(" ".join(words[anchor : anchor + word_idx - 1]))
+            anchor += word_idx - 1
+            word_idx = 1
+            continue
+
+        if anchor + word_idx == len(words):
+            lines.append(partial)
+            break
+        word_idx += 1
+    return lines
+
+
+def throughput(
+    chunkize: Callable[[str, int], List[str]], texts: List[str], width: int, repeat: int
+) -> float:
+    """Best of repeat runs, in MB of text wrapped per second."""
+    size = sum(len(text) for text in texts) / 1e6
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for text in texts:
+            chunkize(text, width)
+        best = min(best, time.perf_counter() - start)
+    return size / best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--width", type=int, default=80)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with (ROOT / "top_words" / "top_1k_spanish_words.json").open("r") as f:
+        data = json.load(f)
+    definitions = [
+        " ".join(entry["definition"].split())
+        for entries in data["words"].values()
+        for entry in entries
+    ]
+
+    mismatches = [
+        text
+        for text in definitions
+        if chunkize_sentence(text, args.width) != legacy_chunkize_sentence(text, args.width)
+    ]
+    print(f"{len(definitions)} definitions, {len(mismatches)} with a different output.")
+    for text in mismatches[:5]:
+        print(f"  {text!r}")
+
+    print(f"{'texts':<22}{'legacy (MB/s)':>14}{'linear (MB/s)':>15}{'speedup':>9}")
+    for words_per_text in (None, 200, 1000):
+        if words_per_text is None:
+            name, texts = "definitions", definitions
+        else:
+            words = " ".join(definitions).split(" ")
+            texts = [
+                " ".join(words[i : i + words_per_text])
+                for i in range(0, len(words) - words_per_text + 1, words_per_text)
+            ]
+            name = f"{words_per_text} words each"
+        legacy = throughput(legacy_chunkize_sentence, texts, args.width, args.repeat)
+        linear = throughput(chunkize_sentence, texts, args.width, args.repeat)
+        print(f"{name:<22}{legacy:>14.2f}{linear:>15.2f}{linear / legacy:>8.1f}x")
+
+    if mismatches:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""Compares the JSON offline dataset with the compact format of compact.py: size on disk, load time, memory held once loaded and lookup time.
+
+Runs on the shipped 1k corpus and on a synthetic corpus (50k words by default) made of random words whose definitions recombine the words of the real ones, with the real distribution of abbreviations and definitions per word.
+
+Usage (from the repository root):
+    python benchmarks/dataset_format.py [--synthetic-words 50000]
+"""
+import argparse
+import json
+import random
+import string
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Callable, Dict
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from compact import CompactDataset, write_compact  # noqa: E402
+from offline_store import OFFLINE_SOURCE  # noqa: E402
+
+
+def synthetic_corpus(real: Dict, words: int, rng: random.Random) -> Dict:
+    entries = [entry for definitions in real["words"].values() for entry in definitions]
+    vocabulary = [token for entry in entries for token in entry["definition"].split()]
+    sizes = [len(definitions) for definitions in real["words"].values()]
+    syllables = [c + v for c in "bcdfglmnprstv" for v in "aeiou"]
+    data = {"last_checked": real["last_checked"], "words": {}}
+    while len(data["words"]) < words:
+        word = "".join(rng.choices(syllables, k=rng.randint(2, 4)))
+        data["words"][word] = [
+            {
+                "abbrs": rng.choice(entries)["abbrs"],
+                "definition": " ".join(rng.choices(vocabulary, k=rng.randint(3, 25))) + ".",
+                "html_code": "".join(rng.choices(string.ascii_letters + string.digits, k=7)),
+            }
+            for _ in range(rng.choice(sizes))
+        ]
+    return data
+
+
+def measure(load: Callable[[], object], repeat: int = 3):
+    """Best seconds to load, and bytes held by the loaded object (as allocated, per tracemalloc)."""
+    seconds = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        load()
+        seconds = min(seconds, time.perf_counter() - start)
+    tracemalloc.start()
+    loaded = load()
+    held, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return loaded, seconds, held
+
+
+def lookup_time(lookup: Callable[[str], object], words, repeat: int = 3) -> float:
+    """Microseconds per lookup."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for word in words:
+            lookup(word)
+        best = min(best, time.perf_counter() - start)
+    return best / len(words) * 1e6
+
+
+def report(name: str, data: Dict, tmp: Path, rng: random.Random):
+    json_path = tmp / f"{name}.json"
+    with json_path.open("w") as f:
+        json.dump(data, f, indent=4, ensure_ascii=False)  # As shipped.
+    raw_path, zlib_path = tmp / f"{name}.raw.rdle", tmp / f"{name}.rdle"
+    write_compact(data, raw_path, compress=False)
+    write_compact(data, zlib_path)
+    sample = rng.sample(list(data["words"]), min(1000, len(data["words"])))
+
+    print(f"{name}: {len(data['words'])} words, {sum(map(len, data['words'].values()))} definitions")
+    print(f"  {'format':<14}{'size KB':>10}{'load ms':>10}{'held KB':>10}{'lookup us':>11}")
+    for label, path, load in [
+        ("json", json_path, lambda: json.loads(json_path.read_text())),
+        ("compact", raw_path, lambda: CompactDataset(raw_path)),
+        ("compact+zlib", zlib_path, lambda: CompactDataset(zlib_path)),
+    ]:
+        loaded, seconds, held = measure(load)
+        lookup = loaded["words"].__getitem__ if label == "json" else loaded.__getitem__
+        print(
+            f"  {label:<14}{path.stat().st_size / 1024:>10.0f}{seconds * 1e3:>10.1f}"
+            f"{held / 1024:>10.0f}{lookup_time(lookup, sample):>11.2f}"
+        )
+        del loaded, lookup  # Don't let a loaded JSON dataset slow down the next measurements.
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--synthetic-words", type=int, default=50000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    real = json.loads(OFFLINE_SOURCE.read_text())
+    with tempfile.TemporaryDirectory() as tmp:
+        report("1k corpus", real, Path(tmp), rng)
+        report("synthetic", synthetic_corpus(real, args.synthetic_words, rng), Path(tmp), rng)
+
+
+if __name__ == "__main__":
+    main()
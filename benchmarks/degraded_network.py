@@ -0,0 +1,116 @@
+"""Measures how lookups degrade when the DLE gets slow or goes down, for each value of the mode preference.
+
+Half of the words were looked up before and are cached, but expired. The other half were never looked up. Every phase looks all of them up with RAE.handle_online (blocking, as a background lookup would), against a local FixtureServer that is healthy, then slower than the read timeout, then down (every answer is a 503), then healthy again.
+
+"online, no breaker" is the online mode with a circuit breaker that never opens, as lookups behaved before it.
+
+For each phase it prints the time until the results are ready, the expired copies served, the lookups that ended in an error item, the lookups refused by the circuit breaker without a request, and the requests the server got (background revalidations included).
+
+Needs ulauncher importable, as it builds real ExtensionResultItem objects. The behavior itself (the circuit breaker opening and closing, stale copies, timeouts) is checked by tests/test_main.py. This only measures it.
+
+Usage (from the repository root):
+    python benchmarks/degraded_network.py FIXTURES_FOLDER [--words 20] [--read-timeout 0.5]
+"""
+import argparse
+import random
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+import main as rae  # noqa: E402
+from cache import DefinitionCache  # noqa: E402
+from dle import is_plausible_query  # noqa: E402
+from fixture_server import NO_MATCH_FIXTURE, FixtureServer  # noqa: E402
+
+SETUPS = [
+    ("online, no breaker", rae.MODE_ONLINE, sys.maxsize),
+    ("online", rae.MODE_ONLINE, rae.BREAKER_FAILURES),
+    ("offline first", rae.MODE_OFFLINE_FIRST, rae.BREAKER_FAILURES),
+    ("offline only", rae.MODE_OFFLINE_ONLY, rae.BREAKER_FAILURES),
+]
+COUNTERS = {"stale_hit": "stale", "online_error": "errors", "breaker_open": "refused"}
+
+
+def settle(extension: rae.RAE, timeout: float = 30):
+    """Waits for the background revalidations, so each phase only counts its own requests."""
+    deadline = time.monotonic() + timeout
+    while extension.revalidator._pending and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+
+def run_setup(label: str, mode: str, failures: int, server: FixtureServer, cached, uncached, args, tmp: Path):
+    extension = rae.RAE()
+    extension.breaker.failures = failures
+    extension.preferences.update(rae.DEFAULT_PREFERENCES)
+    extension.preferences.update(offline_suggestions="No", read_timeout=args.read_timeout, connect_timeout=args.read_timeout)
+    extension.cache = DefinitionCache(tmp / f"{label}.sqlite3", ttl=1e9, max_entries=10000)
+    server.latency, server.error_rate = args.latency, 0
+    for word in cached:
+        extension.lookup_online(word)
+    extension.cache.ttl = 0  # Everything cached is expired from now on.
+    extension.preferences["mode"] = mode
+
+    words = cached + uncached
+    phases = [
+        ("healthy", args.latency, 0),
+        ("slow", args.read_timeout * 2, 0),
+        ("down", args.latency, 1),
+        ("recovered", args.latency, 0),
+    ]
+    print(label)
+    for phase, latency, error_rate in phases:
+        server.latency, server.error_rate = latency, error_rate
+        if phase == "recovered":
+            time.sleep(extension.breaker.cooldown)
+        before = {name: extension.stats.counters[name] for name in COUNTERS}
+        requests_before = server.requests
+        samples = []
+        for word in words:
+            start = time.perf_counter()
+            extension.handle_online(word, offline_suggestions=False)
+            samples.append((time.perf_counter() - start) * 1e3)
+        settle(extension)
+        counts = [extension.stats.counters[name] - before[name] for name in COUNTERS]
+        print(
+            f"  {phase:<11}{statistics.median(samples):>9.1f}{max(samples):>9.1f}"
+            + "".join(f"{count:>8}" for count in counts)
+            + f"{server.requests - requests_before:>10}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("fixtures", type=Path)
+    parser.add_argument("--words", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.02, help="Seconds the fixture server waits before each answer while healthy.")
+    parser.add_argument("--read-timeout", type=float, default=0.5)
+    parser.add_argument("--cooldown", type=float, default=2, help="Circuit breaker cooldown, shortened so the recovered phase doesn't wait 30 s.")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    words = [
+        p.stem
+        for p in args.fixtures.glob("*.html")
+        if p.name != NO_MATCH_FIXTURE and is_plausible_query(p.stem) and rae.OFFLINE_STORE.resolve(p.stem) is None
+    ]
+    words = rng.sample(words, min(args.words, len(words)))
+    cached, uncached = words[: len(words) // 2], words[len(words) // 2 :]
+    rae.BREAKER_COOLDOWN = args.cooldown
+
+    print(f"{len(cached)} expired cached words, {len(uncached)} uncached words")
+    print(f"  {'phase':<11}{'p50 ms':>9}{'max ms':>9}" + "".join(f"{name:>8}" for name in COUNTERS.values()) + f"{'requests':>10}")
+    with FixtureServer(args.fixtures) as server, tempfile.TemporaryDirectory() as tmp:
+        rae.BASE_URL = server.url
+        for label, mode, failures in SETUPS:
+            run_setup(label, mode, failures, server, cached, uncached, args, Path(tmp))
+
+
+if __name__ == "__main__":
+    main()
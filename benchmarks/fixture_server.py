@@ -0,0 +1,162 @@
+"""Local stand-in for dle.rae.es that serves saved pages from a fixture folder.
+
+A request for /<word> is answered with <fixtures>/<word>.html, or, like the DLE, with 404 Not Found and <fixtures>/_no_match.html (or an empty page) if there is no fixture for that word.
+Pages carry an ETag, and requests with a matching If-None-Match get 304 Not Modified.
+Latency and errors can be injected to exercise timeouts, retries and backoff without touching the real site.
+
+Usage (from the repository root):
+    python benchmarks/fixture_server.py FIXTURES_FOLDER [--port 8000] [--latency 0.05] [--error-rate 0.1]
+
+Then point the tool under test to http://127.0.0.1:8000 instead of dle.BASE_URL.
+"""
+import argparse
+import hashlib
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Optional
+from urllib.parse import unquote, urlsplit
+
+NO_MATCH_FIXTURE = "_no_match.html"
+
+
+class QuietHTTPServer(ThreadingHTTPServer):
+    def handle_error(self, request, client_address):
+        # Clients that stop reading once they have what they need reset the connection. That is expected.
+        pass
+
+
+class FixtureServer:
+    """Threaded HTTP server serving fixture pages, usable as a context manager.
+
+    Attributes:
+        requests (int): Amount of requests received so far.
+        connections (int): Amount of connections accepted so far. Fewer than requests means connections were kept alive and reused.
+    """
+
+    def __init__(
+        self,
+        fixtures: Path,
+        port: int = 0,
+        latency: float = 0,
+        error_rate: float = 0,
+        error_status: int = 503,
+        no_match_status: int = 404,
+    ):
+        """
+        Args:
+            fixtures (Path): Folder with one <word>.html per word.
+            port (int, optional): Port to listen on. Defaults to 0, meaning any free port.
+            latency (float, optional): Seconds to wait before answering each request. Defaults to 0.
+            error_rate (float, optional): Probability of answering with error_status instead of the page. Defaults to 0.
+            error_status (int, optional): Status used for injected errors. Defaults to 503.
+            no_match_status (int, optional): Status of the answers for words without a fixture. Defaults to 404, as the DLE does.
+        """
+        self.fixtures = fixtures
+        self.latency = latency
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.no_match_status = no_match_status
+        self.requests = 0
+        self.connections = 0
+        self._lock = threading.Lock()
+        self._server = QuietHTTPServer(("127.0.0.1", port), self._handler())
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address
+        return f"http://{host}:{port}"
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # Headers and body are separate writes. With Nagle's algorithm, the body of an answer on a kept alive connection waits for the client's delayed ACK.
+            disable_nagle_algorithm = True
+
+            def setup(self):
+                with server._lock:
+                    server.connections += 1
+                super().setup()
+
+            def do_GET(self):
+                with server._lock:
+                    server.requests += 1
+                if server.latency:
+                    time.sleep(server.latency)
+                if random.random() < server.error_rate:
+                    self.send_response(server.error_status)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+
+                word = unquote(urlsplit(self.path).path.strip("/"))
+                page = server.fixtures / f"{word}.html"
+                status = 200
+                if not page.is_file():
+                    page = server.fixtures / NO_MATCH_FIXTURE
+                    status = server.no_match_status
+                body = page.read_bytes() if page.is_file() else b"<html></html>"
+                etag = f'"{hashlib.sha1(body).hexdigest()}"'
+
+                if self.headers.get("If-None-Match") == etag:
+                    self.send_response(304)
+                    self.send_header("ETag", etag)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                self.send_response(status)
+                self.send_header("ETag", etag)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def start(self) -> "FixtureServer":
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "FixtureServer":
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("fixtures", type=Path)
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--latency", type=float, default=0)
+    parser.add_argument("--error-rate", type=float, default=0)
+    parser.add_argument("--error-status", type=int, default=503)
+    parser.add_argument("--no-match-status", type=int, default=404)
+    args = parser.parse_args()
+
+    server = FixtureServer(
+        args.fixtures, args.port, args.latency, args.error_rate, args.error_status, args.no_match_status
+    )
+    print(f"Serving {args.fixtures} at {server.url}")
+    try:
+        server._server.serve_forever()
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
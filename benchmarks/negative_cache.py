@@ -0,0 +1,105 @@
+"""Measures the requests spared by the query guards (dle.is_plausible_query) and the negative cache (DefinitionCache.add_miss / is_miss), and what checking them costs.
+
+A synthetic query log replays users typing words of the offline corpus letter by letter, as ulauncher sends them, sometimes with typos, digits or symbols, and typing the same words again later. Every query that isn't stored offline or cached would be a request; those the DLE has no match for are the partial words and typos (approximated here as anything that isn't a stored word).
+
+Then is_miss is timed with many remembered words, for words that are remembered and words that aren't.
+
+Usage (from the repository root):
+    python benchmarks/negative_cache.py [--words 2000] [--misses 100000]
+"""
+import argparse
+import random
+import sys
+import tempfile
+import time
+from collections import Counter
+from pathlib import Path
+from typing import List
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from cache import DefinitionCache  # noqa: E402
+from dle import is_plausible_query  # noqa: E402
+from offline_store import OFFLINE_SOURCE, OfflineStore  # noqa: E402
+
+TYPOS = ["2", "@", "ñ", "x", "q"]
+
+
+def typing_log(words: List[str], amount: int, rng: random.Random) -> List[str]:
+    log = []
+    typed = []
+    for _ in range(amount):
+        if typed and rng.random() < 0.3:
+            word = rng.choice(typed)  # Looked up again later.
+        else:
+            word = rng.choice(words)
+            typed.append(word)
+        if rng.random() < 0.2:
+            position = rng.randrange(len(word) + 1)
+            word = word[:position] + rng.choice(TYPOS) + word[position:]
+        log.extend(word[:end] for end in range(1, len(word) + 1))
+    return log
+
+
+def replay(log: List[str], store: OfflineStore, cache: DefinitionCache, guard: bool, negative: bool) -> Counter:
+    outcomes = Counter()
+    for query in log:
+        if store.resolve(query) is not None:
+            outcomes["offline"] += 1
+        elif guard and not is_plausible_query(query):
+            outcomes["guarded"] += 1
+        elif negative and cache.is_miss(query):
+            outcomes["negative hit"] += 1
+        else:
+            outcomes["request"] += 1
+            if negative:
+                cache.add_miss(query)
+    return outcomes
+
+
+def time_is_miss(cache: DefinitionCache, words: List[str]) -> float:
+    """Microseconds per is_miss call."""
+    start = time.perf_counter()
+    for word in words:
+        cache.is_miss(word)
+    return (time.perf_counter() - start) / len(words) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--words", type=int, default=2000, help="Words typed.")
+    parser.add_argument("--misses", type=int, default=100000, help="Remembered words for the timing.")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    rng = random.Random(args.seed)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        store = OfflineStore(OFFLINE_SOURCE, tmp / "store.sqlite3")
+        words = [word for word in store.headwords() if len(word) >= 4]
+        log = typing_log(words, args.words, rng)
+        print(f"{len(log)} queries typing {args.words} words")
+        for name, guard, negative in [
+            ("neither", False, False),
+            ("guards", True, False),
+            ("negative cache", False, True),
+            ("both", True, True),
+        ]:
+            cache = DefinitionCache(tmp / f"{name}.sqlite3", ttl=1e9, max_entries=10)
+            outcomes = replay(log, store, cache, guard, negative)
+            print(f"  {name:<16}{outcomes['request']:>7} requests  ({outcomes['guarded']} guarded, {outcomes['negative hit']} negative hits)")
+
+        cache = DefinitionCache(tmp / "timing.sqlite3", ttl=1e9, max_entries=10)
+        remembered = [f"miss{i}" for i in range(args.misses)]
+        with cache._lock:
+            cache.connection.executemany(
+                "INSERT INTO misses (key, stored_at) VALUES (?, ?)", ((key, time.time()) for key in remembered)
+            )
+            cache.connection.commit()
+        absent = [f"absent{i}" for i in range(10000)]
+        present = rng.sample(remembered, 10000)
+        print(f"is_miss with {args.misses} remembered words: {time_is_miss(cache, absent):.2f} us for absent words, {time_is_miss(cache, present):.2f} us for remembered ones.")
+
+if __name__ == "__main__":
+    main()
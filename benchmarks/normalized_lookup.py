@@ -0,0 +1,82 @@
+"""Reports how many queries of a query log the accent and case insensitive alias index moves from the DLE to the offline store.
+
+The log has one query per line. Without one, a synthetic log is made from the stored words, typed as real users do: mostly as stored, but often capitalized, without accents or in uppercase, mixed with words that aren't stored at all.
+
+Usage (from the repository root):
+    python benchmarks/normalized_lookup.py [QUERY_LOG] [--queries 10000]
+"""
+import argparse
+import random
+import sys
+import tempfile
+from collections import Counter
+from pathlib import Path
+from typing import List
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from dle import fold, lookup_key  # noqa: E402
+from offline_store import OfflineStore  # noqa: E402
+
+SOURCE = ROOT / "top_words" / "top_1k_spanish_words.json"
+UNSTORED = ["casas", "corriendo", "dijo", "ordenador", "bicicleta", "murciélago", "pingüino", "xilófono"]
+
+
+def synthetic_log(words: List[str], queries: int, rng: random.Random) -> List[str]:
+    variants = [
+        (0.55, lambda w: w),
+        (0.15, lambda w: w.capitalize()),
+        (0.15, fold),
+        (0.05, lambda w: fold(w).capitalize()),
+        (0.05, str.upper),
+        (0.05, lambda w: rng.choice(UNSTORED)),
+    ]
+    weights = [weight for weight, _ in variants]
+    log = []
+    for _ in range(queries):
+        (_, variant), = rng.choices(variants, weights)
+        log.append(variant(rng.choice(words)))
+    return log
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("log", type=Path, nargs="?")
+    parser.add_argument("--queries", type=int, default=10000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = OfflineStore(SOURCE, Path(tmp) / "store.sqlite3")
+        words = store.headwords()
+        keys = Counter(lookup_key(word) for word in words)
+        ambiguous_keys = {key for key, count in keys.items() if count > 1}
+        print(f"{len(words)} stored words, {len(ambiguous_keys)} ambiguous keys: {sorted(ambiguous_keys)}")
+
+        if args.log is None:
+            log = synthetic_log(words, args.queries, random.Random(args.seed))
+        else:
+            log = [line.strip() for line in args.log.open("r") if line.strip()]
+
+        outcomes = Counter()
+        for query in log:
+            if query in store:
+                outcomes["exact offline"] += 1
+            elif store.resolve(query) is not None:
+                outcomes["offline via alias"] += 1
+            elif lookup_key(query) in ambiguous_keys:
+                outcomes["ambiguous, online"] += 1
+            else:
+                outcomes["online"] += 1
+
+    print(f"{len(log)} queries")
+    for outcome in ("exact offline", "offline via alias", "ambiguous, online", "online"):
+        print(f"  {outcome:<20}{outcomes[outcome]:>7}  {outcomes[outcome] / len(log):>6.1%}")
+    moved = outcomes["offline via alias"]
+    before = moved + outcomes["ambiguous, online"] + outcomes["online"]
+    print(f"Moved offline: {moved} of the {before} queries that used to go online ({moved / max(before, 1):.1%}).")
+
+
+if __name__ == "__main__":
+    main()
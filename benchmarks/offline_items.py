@@ -0,0 +1,90 @@
+"""Measures the per-query cost of RAE.handle_offline, before and after render-ready store records and the result LRU.
+
+"before" builds the items from the raw definition fields like handle_offline used to (detecting the case, formatting names and URLs on every query). "cold" is the current handle_offline with its LRU cleared before every query, so it only saves the formatting. "warm" is the current handle_offline when the word was typed before.
+
+Needs ulauncher importable, as it builds real ExtensionResultItem objects.
+
+Usage (from the repository root):
+    python benchmarks/offline_items.py [--queries 20000] [--max-shown-definitions 10]
+"""
+import argparse
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Callable, List
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from ulauncher.api.shared.action.CopyToClipboardAction import CopyToClipboardAction  # noqa: E402
+from ulauncher.api.shared.action.OpenUrlAction import OpenUrlAction  # noqa: E402
+from ulauncher.api.shared.item.ExtensionResultItem import ExtensionResultItem  # noqa: E402
+
+import main as rae  # noqa: E402
+from dle import BASE_URL, Case  # noqa: E402
+
+
+def legacy_handle_offline(word: str, max_shown_definitions: int) -> List[ExtensionResultItem]:
+    """handle_offline as it was before render-ready records, kept for comparison."""
+    case = rae.RAE.detect_offline_case(word)
+    if case == Case.EXACT_STORED_MATCH:
+        return [
+            ExtensionResultItem(
+                icon="images/icon.png",
+                name=f"{entry['word']} [{entry['abbrs']}]",
+                description=entry["description"],
+                on_enter=CopyToClipboardAction(entry["definition"],),
+                on_alt_enter=OpenUrlAction(f"{BASE_URL}/{word}#{entry['html_code']}"),
+            )
+            for entry in rae.OFFLINE_STORE.get(word, limit=max_shown_definitions)
+        ]
+    raise RuntimeError(f"Unexpected {case=}.")
+
+
+def measure(words: List[str], handle: Callable[[str], object]) -> List[float]:
+    samples = []
+    for word in words:
+        start = time.perf_counter()
+        handle(word)
+        samples.append((time.perf_counter() - start) * 1e6)
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--queries", type=int, default=20000)
+    parser.add_argument("--max-shown-definitions", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    extension = rae.RAE()
+    extension.preferences.update(rae.DEFAULT_PREFERENCES)
+    extension.preferences["max_shown_definitions"] = args.max_shown_definitions
+
+    rng = random.Random(args.seed)
+    headwords = rae.OFFLINE_STORE.headwords()
+    # Zipf-like: a few words are typed over and over, like in real use.
+    words = [headwords[min(int(rng.paretovariate(1)) - 1, len(headwords) - 1)] for _ in range(args.queries)]
+
+    def cold(word: str):
+        rae.RAE.offline_items.cache_clear()
+        extension.handle_offline(word)
+
+    modes = {
+        "before": lambda word: legacy_handle_offline(word, args.max_shown_definitions),
+        "cold": cold,
+        "warm": extension.handle_offline,
+    }
+    print(f"{'mode':<8}{'mean (µs)':>11}{'p50 (µs)':>10}{'p95 (µs)':>10}")
+    for name, handle in modes.items():
+        rae.RAE.offline_items.cache_clear()
+        samples = measure(words, handle)
+        quantiles = statistics.quantiles(samples, n=100)
+        print(f"{name:<8}{statistics.mean(samples):>11.1f}{quantiles[49]:>10.1f}{quantiles[94]:>10.1f}")
+    print(f"LRU: {rae.RAE.offline_items.cache_info()}")
+
+
+if __name__ == "__main__":
+    main()
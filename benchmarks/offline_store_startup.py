@@ -0,0 +1,84 @@
+"""Compares the startup cost of loading the offline dataset with json.load against opening the indexed OfflineStore.
+
+Each variant runs in a fresh interpreter, loads the data and defines a single word. Reported are the wall time of that work and the peak resident memory of the process.
+
+Usage (from the repository root):
+    python benchmarks/offline_store_startup.py [--runs N] [--word WORD]
+"""
+import argparse
+import statistics
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+SOURCE = ROOT / "top_words" / "top_1k_spanish_words.json"
+
+# main.py imports json, logging and pathlib regardless of how the data is loaded, so they are imported before the timer starts.
+JSON_SNIPPET = """
+import json, logging, pathlib, resource, sys, threading, time
+start = time.perf_counter()
+with open(sys.argv[1]) as f:
+    data = json.load(f)
+definitions = data["words"][sys.argv[3]][:10]
+elapsed = time.perf_counter() - start
+print(elapsed, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)
+"""
+
+STORE_SNIPPET = """
+import json, logging, pathlib, resource, sys, threading, time
+from pathlib import Path
+start = time.perf_counter()
+from offline_store import OfflineStore
+store = OfflineStore(Path(sys.argv[1]), Path(sys.argv[2]))
+definitions = store.get(sys.argv[3], limit=10) if sys.argv[3] in store else []
+elapsed = time.perf_counter() - start
+print(elapsed, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)
+"""
+
+BASELINE_SNIPPET = """
+import json, logging, pathlib, resource, sys, threading, time
+print(0, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)
+"""
+
+
+def run(snippet: str, store_path: Path, word: str, runs: int):
+    times, rss = [], []
+    for _ in range(runs):
+        out = subprocess.run(
+            [sys.executable, "-c", snippet, str(SOURCE), str(store_path), word],
+            cwd=ROOT,
+            check=True,
+            capture_output=True,
+            text=True,
+        ).stdout.split()
+        times.append(float(out[0]))
+        rss.append(int(out[1]))
+    return statistics.median(times), statistics.median(rss)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--word", default="casa")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store_path = Path(tmp) / "store.sqlite3"
+        # Built in a child process: ru_maxrss is inherited across fork, so loading the JSON here would inflate every measurement.
+        subprocess.run(
+            [sys.executable, "offline_store.py", str(SOURCE), str(store_path)],
+            cwd=ROOT,
+            check=True,
+        )
+
+        _, base_rss = run(BASELINE_SNIPPET, store_path, args.word, args.runs)
+        print(f"{'variant':<14}{'load+lookup (ms)':>18}{'extra RSS (KiB)':>18}")
+        for name, snippet in [("json.load", JSON_SNIPPET), ("OfflineStore", STORE_SNIPPET)]:
+            elapsed, rss = run(snippet, store_path, args.word, args.runs)
+            print(f"{name:<14}{elapsed * 1000:>18.2f}{rss - base_rss:>18}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""Compares the streaming DLEPageParser against the BeautifulSoup parser it replaced.
+
+Every page in the fixture folder is parsed with both. Full parses must give identical results. Reported are the parse time per page and the peak memory allocated while parsing, for full parses and for parses that stop at --max-definitions.
+
+Usage (from the repository root):
+    python benchmarks/parse_dle.py FIXTURES_FOLDER [--max-definitions 10] [--repeat 5]
+
+Fixtures are saved DLE pages, as recorded by benchmarks/replay.py or saved by hand from dle.rae.es, or synthetic pages written by benchmarks/synthetic_pages.py. benchmarks/fixtures is a small corpus of the latter, and tests/test_dle.py checks that both parsers agree on it.
+"""
+import argparse
+import statistics
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Callable, Dict, List
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from bs4 import BeautifulSoup  # noqa: E402
+from bs4.element import NavigableString  # noqa: E402
+
+from dle import Case, parse_chunks  # noqa: E402
+
+
+def legacy_parse_page(html: str, max_definitions=None) -> Dict:
+    """The BeautifulSoup based parser used before DLEPageParser, kept verbatim for comparison."""
+    soup = BeautifulSoup(html, "html.parser")
+    if soup.find("p", {"class": "j"}) is not None:
+        article = soup.find("article")
+        word = article.find("header").text
+        definitions = []
+        for definition in article.find_all("p"):
+            def_class = definition["class"][0]
+            if def_class in {"j", "m"}:
+                abbrs = " ".join(abbr.text for abbr in definition.find_all("abbr"))
+                words = "".join(
+                    child if isinstance(child, NavigableString) else child.get_text()
+                    for child in definition.children
+                    if child.name not in {"span", "abbr"}
+                )
+                definitions.append(
+                    {
+                        "word": word,
+                        "abbrs": abbrs,
+                        "definition": words.strip(),
+                        "html_code": definition["id"],
+                    }
+                )
+                if max_definitions is not None and len(definitions) == max_definitions:
+                    break
+            elif def_class[0] == "k":
+                word = definition.text
+        return {"case": Case.EXACT_REQ_MATCH.name, "definitions": definitions}
+    elif soup.find("div", {"class": "item-list"}) is not None:
+        suggestions = []
+        for i in soup.find_all("div", {"class": "n1"}):
+            a, infinitive = i.children
+            suggestions.append({"word": str(next(a.children)), "infinitive": infinitive.strip()})
+        return {"case": Case.APPROX_MATCH.name, "suggestions": suggestions}
+    return {"case": Case.NO_MATCH.name}
+
+
+def streaming_parse_page(html: str, max_definitions=None) -> Dict:
+    # Fed in the chunk size used by RAE.fetch_online.
+    return parse_chunks(
+        (html[i : i + 8192] for i in range(0, len(html), 8192)), max_definitions
+    )
+
+
+def measure(parse: Callable, pages: List[str], max_definitions, repeat: int):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for html in pages:
+            parse(html, max_definitions)
+        times.append((time.perf_counter() - start) / len(pages))
+
+    peaks = []
+    for html in pages:
+        tracemalloc.start()
+        parse(html, max_definitions)
+        peaks.append(tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+    return min(times), statistics.median(peaks), max(peaks)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("fixtures", type=Path)
+    parser.add_argument("--max-definitions", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    pages = [page.read_text() for page in sorted(args.fixtures.glob("*.html"))]
+    if not pages:
+        sys.exit(f"No .html fixtures in {args.fixtures}.")
+
+    mismatches = [
+        i for i, html in enumerate(pages) if legacy_parse_page(html) != streaming_parse_page(html)
+    ]
+    if mismatches:
+        sys.exit(f"{len(mismatches)} pages parse differently, e.g. page #{mismatches[0]}.")
+    print(f"{len(pages)} pages, identical full parses.\n")
+
+    print(f"{'parser':<12}{'limit':>7}{'ms/page':>10}{'peak KiB p50':>14}{'peak KiB max':>14}")
+    for limit in (None, args.max_definitions):
+        for name, parse in (("bs4", legacy_parse_page), ("streaming", streaming_parse_page)):
+            elapsed, peak, peak_max = measure(parse, pages, limit, args.repeat)
+            print(f"{name:<12}{str(limit or '-'):>7}{elapsed * 1000:>10.3f}{peak / 1024:>14.1f}{peak_max / 1024:>14.1f}")
+
+
+if __name__ == "__main__":
+    main()
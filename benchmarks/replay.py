@@ -0,0 +1,254 @@
+"""End to end benchmark of the query path: replays a keystroke trace through KeywordQueryEventListener.on_event against recorded DLE pages.
+
+Three subcommands:
+    record  Saves the DLE pages of the given words to a fixture folder, one <word>.html per word, plus the page of a word the DLE doesn't have as _no_match.html. Existing fixtures are kept, so an interrupted recording can be resumed.
+    trace   Writes a keystroke trace as JSON lines of {"at": seconds, "query": text}. Users type words from the offline data and from the fixtures letter by letter, sometimes fixing a typo with backspace, pause to read the results, and look some words up again later.
+    run     Serves the fixtures with a FixtureServer and replays a trace (or a new one) in real time through a fresh RAE with an empty cache. Like ulauncher, a query only reaches the extension once the user stopped typing for query_debounce seconds (see manifest.json).
+
+For every query that reaches the extension, run measures the time until its results are shown: right away if on_event returned them, or when the background lookup sends them. Queries superseded by the next one before their results arrive are counted apart. It reports latency percentiles, the requests the server got, the lookup mix as counted by RAE.stats, and the peak resident memory. The trace is replayed --passes times on the same extension, so passes after the first show the effect of the cache.
+
+Needs ulauncher importable, as it builds real ExtensionResultItem objects.
+
+Usage (from the repository root):
+    python benchmarks/replay.py record FIXTURES_FOLDER WORDS_FILE [--rate 1]
+    python benchmarks/replay.py trace FIXTURES_FOLDER TRACE_FILE [--words 40]
+    python benchmarks/replay.py run FIXTURES_FOLDER [--trace TRACE_FILE] [--latency 0.1] [--passes 2] [--set offline_suggestions=No]
+
+A trace of 40 words takes about 2.5 minutes per pass in real time. --speed shortens it, but also the time lookups have before the next query supersedes them.
+"""
+import argparse
+import json
+import random
+import resource
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+import main as rae  # noqa: E402
+from cache import DefinitionCache  # noqa: E402
+from dle import BASE_URL, make_session  # noqa: E402
+from fixture_server import NO_MATCH_FIXTURE, FixtureServer  # noqa: E402
+from top_words.corpus_builder import TokenBucket  # noqa: E402
+
+NO_MATCH_WORD = "qzxwvjk"  # Neither in the DLE nor close enough to anything to get suggestions.
+KEY_DELAY = 0.15  # Median seconds between keystrokes.
+READ_PAUSE = (1.5, 4.0)  # Seconds spent reading the results of a word, before typing the next one.
+TYPO_RATE = 0.1
+REPEAT_RATE = 0.25
+LETTERS = "abcdefghijklmnopqrstuvwxyzñ"
+
+
+def record(fixtures: Path, words: List[str], url: str, rate: float):
+    """Saves the DLE page of every word to fixtures, skipping the words already saved."""
+    fixtures.mkdir(parents=True, exist_ok=True)
+    session = make_session()
+    bucket = TokenBucket(rate, 1)
+    pages = {word: fixtures / f"{word}.html" for word in words}
+    pages[NO_MATCH_WORD] = fixtures / NO_MATCH_FIXTURE
+    for word, path in pages.items():
+        if path.is_file():
+            continue
+        bucket.acquire()
+        req = session.get(f"{url}/{word}", timeout=(3, 10))
+        if not (req.ok or req.status_code == 404):
+            print(f"{word}: HTTP {req.status_code}, not saved.")
+            continue
+        req.encoding = req.encoding or "utf-8"
+        path.write_text(req.text)
+        print(f"{word}: {len(req.text)} characters.")
+
+
+def make_trace(online: List[str], offline: List[str], words: int, rng: random.Random) -> List[Dict]:
+    """Keystroke trace of a user typing words and reading their results."""
+    trace = []
+    at = 0.0
+    typed = []
+    for _ in range(words):
+        if typed and rng.random() < REPEAT_RATE:
+            word = rng.choice(typed)
+        else:
+            word = rng.choice(online if rng.random() < 0.5 else offline)
+            typed.append(word)
+        query = ""
+        for letter in word:
+            if rng.random() < TYPO_RATE:
+                at += rng.lognormvariate(0, 0.5) * KEY_DELAY
+                trace.append({"at": round(at, 3), "query": query + rng.choice(LETTERS)})
+                at += rng.lognormvariate(0, 0.5) * KEY_DELAY * 2  # Noticing it takes longer.
+                trace.append({"at": round(at, 3), "query": query})
+            query += letter
+            at += rng.lognormvariate(0, 0.5) * KEY_DELAY
+            trace.append({"at": round(at, 3), "query": query})
+        at += rng.uniform(*READ_PAUSE)
+    return trace
+
+
+def debounce(trace: List[Dict], seconds: float) -> List[Dict]:
+    """The queries of trace that reach the extension, with the time they do."""
+    sent = []
+    for current, following in zip(trace, trace[1:] + [None]):
+        if following is None or following["at"] - current["at"] >= seconds:
+            sent.append({"at": current["at"] + seconds, "query": current["query"]})
+    return sent
+
+
+class TypedQuery:
+    """Stands in for ulauncher's KeywordQueryEvent, whose constructor differs between ulauncher versions. The listener only reads it through these getters."""
+
+    def __init__(self, keyword: str, argument: str):
+        self.keyword = keyword
+        self.argument = argument
+
+    def get_keyword(self) -> str:
+        return self.keyword
+
+    def get_argument(self) -> Optional[str]:
+        return self.argument or None
+
+    def get_query(self) -> str:
+        return f"{self.keyword} {self.argument}"
+
+
+class Replayer:
+    """Drives an extension with a debounced trace, timing each query until its results are shown."""
+
+    def __init__(self, extension: rae.RAE):
+        self.extension = extension
+        self.listener = rae.KeywordQueryEventListener()
+        self._lock = threading.Lock()
+        self._shown: Dict[int, float] = {}  # Query index -> seconds until its results were shown.
+        self._current = -1
+        self._started_at = 0.0
+        self._async = False  # Whether the current query was handed to a background lookup.
+        submit = extension.lookups.submit
+
+        def timed_submit(lookup, callback):
+            index, started_at = self._current, self._started_at
+
+            def timed_callback(result):
+                with self._lock:
+                    self._shown[index] = time.perf_counter() - started_at
+                return callback(result)
+
+            self._async = True
+            return submit(lookup, timed_callback)
+
+        extension.lookups.submit = timed_submit
+
+    def replay(self, queries: List[Dict], speed: float, settle: float):
+        """Returns the seconds until the results of each query were shown (None if superseded), and the seconds until on_event returned."""
+        keyword = self.extension.preferences["kw"]
+        returned = []
+        start = time.perf_counter()
+        for index, query in enumerate(queries):
+            delay = start + query["at"] / speed - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            self._current, self._started_at, self._async = index, time.perf_counter(), False
+            self.listener.on_event(TypedQuery(keyword, query["query"]), self.extension)
+            elapsed = time.perf_counter() - self._started_at
+            returned.append(elapsed)
+            if not self._async:
+                with self._lock:
+                    self._shown[index] = elapsed
+        time.sleep(settle)  # Let the last lookup finish.
+        with self._lock:
+            shown = [self._shown.get(index) for index in range(len(queries))]
+            self._shown.clear()
+        return shown, returned
+
+
+def percentiles(samples: List[float]) -> str:
+    if len(samples) < 2:
+        return "-"
+    quantiles = statistics.quantiles(samples, n=100, method="inclusive")
+    return "  ".join(
+        f"{name} {value * 1e3:.1f}" for name, value in [("p50", quantiles[49]), ("p95", quantiles[94]), ("p99", quantiles[98]), ("max", max(samples))]
+    )
+
+
+def run(args):
+    rng = random.Random(args.seed)
+    online = [p.stem for p in args.fixtures.glob("*.html") if p.name != NO_MATCH_FIXTURE]
+    if args.trace is not None:
+        trace = [json.loads(line) for line in args.trace.read_text().splitlines() if line.strip()]
+    else:
+        trace = make_trace(online, rae.OFFLINE_STORE.headwords(), args.words, rng)
+    seconds = rae.DEFAULT_MANIFEST["options"]["query_debounce"] if args.debounce is None else args.debounce
+    queries = debounce(trace, seconds)
+    print(f"{len(trace)} keystrokes, {len(queries)} queries after a {seconds} s debounce, replayed at {args.speed}x")
+
+    with FixtureServer(args.fixtures, latency=args.latency) as server, tempfile.TemporaryDirectory() as tmp:
+        rae.BASE_URL = server.url
+        extension = rae.RAE()
+        extension.preferences.update(rae.DEFAULT_PREFERENCES)
+        extension.preferences.update(preference.split("=", 1) for preference in args.set)
+        extension.cache = DefinitionCache(Path(tmp) / "cache.sqlite3", ttl=1e9, max_entries=rae.CACHE_MAX_ENTRIES)
+        replayer = Replayer(extension)
+        for number in range(1, args.passes + 1):
+            requests_before = server.requests
+            counters_before = dict(extension.stats.counters)
+            shown, returned = replayer.replay(queries, args.speed, settle=args.latency * 4 + 1)
+            counters = {
+                name: count - counters_before.get(name, 0)
+                for name, count in extension.stats.counters.items()
+                if count != counters_before.get(name, 0)
+            }
+            print(f"pass {number}")
+            print(f"  results shown (ms):   {percentiles([s for s in shown if s is not None])}")
+            print(f"  on_event (ms):        {percentiles(returned)}")
+            print(f"  superseded queries:   {shown.count(None)}")
+            print(f"  requests:             {server.requests - requests_before}")
+            print(f"  lookups:              {json.dumps(counters, sort_keys=True)}")
+    print(f"peak RSS: {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:.1f} MiB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    record_parser = subparsers.add_parser("record", help="Save DLE pages as fixtures.")
+    record_parser.add_argument("fixtures", type=Path)
+    record_parser.add_argument("words", type=Path, help="File with one word per line.")
+    record_parser.add_argument("--url", default=BASE_URL)
+    record_parser.add_argument("--rate", type=float, default=1, help="Requests per second. Be gentle with the DLE.")
+
+    trace_parser = subparsers.add_parser("trace", help="Write a keystroke trace.")
+    trace_parser.add_argument("fixtures", type=Path)
+    trace_parser.add_argument("output", type=Path)
+
+    run_parser = subparsers.add_parser("run", help="Replay a trace against the fixtures.")
+    run_parser.add_argument("fixtures", type=Path)
+    run_parser.add_argument("--trace", type=Path, help="Trace written by the trace subcommand. Defaults to a new one.")
+    run_parser.add_argument("--latency", type=float, default=0.1, help="Seconds the fixture server waits before each answer.")
+    run_parser.add_argument("--debounce", type=float, help="Defaults to query_debounce in manifest.json.")
+    run_parser.add_argument("--speed", type=float, default=1, help="Replay the trace this many times faster.")
+    run_parser.add_argument("--passes", type=int, default=2)
+    run_parser.add_argument("--set", action="append", default=[], metavar="ID=VALUE", help="Override a preference, e.g. --set offline_suggestions=No. Can be repeated.")
+
+    for subparser in [trace_parser, run_parser]:
+        subparser.add_argument("--words", type=int, default=40, help="Words typed in a new trace.")
+        subparser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    if args.command == "record":
+        words = [line.strip() for line in args.words.read_text().splitlines() if line.strip()]
+        record(args.fixtures, words, args.url, args.rate)
+    elif args.command == "trace":
+        online = [p.stem for p in args.fixtures.glob("*.html") if p.name != NO_MATCH_FIXTURE]
+        trace = make_trace(online, rae.OFFLINE_STORE.headwords(), args.words, random.Random(args.seed))
+        args.output.write_text("".join(json.dumps(event, ensure_ascii=False) + "\n" for event in trace))
+    else:
+        run(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""Measures the offline full text search (OfflineStore.search): build cost, store size, time to open the store and query latency.
+
+Runs on the shipped 1k corpus and on a synthetic corpus (50k words by default, see dataset_format.py). Queries are a few words taken from random definitions, the last one half typed, as they look while the user types.
+
+Usage (from the repository root):
+    python benchmarks/reverse_search.py [--synthetic-words 50000] [--queries 1000]
+"""
+import argparse
+import json
+import random
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from compact import write_compact  # noqa: E402
+from dataset_format import synthetic_corpus  # noqa: E402
+from offline_store import OFFLINE_SOURCE, OfflineStore, build_store  # noqa: E402
+
+
+def make_queries(data: Dict, amount: int, rng: random.Random) -> List[str]:
+    definitions = [entry["definition"] for entries in data["words"].values() for entry in entries]
+    queries = []
+    while len(queries) < amount:
+        tokens = rng.choice(definitions).split()
+        if len(tokens) < 2:
+            continue
+        start = rng.randrange(len(tokens) - 1)
+        query = tokens[start : start + rng.randint(2, 4)]
+        query[-1] = query[-1][: max(3, len(query[-1]) * 2 // 3)]
+        queries.append(" ".join(query))
+    return queries
+
+
+def report(name: str, data: Dict, tmp: Path, queries: int, rng: random.Random):
+    source = tmp / f"{name}.rdle"
+    write_compact(data, source)
+    path = tmp / f"{name}.sqlite3"
+
+    start = time.perf_counter()
+    build_store(source, path)
+    build = time.perf_counter() - start
+
+    start = time.perf_counter()
+    store = OfflineStore(source, path)
+    store.resolve("casa")
+    open_ms = (time.perf_counter() - start) * 1e3
+
+    latencies = []
+    for query in make_queries(data, queries, rng):
+        start = time.perf_counter()
+        store.search(query, 10)
+        latencies.append((time.perf_counter() - start) * 1e3)
+    latencies.sort()
+    print(
+        f"{name:<12}{len(data['words']):>8}{build:>10.2f}{path.stat().st_size / 2**20:>10.1f}{open_ms:>10.2f}"
+        f"{statistics.median(latencies):>9.2f}{latencies[int(len(latencies) * 0.95)]:>9.2f}{latencies[-1]:>9.2f}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--synthetic-words", type=int, default=50000)
+    parser.add_argument("--queries", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    real = json.loads(OFFLINE_SOURCE.read_text())
+    print(f"{'corpus':<12}{'words':>8}{'build s':>10}{'size MB':>10}{'open ms':>10}{'p50 ms':>9}{'p95 ms':>9}{'max ms':>9}")
+    with tempfile.TemporaryDirectory() as tmp:
+        report("1k", real, Path(tmp), args.queries, rng)
+        report("synthetic", synthetic_corpus(real, args.synthetic_words, rng), Path(tmp), args.queries, rng)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""Measures per-query latency of DLE lookups with a new connection per request (cold) against a shared keep-alive session (warm).
+
+Each query downloads and parses a page from a local FixtureServer. Cold queries call requests.get, as RAE.fetch_online used to, so every one of them opens a new connection. Warm queries reuse the session from dle.make_session. Revalidation sends If-None-Match with the ETag of the first answer, which the server answers with an empty 304.
+
+The fixture server speaks plain HTTP on localhost, so the cold numbers only include a TCP handshake. Against dle.rae.es (--url https://dle.rae.es) every cold query also pays a TLS handshake over a real round trip, and the gap is much wider.
+
+Usage (from the repository root):
+    python benchmarks/session_latency.py FIXTURES_FOLDER [--queries 200] [--latency 0.02] [--url URL]
+"""
+import argparse
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Callable, List
+
+import requests
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from dle import HEADERS, make_session, parse_chunks  # noqa: E402
+from fixture_server import NO_MATCH_FIXTURE, FixtureServer  # noqa: E402
+
+TIMEOUT = (3, 5)
+
+
+def percentiles(samples: List[float]):
+    quantiles = statistics.quantiles(samples, n=100)
+    return statistics.median(samples), quantiles[94], quantiles[98]
+
+
+def measure(words: List[str], lookup: Callable[[str], None]) -> List[float]:
+    samples = []
+    for word in words:
+        start = time.perf_counter()
+        lookup(word)
+        samples.append((time.perf_counter() - start) * 1e3)
+    return samples
+
+
+def parse_response(req: requests.Response):
+    if req.encoding is None:
+        req.encoding = "utf-8"
+    parse_chunks(req.iter_content(chunk_size=8192, decode_unicode=True))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("fixtures", type=Path)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0, help="Seconds the fixture server waits before each answer.")
+    parser.add_argument("--url", help="Query this server instead of starting a fixture server.")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    words = [p.stem for p in args.fixtures.glob("*.html") if p.name != NO_MATCH_FIXTURE]
+    words = [rng.choice(words) for _ in range(args.queries)]
+
+    server = None
+    if args.url is None:
+        server = FixtureServer(args.fixtures, latency=args.latency).start()
+    url = args.url or server.url
+
+    def cold(word: str):
+        with requests.get(f"{url}/{word}", headers=HEADERS, timeout=TIMEOUT, stream=True) as req:
+            parse_response(req)
+
+    session = make_session()
+
+    def warm(word: str):
+        with session.get(f"{url}/{word}", timeout=TIMEOUT, stream=True) as req:
+            parse_response(req)
+
+    etags = {}
+
+    def revalidate(word: str):
+        with session.get(
+            f"{url}/{word}", headers={"If-None-Match": etags[word]}, timeout=TIMEOUT, stream=True
+        ) as req:
+            if req.status_code != 304:
+                parse_response(req)
+
+    try:
+        warm(words[0])  # Open the pooled connection, so warm queries are all warm.
+        for word in set(words):
+            etags[word] = session.get(f"{url}/{word}", timeout=TIMEOUT).headers.get("ETag") or ""
+        print(f"{'mode':<12}{'p50 (ms)':>10}{'p95 (ms)':>10}{'p99 (ms)':>10}{'total (s)':>11}")
+        for name, lookup in (("cold", cold), ("warm", warm), ("revalidate", revalidate)):
+            samples = measure(words, lookup)
+            p50, p95, p99 = percentiles(samples)
+            print(f"{name:<12}{p50:>10.2f}{p95:>10.2f}{p99:>10.2f}{sum(samples) / 1e3:>11.2f}")
+    finally:
+        if server is not None:
+            server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""Stress test of DefinitionCache shared by several processes, like the extension, batch.py and the corpus builder using the same file.
+
+All processes start at once on a new file, so they also race to create its tables. Each process opens its own DefinitionCache on the shared file and, for --seconds, looks up random words of a vocabulary larger than the cache (so entries keep being evicted), storing the word whenever it isn't cached, and sometimes remembering a word without match. Every stored page carries a checksum of its content, verified on every read.
+
+Reported for each amount of processes: operations per second, lookups and stores per second, p99 latency of an operation, operations that failed (e.g. "database is locked"), corrupt reads, whether the cache exceeded max_entries, and the result of PRAGMA integrity_check at the end.
+
+Usage (from the repository root):
+    python benchmarks/shared_cache.py [--processes 1 2 4 8] [--seconds 5] [--max-entries 500]
+"""
+import argparse
+import hashlib
+import multiprocessing
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from cache import DefinitionCache  # noqa: E402
+from dle import Case  # noqa: E402
+
+
+def page(word: str, rng: random.Random) -> Dict:
+    definitions = [
+        {"word": word, "abbrs": "f.", "definition": " ".join(rng.choices(["casa", "de", "la", "cosa", "que"], k=30)), "html_code": f"{word}{i}"}
+        for i in range(rng.randint(1, 10))
+    ]
+    return {"case": Case.EXACT_REQ_MATCH.name, "definitions": definitions, "check": checksum(definitions)}
+
+
+def checksum(definitions: List[Dict]) -> str:
+    return hashlib.sha1(repr(definitions).encode("utf-8")).hexdigest()
+
+
+def worker(args: Tuple[Path, int, float, int, int]) -> Tuple[Counter, List[float]]:
+    path, max_entries, seconds, vocabulary, seed = args
+    rng = random.Random(seed)
+    cache = DefinitionCache(path, ttl=1e9, max_entries=max_entries)
+    counts = Counter()
+    latencies = []
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        word = f"palabra{int(rng.paretovariate(0.8)) % vocabulary}"  # A few words are looked up much more often.
+        start = time.perf_counter()
+        try:
+            if rng.random() < 0.05:
+                cache.add_miss(f"no{word}")
+                counts["miss"] += 1
+            else:
+                entry = cache.get_entry(word)
+                counts["lookup"] += 1
+                if entry is None:
+                    cache.set(word, page(word, rng))
+                    counts["store"] += 1
+                elif entry.result["check"] != checksum(entry.result["definitions"]) or entry.result["definitions"][0]["word"] != word:
+                    counts["corrupt"] += 1
+        except sqlite3.Error as e:
+            counts[f"error: {e}"] += 1
+        latencies.append(time.perf_counter() - start)
+    return counts, latencies
+
+
+def run(processes: int, args, tmp: Path) -> str:
+    path = tmp / f"cache{processes}.sqlite3"
+    tasks = [(path, args.max_entries, args.seconds, args.vocabulary, args.seed + i) for i in range(processes)]
+    with multiprocessing.get_context("spawn").Pool(processes) as pool:
+        results = pool.map(worker, tasks)
+    counts = sum((result[0] for result in results), Counter())
+    latencies = sorted(latency for result in results for latency in result[1])
+    errors = sum(count for name, count in counts.items() if name.startswith("error"))
+    for name, count in counts.items():
+        if name.startswith("error"):
+            print(f"    {count} x {name}")
+
+    connection = sqlite3.connect(str(path))
+    (integrity,) = connection.execute("PRAGMA integrity_check").fetchone()
+    (size,) = connection.execute("SELECT COUNT(*) FROM entries").fetchone()
+    connection.close()
+    operations = counts["lookup"] + counts["miss"]
+    return (
+        f"{processes:>9}{operations / args.seconds:>10.0f}{counts['lookup'] / args.seconds:>10.0f}{counts['store'] / args.seconds:>9.0f}"
+        f"{statistics.quantiles(latencies, n=100)[98] * 1e3:>9.2f}{errors:>8}{counts['corrupt']:>9}{size:>8}{integrity:>11}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--processes", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--seconds", type=float, default=5)
+    parser.add_argument("--max-entries", type=int, default=500)
+    parser.add_argument("--vocabulary", type=int, default=2000, help="Distinct words looked up.")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    print(f"{args.vocabulary} words, at most {args.max_entries} cached, {args.seconds} s per run")
+    print(f"{'processes':>9}{'ops/s':>10}{'lookups/s':>10}{'stores/s':>9}{'p99 ms':>9}{'errors':>8}{'corrupt':>9}{'entries':>8}{'integrity':>11}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for processes in args.processes:
+            print(run(processes, args, Path(tmp)))
+
+
+if __name__ == "__main__":
+    main()
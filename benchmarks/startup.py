@@ -0,0 +1,122 @@
+"""Measures the cold start of the extension: importing main, creating RAE and answering the first queries, each in a new process.
+
+Every run starts a new interpreter that imports main, creates the extension and sends two queries through KeywordQueryEventListener.on_event: a stored word, and a word close to stored words (answered with offline suggestions). Times are measured from just before the process is started, so they include the interpreter startup, reported apart as "python -c pass".
+
+The first run also builds the offline store in an empty cache folder and writes the bytecode caches, so it is reported apart. PYTHONDONTWRITEBYTECODE is removed from the environment of the runs, as the extension always runs with its bytecode cached.
+
+Then main is imported under python -X importtime, and the modules it imports directly are listed by their cumulative import time.
+
+Needs ulauncher importable, as main imports it.
+
+Usage (from the repository root):
+    python benchmarks/startup.py [--runs 10] [--word casa] [--close-word casaa]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+ROOT = Path(__file__).resolve().parent.parent
+
+CHILD = """
+import sys, time, json
+sys.path.insert(0, {root!r})
+marks = {{}}
+import main as rae
+marks["import main"] = time.time()
+
+class TypedQuery:  # Like replay.TypedQuery, without importing what replay imports.
+    def __init__(self, keyword, argument):
+        self.keyword, self.argument = keyword, argument
+    def get_keyword(self):
+        return self.keyword
+    def get_argument(self):
+        return self.argument
+
+extension = rae.RAE()
+extension.preferences.update(rae.DEFAULT_PREFERENCES)
+marks["RAE()"] = time.time()
+listener = rae.KeywordQueryEventListener()
+listener.on_event(TypedQuery("rae", {word!r}), extension)
+marks["stored word shown"] = time.time()
+listener.on_event(TypedQuery("rae", {close_word!r}), extension)
+marks["suggestions shown"] = time.time()
+marks["requests imported"] = "requests" in sys.modules
+print(json.dumps(marks))
+"""
+
+
+def run_child(code: str, env: Dict[str, str]) -> Tuple[float, Dict]:
+    """Returns when the process was started and the marks it printed."""
+    start = time.time()
+    out = subprocess.run([sys.executable, "-c", code], env=env, cwd=ROOT, capture_output=True, text=True, check=True)
+    return start, json.loads(out.stdout.splitlines()[-1]) if out.stdout.strip() else {}
+
+
+def import_breakdown(env: Dict[str, str]) -> List[Tuple[int, str]]:
+    """Cumulative microseconds of each module imported directly by main, as reported by -X importtime."""
+    out = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"], env=env, cwd=ROOT, capture_output=True, text=True, check=True
+    )
+    entries = []
+    for line in out.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line or "self [us]" in line:
+            continue
+        _, cumulative, name = line.split("|")
+        depth = (len(name) - len(name.lstrip())) // 2
+        entries.append((depth, int(cumulative), name.strip()))
+    main_at = max(i for i, (depth, _, name) in enumerate(entries) if depth == 0 and name == "main")
+    children = []
+    for depth, cumulative, name in reversed(entries[:main_at]):
+        if depth == 0:
+            break
+        if depth == 1:
+            children.append((cumulative, name))
+    return [(entries[main_at][1], "main")] + sorted(children, reverse=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--word", default="casa", help="A stored word.")
+    parser.add_argument("--close-word", default="casaa", help="A word that isn't stored but is close to stored words.")
+    parser.add_argument("--top", type=int, default=12, help="Direct imports of main to list.")
+    args = parser.parse_args()
+
+    code = CHILD.format(root=str(ROOT), word=args.word, close_word=args.close_word)
+    with tempfile.TemporaryDirectory() as tmp:
+        env = {key: value for key, value in os.environ.items() if key != "PYTHONDONTWRITEBYTECODE"}
+        env["XDG_CACHE_HOME"] = tmp
+        env["PYTHONPATH"] = os.pathsep.join(filter(None, [str(ROOT), os.environ.get("PYTHONPATH")]))
+
+        baseline = []
+        for _ in range(args.runs):
+            start = time.time()
+            subprocess.run([sys.executable, "-c", "pass"], env=env, check=True)
+            baseline.append(time.time() - start)
+
+        start, first = run_child(code, env)
+        runs = [run_child(code, env) for _ in range(args.runs)]
+        names = [name for name, value in first.items() if not isinstance(value, bool)]
+        print(f"{'ms since process start':<24}{'first run':>10}{'median':>10}{'min':>10}")
+        print(f"{'python -c pass':<24}{'':>10}{statistics.median(baseline) * 1e3:>10.1f}{min(baseline) * 1e3:>10.1f}")
+        for name in names:
+            samples = [marks[name] - started for started, marks in runs]
+            print(f"{name:<24}{(first[name] - start) * 1e3:>10.1f}{statistics.median(samples) * 1e3:>10.1f}{min(samples) * 1e3:>10.1f}")
+        print(f"requests imported by then: {first['requests imported']}")
+
+        breakdowns = [import_breakdown(env) for _ in range(args.runs)]
+        print(f"\n{'import (-X importtime)':<32}{'median ms':>10}")
+        for name in [name for _, name in breakdowns[0][: args.top + 1]]:
+            samples = [dict((n, c) for c, n in breakdown).get(name, 0) for breakdown in breakdowns]
+            print(f"{name:<32}{statistics.median(samples) / 1e3:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""Measures SuggestionIndex build time and lookup latency as the corpus grows.
+
+Corpora start from the real offline headwords and are padded with pseudo-Spanish words made of random syllables. Queries are prefixes of headwords (as while typing) and headwords with one or two random typos.
+
+Usage (from the repository root):
+    python benchmarks/suggest_latency.py [--sizes 1000 10000 100000] [--queries 2000]
+"""
+import argparse
+import json
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from suggest import SuggestionIndex  # noqa: E402
+
+SYLLABLES = [c + v for c in "bcdfglmnprstvzñ" for v in "aeiouáéíó"] + list("aeiou")
+LETTERS = "abcdefghijklmnñopqrstuvwxyzáéíóú"
+
+
+def corpus(size: int, rng: random.Random):
+    with (ROOT / "top_words" / "top_1k_spanish_words.json").open("r") as f:
+        words = set(json.load(f)["words"])
+    while len(words) < size:
+        words.add("".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 5))))
+    return list(words)[:size]
+
+
+def typo(word: str, rng: random.Random) -> str:
+    for _ in range(rng.randint(1, 2)):
+        i = rng.randrange(len(word))
+        op = rng.choice(["delete", "insert", "replace"])
+        if op == "delete" and len(word) > 1:
+            word = word[:i] + word[i + 1 :]
+        elif op == "insert":
+            word = word[:i] + rng.choice(LETTERS) + word[i:]
+        else:
+            word = word[:i] + rng.choice(LETTERS) + word[i + 1 :]
+    return word
+
+
+def percentiles(samples):
+    quantiles = statistics.quantiles(samples, n=100)
+    return statistics.median(samples), quantiles[94], quantiles[98]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    print(f"{'words':>8}{'build (s)':>11}  {'prefix p50/p95/p99 (µs)':>26}  {'typo p50/p95/p99 (µs)':>24}")
+    for size in args.sizes:
+        words = corpus(size, rng)
+        start = time.perf_counter()
+        index = SuggestionIndex(words)
+        build = time.perf_counter() - start
+
+        sample = [rng.choice(words) for _ in range(args.queries)]
+        prefix_queries = [w[: rng.randint(1, len(w))] for w in sample]
+        typo_queries = [typo(w, rng) for w in sample]
+
+        results = []
+        for queries in (prefix_queries, typo_queries):
+            samples = []
+            for query in queries:
+                start = time.perf_counter()
+                index.suggest(query, 10)
+                samples.append((time.perf_counter() - start) * 1e6)
+            results.append("{:.0f}/{:.0f}/{:.0f}".format(*percentiles(samples)))
+        print(f"{size:>8}{build:>11.2f}  {results[0]:>26}  {results[1]:>24}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""Writes synthetic DLE pages built from the offline dataset, as a fixture corpus for benchmarks/parse_dle.py.
+
+Exact pages wrap the stored definitions of a word in the markup of the DLE: a page chrome with a long navigation menu, scripts with markup in strings, and a footer; an <article> with a <header>, numbered <p class="j"> definitions with <abbr> notes and <mark> words, and halfway a <p class="k6"> locution followed by a <p class="m"> definition; then a second article and a stray item list, which must not be read. Approximate pages list 20 random headwords as suggestions. A no match page is written as _no_match.html.
+
+The same arguments always write the same pages, as long as the dataset doesn't change. benchmarks/fixtures holds the pages written with --words 40 --approx 5. The defaults write the corpus the parser was benchmarked with.
+
+Usage (from the repository root):
+    python benchmarks/synthetic_pages.py OUTPUT_FOLDER [--words 300] [--approx 30] [--seed 3]
+"""
+import argparse
+import html
+import json
+import random
+import sys
+from pathlib import Path
+from typing import Dict, List
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from offline_store import OFFLINE_SOURCE  # noqa: E402
+
+HEAD = (
+    '<!DOCTYPE html><html lang="es"><head><meta charset="utf-8"><title>x</title>'
+    '<script>var a="<p class=\\"j\\">"; if (1<2) {}</script><style>p{}</style>'
+    + '<link rel="stylesheet" href="/a.css">' * 20
+    + "</head><body><header><nav><ul>"
+    + "".join(f'<li><a href="/{i}">item {i}</a></li>' for i in range(200))
+    + '</ul></nav></header><div id="resultados">'
+)
+TAIL = "</div><footer>" + "<p>footer &amp; stuff<br>more</p>" * 50 + "<script>window.x=1;</script></footer></body></html>"
+
+
+def exact_page(word: str, entries: List[Dict[str, str]], rng: random.Random) -> str:
+    paragraphs = []
+    for i, entry in enumerate(entries):
+        words = " ".join(
+            f'<mark data-id="{j}">{html.escape(token)}</mark>' if rng.random() < 0.8 else html.escape(token)
+            for j, token in enumerate(entry["definition"].split(" "))
+        )
+        abbrs = " ".join(f'<abbr class="d" title="t">{html.escape(abbr)}</abbr>' for abbr in entry["abbrs"].split(" ") if abbr)
+        kind = "j" if i % 7 else "j1"
+        paragraphs.append(f'<p class="{kind}" id="{entry["html_code"]}"><span class="n_acep">{i + 1}. </span>{abbrs} {words}</p>')
+        if i == len(entries) // 2:
+            paragraphs.append(f'<p class="k6" id="k{i}">{word} de <i>prueba</i></p>')
+            paragraphs.append(
+                f'<p class="m" id="m{i}"><span class="n_acep">1. </span><abbr>loc. adv.</abbr> <mark>Cosa</mark> &nbsp;rara&amp;.<br></p>'
+            )
+    article = (
+        f'<article id="a1"><header class="f" title="Definición de {word}">{word}<sup>1</sup></header><p class="n2">Del lat. {word}.</p>'
+        + "".join(paragraphs)
+        + "</article>"
+    )
+    second_article = f'<article id="a2"><header>{word}<sup>2</sup></header><p class="j" id="zz">otra.</p></article>'
+    stray_list = '<div class="item-list"><div class="n1"><a href="/x">x</a> (x)</div></div>'
+    return HEAD + article + second_article + stray_list + TAIL
+
+
+def approx_page(words: List[str]) -> str:
+    items = "".join(
+        f'<div class="n1"><a data-acc="LISTA APROX" href="/{word}">{word}<sup>{k}</sup></a> ({word})</div>' for k, word in enumerate(words)
+    )
+    return HEAD + f'<div class="item-list">{items}</div>' + TAIL
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("output", type=Path)
+    parser.add_argument("--words", type=int, default=300, help="Words of the dataset to consider for exact pages. Those without definitions are skipped.")
+    parser.add_argument("--approx", type=int, default=30, help="Approximate pages.")
+    parser.add_argument("--seed", type=int, default=3)
+    args = parser.parse_args()
+
+    with OFFLINE_SOURCE.open("r") as f:
+        data = json.load(f)["words"]
+    rng = random.Random(args.seed)
+    args.output.mkdir(parents=True, exist_ok=True)
+    written = 0
+    for word, entries in list(data.items())[: args.words]:
+        if entries:
+            (args.output / f"{word}.html").write_text(exact_page(word, entries, rng))
+            written += 1
+    for n in range(args.approx):
+        (args.output / f"approx{n}.html").write_text(approx_page(rng.sample(list(data), 20)))
+    (args.output / "_no_match.html").write_text(HEAD + "<p>Aviso: no está.</p>" + TAIL)
+    print(f"Wrote {written + args.approx + 1} pages to {args.output}.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,265 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, NamedTuple, Optional
+
+from dle import normalize_key
+
+CACHE_VERSION = 2  # Bump whenever the schema changes. Older caches are dropped.
+CACHE_FOLDER = (
+    Path(os.environ.get("XDG_CACHE_HOME", Path.home() / ".cache")) / "ulauncher-rae-dle"
+)
+CACHE_PATH = CACHE_FOLDER / "definitions.sqlite3"
+CACHE_TTL = 30 * 24 * 60 * 60  # In seconds.
+CACHE_MAX_ENTRIES = 5000
+NEGATIVE_TTL = 24 * 60 * 60  # In seconds. Short, as a no match page could also be a transient error or a changed page structure.
+ACCESS_RESOLUTION = 60 * 60  # In seconds. accessed_at is only updated when older than this, so most hits don't write.
+BUSY_TIMEOUT = 10  # Seconds to wait for another process to finish writing before failing with "database is locked".
+
+logger = logging.getLogger(__name__)
+
+
+def enable_wal(connection: sqlite3.Connection):
+    """Switches the database of connection to WAL, so readers don't block writers nor the other way around.
+
+    Unlike other statements, changing the journal mode fails right away with "database is locked" instead of waiting for the busy timeout while another process holds a lock, e.g. when several processes create the file at once. So it is retried here, for up to BUSY_TIMEOUT seconds.
+
+    Args:
+        connection (sqlite3.Connection): The connection.
+
+    Raises:
+        sqlite3.OperationalError: If the database was still locked after BUSY_TIMEOUT seconds.
+    """
+    deadline = time.monotonic() + BUSY_TIMEOUT
+    while True:
+        try:
+            connection.execute("PRAGMA journal_mode=WAL")
+            return
+        except sqlite3.OperationalError:
+            if time.monotonic() > deadline:
+                raise
+            time.sleep(0.01)
+
+
+class CacheEntry(NamedTuple):
+    result: Dict
+    stored_at: float
+    etag: Optional[str]
+    last_modified: Optional[str]
+
+
+class DefinitionCache:
+    """Persistent cache of parsed DLE lookups, backed by SQLite.
+
+    Entries are keyed by the normalized word and hold the already parsed page (see dle.parse_page), so a hit needs neither the network nor the HTML parser.
+    Entries older than ttl seconds are treated as missing by get, but are kept (with the ETag and Last-Modified of their response) so they can be revalidated with a conditional request. When more than max_entries are stored, the least recently used ones are evicted.
+    Words for which the DLE has nothing, not even suggestions, are remembered apart for negative_ttl seconds (see add_miss and is_miss), so retyping them doesn't query the DLE again.
+
+    The connection is opened on first use, so creating the cache is free.
+
+    Several processes can use the same file at once (the extension, batch.py, the corpus builder): WAL lets readers go on while one process writes, writers wait up to BUSY_TIMEOUT for each other, and every change is a short transaction. Hits only write when accessed_at is older than ACCESS_RESOLUTION, so least recently used is approximate to that resolution.
+    """
+
+    def __init__(self, path: Path, ttl: float, max_entries: int, negative_ttl: float = NEGATIVE_TTL):
+        """
+        Args:
+            path (Path): SQLite file. Parent folders are created as needed.
+            ttl (float): Seconds after which an entry expires.
+            max_entries (int): Maximum amount of entries kept on disk.
+            negative_ttl (float, optional): Seconds after which a word without match expires. Defaults to NEGATIVE_TTL.
+        """
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.negative_ttl = negative_ttl
+        self._connection: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        if self._connection is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            connection = sqlite3.connect(str(self.path), timeout=BUSY_TIMEOUT, check_same_thread=False)
+            try:
+                self._setup(connection)
+            except sqlite3.Error:
+                connection.close()  # Don't keep a half set up connection, or the write lock it may hold.
+                raise
+            self._connection = connection
+            logger.debug(f"Opened definition cache at {self.path}.")
+        return self._connection
+
+    @staticmethod
+    def _setup(connection: sqlite3.Connection):
+        """Enables WAL and creates the tables, dropping those of an older CACHE_VERSION."""
+        enable_wal(connection)
+        connection.execute("PRAGMA synchronous=NORMAL")
+        # Another process may be creating or dropping the tables right now. Check the version and create them under the write lock.
+        connection.execute("BEGIN IMMEDIATE")
+        (version,) = connection.execute("PRAGMA user_version").fetchone()
+        if version != CACHE_VERSION:
+            logger.info(f"Definition cache has version {version}, expected {CACHE_VERSION}. Dropping it.")
+            connection.execute("DROP TABLE IF EXISTS entries")
+            connection.execute("DROP TABLE IF EXISTS misses")
+            connection.execute(f"PRAGMA user_version = {CACHE_VERSION}")
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+            "stored_at REAL NOT NULL, accessed_at REAL NOT NULL, "
+            "etag TEXT, last_modified TEXT)"
+        )
+        connection.execute(
+            "CREATE INDEX IF NOT EXISTS entries_accessed_at ON entries (accessed_at)"
+        )
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS misses (key TEXT PRIMARY KEY, stored_at REAL NOT NULL)"
+        )
+        connection.execute(
+            "CREATE INDEX IF NOT EXISTS misses_stored_at ON misses (stored_at)"
+        )
+        connection.commit()
+
+    def get(self, word: str) -> Optional[Dict]:
+        """Returns the cached lookup for word, if there is a fresh one.
+
+        Args:
+            word (str): The word as typed by the user.
+
+        Returns:
+            Optional[Dict]: The parsed page, or None on a miss or an expired entry.
+        """
+        entry = self.get_entry(word)
+        if entry is None:
+            logger.debug(f"Cache miss for {word=}.")
+            return None
+        if self.expired(entry):
+            logger.debug(f"Cache entry for {word=} expired.")
+            return None
+        logger.debug(f"Cache hit for {word=}.")
+        return entry.result
+
+    def get_entry(self, word: str) -> Optional[CacheEntry]:
+        """Returns the cached lookup for word and its metadata, even if it expired.
+
+        Args:
+            word (str): The word as typed by the user.
+
+        Returns:
+            Optional[CacheEntry]: The entry, or None on a miss.
+        """
+        key = normalize_key(word)
+        with self._lock:
+            row = self.connection.execute(
+                "SELECT value, stored_at, accessed_at, etag, last_modified FROM entries WHERE key = ?",
+                (key,),
+            ).fetchone()
+            if row is None:
+                return None
+            now = time.time()
+            if now - row[2] > ACCESS_RESOLUTION:
+                self.connection.execute(
+                    "UPDATE entries SET accessed_at = ? WHERE key = ?", (now, key)
+                )
+                self.connection.commit()
+        value, stored_at, _, etag, last_modified = row
+        return CacheEntry(json.loads(value), stored_at, etag, last_modified)
+
+    def expired(self, entry: CacheEntry) -> bool:
+        """Whether entry is older than ttl, so get ignores it."""
+        return time.time() - entry.stored_at > self.ttl
+
+    def set(
+        self,
+        word: str,
+        result: Dict,
+        etag: Optional[str] = None,
+        last_modified: Optional[str] = None,
+    ):
+        """Stores the parsed page for word, evicting the least recently used entries if the cache is full.
+
+        Args:
+            word (str): The word as typed by the user.
+            result (Dict): The parsed page.
+            etag (Optional[str], optional): ETag header of the response. Defaults to None.
+            last_modified (Optional[str], optional): Last-Modified header of the response. Defaults to None.
+        """
+        key = normalize_key(word)
+        now = time.time()
+        with self._lock:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO entries (key, value, stored_at, accessed_at, etag, last_modified) VALUES (?, ?, ?, ?, ?, ?)",
+                (key, json.dumps(result, ensure_ascii=False), now, now, etag, last_modified),
+            )
+            self.connection.execute("DELETE FROM misses WHERE key = ?", (key,))
+            (size,) = self.connection.execute("SELECT COUNT(*) FROM entries").fetchone()
+            if size > self.max_entries:
+                logger.debug(f"Cache has {size} entries. Evicting {size - self.max_entries}.")
+                self.connection.execute(
+                    "DELETE FROM entries WHERE key IN (SELECT key FROM entries ORDER BY accessed_at ASC LIMIT ?)",
+                    (size - self.max_entries,),
+                )
+            self.connection.commit()
+
+    def touch(self, word: str):
+        """Marks the entry for word as fresh again, e.g. after the DLE answered a conditional request with 304 Not Modified.
+
+        Args:
+            word (str): The word as typed by the user.
+        """
+        now = time.time()
+        with self._lock:
+            self.connection.execute(
+                "UPDATE entries SET stored_at = ?, accessed_at = ? WHERE key = ?",
+                (now, now, normalize_key(word)),
+            )
+            self.connection.commit()
+
+    def add_miss(self, word: str):
+        """Remembers that the DLE has no match for word, for negative_ttl seconds. Expired words are forgotten meanwhile.
+
+        Args:
+            word (str): The word as typed by the user.
+        """
+        key = normalize_key(word)
+        now = time.time()
+        with self._lock:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO misses (key, stored_at) VALUES (?, ?)", (key, now)
+            )
+            self.connection.execute(
+                "DELETE FROM misses WHERE stored_at < ?", (now - self.negative_ttl,)
+            )
+            self.connection.commit()
+
+    def is_miss(self, word: str) -> bool:
+        """Whether the DLE had no match for word less than negative_ttl seconds ago.
+
+        Args:
+            word (str): The word as typed by the user.
+
+        Returns:
+            bool: True if it had no match.
+        """
+        with self._lock:
+            row = self.connection.execute(
+                "SELECT 1 FROM misses WHERE key = ? AND stored_at >= ?",
+                (normalize_key(word), time.time() - self.negative_ttl),
+            ).fetchone()
+        return row is not None
+
+    def clear(self):
+        """Removes every entry, and every word without match."""
+        with self._lock:
+            self.connection.execute("DELETE FROM entries")
+            self.connection.execute("DELETE FROM misses")
+            self.connection.commit()
+
+    def __len__(self) -> int:
+        """Amount of entries on disk, fresh or expired."""
+        with self._lock:
+            (size,) = self.connection.execute("SELECT COUNT(*) FROM entries").fetchone()
+        return size
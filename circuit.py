@@ -0,0 +1,64 @@
+import logging
+import threading
+import time
+from typing import Callable
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitBreaker:
+    """Stops calling a service that keeps failing, so callers fail fast instead of waiting for every timeout.
+
+    After failures consecutive failures the circuit opens: allow returns False for cooldown seconds. Then a single trial call is allowed (half open). A success closes the circuit again, a failure keeps it open for another cooldown. If the trial never reports back (e.g. it was cancelled), another one is allowed after the next cooldown.
+    """
+
+    def __init__(self, failures: int = 3, cooldown: float = 30, clock: Callable[[], float] = time.monotonic):
+        """
+        Args:
+            failures (int, optional): Consecutive failures that open the circuit. Defaults to 3.
+            cooldown (float, optional): Seconds between trial calls while the circuit is open. Defaults to 30.
+            clock (Callable[[], float], optional): Source of the current time in seconds. Defaults to time.monotonic.
+        """
+        self.failures = failures
+        self.cooldown = cooldown
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._consecutive_failures = 0
+        self._opened_at = 0.0
+
+    @property
+    def is_open(self) -> bool:
+        return self._consecutive_failures >= self.failures
+
+    @property
+    def retry_in(self) -> float:
+        """Seconds until a call is allowed again. 0 if it is allowed now."""
+        if not self.is_open:
+            return 0.0
+        return max(0.0, self._opened_at + self.cooldown - self.clock())
+
+    def allow(self) -> bool:
+        """Whether a call may be made now. While the circuit is open, at most one trial call is allowed per cooldown."""
+        with self._lock:
+            if not self.is_open:
+                return True
+            now = self.clock()
+            if now - self._opened_at < self.cooldown:
+                return False
+            self._opened_at = now
+            logger.info("Circuit half open. Allowing a trial call.")
+            return True
+
+    def record_success(self):
+        with self._lock:
+            if self.is_open:
+                logger.info("Circuit closed.")
+            self._consecutive_failures = 0
+
+    def record_failure(self):
+        with self._lock:
+            self._consecutive_failures += 1
+            if self._consecutive_failures == self.failures:
+                logger.warning(f"{self.failures} failures in a row. Circuit open for {self.cooldown} s.")
+            if self.is_open:
+                self._opened_at = self.clock()
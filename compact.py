@@ -0,0 +1,313 @@
+"""Compact binary format for the offline dataset, and its converter from JSON.
+
+The JSON dataset repeats its keys and abbreviations ("f.", "m.", "tr.") in every definition. The compact format stores every distinct string once, in a single UTF-8 blob (zlib compressed by default), and everything else as packed arrays of string ids:
+
+    header          magic, format version, flags, last_checked
+    string offsets  where string i is in the blob: blob[offsets[i]:offsets[i + 1]]
+    string blob
+    words           string id of each word, sorted by word
+    first           definitions of words[i] are first[i]:first[i + 1]
+    headwords, abbrs, definitions, html_codes
+                    string ids, one per definition, in page order
+    form keys, form lemmas
+                    the "forms" map of the corpus builder
+    meta            the "meta" map of the corpus builder (when each word was last checked, and the hash of its definitions), as JSON, zlib compressed with the string blob
+
+Each section is preceded by its length in bytes. Strings are only decoded when read, so a loaded dataset is a few bytes objects instead of thousands of dicts.
+
+Optional parts of the JSON dataset are normalized away (see normalize_dataset): an empty "forms" or "meta", and the "word" of a definition when it is the stored word itself.
+
+Usage (from the repository root):
+    python compact.py top_words/top_1k_spanish_words.json top_words/top_1k_spanish_words.rdle [--no-compress]
+"""
+import json
+import logging
+import struct
+import sys
+import zlib
+from array import array
+from pathlib import Path
+from typing import Dict, Iterator, List, NamedTuple, Optional
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"RDLE"
+COMPACT_VERSION = 2
+COMPACT_SUFFIX = ".rdle"
+FLAG_ZLIB = 1
+HEADER = struct.Struct("<4sBBxxd")
+SECTION_LENGTH = struct.Struct("<I")
+SECTIONS = 11
+
+
+class Definition(NamedTuple):
+    word: str  # Headword, which may differ from the stored word.
+    abbrs: str
+    definition: str
+    html_code: str
+
+
+def _pack(ids: List[int]) -> bytes:
+    packed = array("I", ids)
+    if sys.byteorder == "big":
+        packed.byteswap()
+    return packed.tobytes()
+
+
+def _unpack(data: bytes) -> array:
+    ids = array("I")
+    ids.frombytes(data)
+    if sys.byteorder == "big":
+        ids.byteswap()
+    return ids
+
+
+def write_compact(data: Dict, path: Path, compress: bool = True):
+    """Writes a dataset, in the format of the JSON one, as a compact file.
+
+    Args:
+        data (Dict): The dataset, as loaded from the JSON.
+        path (Path): Destination file.
+        compress (bool, optional): Whether to zlib the string blob. Defaults to True.
+    """
+    ids: Dict[str, int] = {}
+    strings: List[bytes] = []
+
+    def intern(string: str) -> int:
+        if string not in ids:
+            ids[string] = len(strings)
+            strings.append(string.encode("utf-8"))
+        return ids[string]
+
+    words, first = [], [0]
+    headwords, abbrs, definitions, html_codes = [], [], [], []
+    for word in sorted(data["words"]):
+        words.append(intern(word))
+        for entry in data["words"][word]:
+            headwords.append(intern(entry.get("word", word)))
+            abbrs.append(intern(entry["abbrs"]))
+            definitions.append(intern(entry["definition"]))
+            html_codes.append(intern(entry["html_code"]))
+        first.append(len(headwords))
+    forms = data.get("forms", {})
+    form_keys = [intern(form) for form in forms]
+    form_lemmas = [intern(lemma) for lemma in forms.values()]
+
+    offsets = [0]
+    for string in strings:
+        offsets.append(offsets[-1] + len(string))
+    blob = b"".join(strings)
+    meta = json.dumps(data.get("meta", {}), ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    if compress:
+        blob = zlib.compress(blob, 9)
+        meta = zlib.compress(meta, 9)
+
+    sections = [
+        _pack(offsets),
+        blob,
+        _pack(words),
+        _pack(first),
+        _pack(headwords),
+        _pack(abbrs),
+        _pack(definitions),
+        _pack(html_codes),
+        _pack(form_keys),
+        _pack(form_lemmas),
+        meta,
+    ]
+    with path.open("wb") as f:
+        f.write(HEADER.pack(MAGIC, COMPACT_VERSION, FLAG_ZLIB if compress else 0, data["last_checked"]))
+        for section in sections:
+            f.write(SECTION_LENGTH.pack(len(section)))
+            f.write(section)
+    logger.info(f"Wrote {len(words)} words and {len(strings)} distinct strings to {path}.")
+
+
+class CompactDataset:
+    """Read-only view of a compact dataset file. See the module docstring for the layout."""
+
+    __slots__ = (
+        "last_checked",
+        "_offsets",
+        "_blob",
+        "_words",
+        "_first",
+        "_headwords",
+        "_abbrs",
+        "_definitions",
+        "_html_codes",
+        "_form_keys",
+        "_form_lemmas",
+        "_meta",
+    )
+
+    def __init__(self, path: Path):
+        """
+        Args:
+            path (Path): The compact file.
+
+        Raises:
+            RuntimeError: If path isn't a compact dataset of COMPACT_VERSION.
+        """
+        content = memoryview(path.read_bytes())
+        magic, version, flags, self.last_checked = HEADER.unpack_from(content)
+        if magic != MAGIC or version != COMPACT_VERSION:
+            raise RuntimeError(f"{path} isn't a compact dataset of version {COMPACT_VERSION}.")
+        sections = []
+        position = HEADER.size
+        for _ in range(SECTIONS):
+            (length,) = SECTION_LENGTH.unpack_from(content, position)
+            position += SECTION_LENGTH.size
+            sections.append(content[position : position + length])
+            position += length
+
+        self._offsets = _unpack(sections[0])
+        self._blob = zlib.decompress(sections[1]) if flags & FLAG_ZLIB else sections[1].tobytes()
+        (
+            self._words,
+            self._first,
+            self._headwords,
+            self._abbrs,
+            self._definitions,
+            self._html_codes,
+            self._form_keys,
+            self._form_lemmas,
+        ) = (_unpack(section) for section in sections[2:10])
+        self._meta = zlib.decompress(sections[10]) if flags & FLAG_ZLIB else sections[10].tobytes()
+
+    def string(self, i: int) -> str:
+        return self._blob[self._offsets[i] : self._offsets[i + 1]].decode("utf-8")
+
+    def _find(self, word: str) -> Optional[int]:
+        """Position of word in the sorted words, by binary search."""
+        # UTF-8 preserves code point order, so the encoded words can be compared without decoding them.
+        key = word.encode("utf-8")
+        blob, offsets, words = self._blob, self._offsets, self._words
+        low, high = 0, len(words)
+        while low < high:
+            middle = (low + high) // 2
+            i = words[middle]
+            if blob[offsets[i] : offsets[i + 1]] < key:
+                low = middle + 1
+            else:
+                high = middle
+        if low < len(words) and blob[offsets[words[low]] : offsets[words[low] + 1]] == key:
+            return low
+        return None
+
+    def __len__(self) -> int:
+        return len(self._words)
+
+    def __contains__(self, word: str) -> bool:
+        return self._find(word) is not None
+
+    def __getitem__(self, word: str) -> List[Definition]:
+        """The definitions of word, in page order.
+
+        Raises:
+            KeyError: If word isn't in the dataset.
+        """
+        i = self._find(word)
+        if i is None:
+            raise KeyError(word)
+        return [
+            Definition(
+                self.string(self._headwords[j]),
+                self.string(self._abbrs[j]),
+                self.string(self._definitions[j]),
+                self.string(self._html_codes[j]),
+            )
+            for j in range(self._first[i], self._first[i + 1])
+        ]
+
+    def words(self) -> Iterator[str]:
+        """Every word, sorted."""
+        return (self.string(i) for i in self._words)
+
+    def forms(self) -> Dict[str, str]:
+        """Lemma of each form, as recorded by the corpus builder."""
+        return {self.string(key): self.string(lemma) for key, lemma in zip(self._form_keys, self._form_lemmas)}
+
+    def meta(self) -> Dict[str, Dict]:
+        """Metadata of each word, as recorded by the corpus builder. Decoded on every call."""
+        return json.loads(self._meta.decode("utf-8"))
+
+    def to_dict(self) -> Dict:
+        """The dataset in the format of the JSON one, normalized as by normalize_dataset."""
+        words = {}
+        for word in self.words():
+            entries = []
+            for definition in self[word]:
+                entry = {"abbrs": definition.abbrs, "definition": definition.definition, "html_code": definition.html_code}
+                if definition.word != word:
+                    entry["word"] = definition.word
+                entries.append(entry)
+            words[word] = entries
+        data = {"last_checked": self.last_checked, "words": words}
+        forms = self.forms()
+        if forms:
+            data["forms"] = forms
+        meta = self.meta()
+        if meta:
+            data["meta"] = meta
+        return data
+
+
+def normalize_dataset(data: Dict) -> Dict:
+    """The dataset without the parts that are optional in the JSON format, as CompactDataset.to_dict returns it: an empty "forms" or "meta", and the "word" of a definition when it is the stored word itself.
+
+    Args:
+        data (Dict): The dataset, in the format of the JSON one.
+
+    Returns:
+        Dict: A normalized copy.
+    """
+    words = {
+        word: [
+            {key: value for key, value in entry.items() if not (key == "word" and value == word)}
+            for entry in entries
+        ]
+        for word, entries in data["words"].items()
+    }
+    normalized = {"last_checked": data["last_checked"], "words": words}
+    for key in ["forms", "meta"]:
+        if data.get(key):
+            normalized[key] = data[key]
+    return normalized
+
+
+def load_dataset(source: Path) -> Dict:
+    """Loads an offline dataset, compact (COMPACT_SUFFIX) or JSON, in the format of the JSON one.
+
+    Args:
+        source (Path): The dataset.
+
+    Returns:
+        Dict: The dataset.
+    """
+    if source.suffix == COMPACT_SUFFIX:
+        return CompactDataset(source).to_dict()
+    with source.open("r") as f:
+        return json.load(f)
+
+
+def main(argv: Optional[List[str]] = None):
+    import argparse  # Here, as the extension imports this module at startup.
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("source", type=Path, help="JSON dataset.")
+    parser.add_argument("destination", type=Path)
+    parser.add_argument("--no-compress", action="store_true", help="Don't zlib the string blob.")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+
+    with args.source.open("r") as f:
+        data = json.load(f)
+    write_compact(data, args.destination, compress=not args.no_compress)
+    if CompactDataset(args.destination).to_dict() != normalize_dataset(data):
+        raise RuntimeError(f"{args.destination} doesn't round trip to {args.source}.")
+    logger.info(f"{args.source}: {args.source.stat().st_size} bytes. {args.destination}: {args.destination.stat().st_size} bytes.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,402 @@
+import logging
+import unicodedata
+from enum import Enum, unique, auto
+from html.parser import HTMLParser
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Tuple
+
+if TYPE_CHECKING:
+    import requests
+
+BASE_URL = "https://dle.rae.es"
+HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/70.0.3538.77 Safari/537.36"
+}
+
+MIN_QUERY_LENGTH = 2  # Letters. Single letters are entries of the DLE, but are mostly words still being typed.
+QUERY_PUNCTUATION = " .-'"  # Besides letters, what DLE entries and locutions are written with.
+
+logger = logging.getLogger(__name__)
+
+
+def make_session(pool_size: int = 1) -> "requests.Session":
+    """Creates a session for talking to the DLE, meant to be kept for the whole life of the process.
+
+    Connections are kept alive and reused between requests, so only the first lookup pays for the TCP and TLS handshakes. Requests already asks for gzip and deflate compressed pages by default.
+
+    requests is imported here instead of at the top of the module: it is by far the slowest import of the extension, and offline lookups never need it.
+
+    Args:
+        pool_size (int, optional): Connections kept open per host. Use the amount of threads that share the session. Defaults to 1.
+
+    Returns:
+        requests.Session: The session, with HEADERS set.
+    """
+    import requests
+    from requests.adapters import HTTPAdapter
+
+    session = requests.Session()
+    session.headers.update(HEADERS)
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+@unique
+class Case(Enum):
+    NO_MATCH = auto()
+    APPROX_MATCH = auto()
+    EXACT_REQ_MATCH = auto()
+    EXACT_STORED_MATCH = auto()
+    EMPTY_WORD = auto()
+
+
+def normalize_key(word: str) -> str:
+    """Normalizes a query so that trivially different spellings share a cache entry.
+
+    Surrounding and repeated whitespace is collapsed and the word is casefolded. Accents are kept, since "año" and "ano" are different entries in the DLE.
+
+    Args:
+        word (str): The word as typed by the user.
+
+    Returns:
+        str: The normalized key.
+    """
+    return " ".join(word.split()).casefold()
+
+
+def is_plausible_query(word: str) -> bool:
+    """Whether a query could be a DLE entry: at least MIN_QUERY_LENGTH letters, and nothing but letters (accented or not) and QUERY_PUNCTUATION.
+
+    Queries with digits or symbols ("casa2", "@rbol") can't match, and very short ones are mostly still being typed, so they aren't worth a request.
+
+    Args:
+        word (str): The word as typed by the user.
+
+    Returns:
+        bool: True if the query may have a match.
+    """
+    key = normalize_key(word)
+    letters = sum(c.isalpha() for c in key)
+    return letters >= MIN_QUERY_LENGTH and all(
+        c.isalpha() or unicodedata.combining(c) or c in QUERY_PUNCTUATION for c in key
+    )
+
+
+def fold(word: str) -> str:
+    """Folds a word for accent and case insensitive comparisons, so "Árbol", "arbol" and "ÁRBOL" all become "arbol".
+
+    Unlike normalize_key, this merges different DLE entries ("año" and "ano"), so it must only be used to find candidates.
+
+    Args:
+        word (str): The word to fold.
+
+    Returns:
+        str: The word trimmed, casefolded and without combining marks.
+    """
+    decomposed = unicodedata.normalize("NFD", " ".join(word.split()).casefold())
+    return "".join(c for c in decomposed if not unicodedata.combining(c))
+
+
+def lookup_key(word: str) -> str:
+    """Folds a word like fold does, except for the ñ, which is a letter of its own in Spanish ("año" and "ano" are unrelated words, while "Árbol" is just "árbol" typed differently).
+
+    Args:
+        word (str): The word to fold.
+
+    Returns:
+        str: The word trimmed, casefolded and without combining marks other than the tilde of the ñ.
+    """
+    decomposed = unicodedata.normalize("NFD", " ".join(word.split()).casefold())
+    decomposed = decomposed.replace("n\u0303", "ñ")
+    return "".join(c for c in decomposed if not unicodedata.combining(c))
+
+
+ASCII_WHITESPACE = " \t\n\r\f"
+
+# Elements that never have an end tag, so they must not be pushed onto the open element stack.
+VOID_ELEMENTS = {
+    "area", "base", "br", "col", "embed", "hr", "img", "input",
+    "link", "meta", "param", "source", "track", "wbr",
+}
+
+
+class DLEPageParser(HTMLParser):
+    """Event driven parser that extracts definitions or suggestions from a DLE page without building a tree.
+
+    The page can be fed in chunks as it downloads. The parser sets done once nothing else on the page can change the result: when the first <article> closes after a <p class="j"> was seen, or as soon as max_definitions definitions were collected.
+
+    The page case is decided as follows:
+        1) A page that has at least 1 <p> with class=j is considered an exact definition. There might be more <p> tags with class=j or class=m to signal more definitions (those with class=m are for similar words, like the plural).
+        2) A page that has at least 1 <div> with class=item-list is considered an approximate result.
+        3) All other cases are handled as Case.NO_MATCH.
+
+    Definitions are read from the first <article>: its <header> holds the headword, and a <p> whose first class starts with k holds the headword of the definitions that follow it.
+    """
+
+    def __init__(self, max_definitions: Optional[int] = None):
+        """
+        Args:
+            max_definitions (Optional[int], optional): Stop once this many definitions were collected. Defaults to None, meaning all of them.
+        """
+        super().__init__(convert_charrefs=True)
+        self.max_definitions = max_definitions
+        self.done = False
+        self.truncated = False
+        self.has_exact = False
+        self.has_item_list = False
+        self.word: Optional[str] = None
+        self.definitions: List[Dict[str, str]] = []
+        self.suggestions: List[Dict[str, str]] = []
+
+        self._article_depth: Optional[int] = None  # len(self._stack) right after the first <article> opened.
+        self._article_seen = False
+        self._header_seen = False
+        self._stack: List[str] = []
+        self._text: List[str] = []  # Text not yet processed, as it may come in several pieces.
+        self._header: Optional[List[str]] = None
+        self._header_depth = 0
+        # State of the <p> being read, if any.
+        self._p: Optional[Dict] = None
+        self._p_depth = 0
+        # State of the div.n1 (suggestion) being read, if any.
+        self._n1: Optional[Dict] = None
+        self._n1_depth = 0
+
+    def handle_starttag(self, tag: str, attrs: List[Tuple[str, Optional[str]]]):
+        self._flush_text()
+        if self.done:
+            return
+        if tag in VOID_ELEMENTS:
+            return self.handle_startendtag(tag, attrs)
+
+        classes = (dict(attrs).get("class") or "").split()
+        self._stack.append(tag)
+        depth = len(self._stack)
+
+        if tag == "p" and "j" in classes:
+            self.has_exact = True
+            if self._article_seen and self._article_depth is None:
+                # Definitions only come from the first article, which is over.
+                self.done = True
+                return
+        elif tag == "div" and "item-list" in classes:
+            self.has_item_list = True
+
+        in_article = self._article_depth is not None
+        if tag == "article" and not self._article_seen:
+            self._article_seen = True
+            self._article_depth = depth
+        elif in_article and tag == "header" and self.word is None and self._header is None:
+            self._header = []
+            self._header_depth = depth
+            self._header_seen = True
+        elif in_article and tag == "p" and self._p is None:
+            self._p = {
+                "kind": classes[0] if classes else "",
+                "id": dict(attrs).get("id"),
+                "text": [],
+                "words": [],
+                "abbrs": [],
+                "abbr": None,
+                "excluded_depth": None,
+            }
+            self._p_depth = depth
+        elif self._p is not None:
+            if depth == self._p_depth + 1 and tag in {"span", "abbr"}:
+                # Direct <span> and <abbr> children are numbering and grammatical notes, not part of the definition.
+                self._p["excluded_depth"] = depth
+            if tag == "abbr" and self._p["abbr"] is None:
+                self._p["abbr"] = []
+
+        if tag == "div" and "n1" in classes and self._n1 is None:
+            self._n1 = {"children": 0, "text_child": False, "a": None, "word": None, "infinitive": []}
+            self._n1_depth = depth
+        elif self._n1 is not None:
+            if depth == self._n1_depth + 1:
+                self._n1["children"] += 1
+                self._n1["text_child"] = False
+                if tag == "a" and self._n1["a"] is None:
+                    self._n1["a"] = depth
+                    self._n1["word"] = []
+            elif self._n1["a"] is not None and depth == self._n1["a"] + 1 and isinstance(self._n1["word"], list):
+                # Only the text before the <sup>, if any, is the suggested word.
+                self._n1["word"] = "".join(self._n1["word"])
+
+    def handle_startendtag(self, tag: str, attrs: List[Tuple[str, Optional[str]]]):
+        self._flush_text()
+        if self._n1 is not None and len(self._stack) == self._n1_depth:
+            self._n1["children"] += 1
+            self._n1["text_child"] = False
+
+    def handle_endtag(self, tag: str):
+        self._flush_text()
+        if self.done or tag in VOID_ELEMENTS or tag not in self._stack:
+            return
+        # Close any element left open inside this one, like a browser would.
+        while True:
+            depth = len(self._stack)
+            closed = self._stack.pop()
+            self._close(closed, depth)
+            if closed == tag or self.done:
+                return
+
+    def _close(self, tag: str, depth: int):
+        if self._p is not None:
+            if tag == "abbr" and self._p["abbr"] is not None and depth > self._p_depth:
+                self._p["abbrs"].append("".join(self._p["abbr"]))
+                self._p["abbr"] = None
+            if self._p["excluded_depth"] == depth:
+                self._p["excluded_depth"] = None
+            if depth == self._p_depth:
+                self._close_p()
+
+        if self._header is not None and depth == self._header_depth:
+            self.word = "".join(self._header)
+            self._header = None
+
+        if self._n1 is not None:
+            if depth == self._n1["a"] and isinstance(self._n1["word"], list):
+                self._n1["word"] = "".join(self._n1["word"])
+            if depth == self._n1_depth:
+                self._close_n1()
+
+        if self._article_depth is not None and depth == self._article_depth:
+            self._article_depth = None
+            # Without a <p class="j"> so far, the rest of the page still decides the case.
+            self.done = self.has_exact
+
+    def _close_p(self):
+        p, self._p = self._p, None
+        kind = p["kind"]
+        if kind in {"j", "m"}:
+            self.definitions.append(
+                {
+                    "word": self.word or "",
+                    "abbrs": " ".join(p["abbrs"]),
+                    "definition": "".join(p["words"]).strip(),
+                    "html_code": p["id"],
+                }
+            )
+            if (
+                self.has_exact
+                and self.max_definitions is not None
+                and len(self.definitions) >= self.max_definitions
+            ):
+                self.truncated = True
+                self.done = True
+        elif kind.startswith("k"):
+            self.word = "".join(p["text"])
+
+    def _close_n1(self):
+        n1, self._n1 = self._n1, None
+        if not isinstance(n1["word"], str) or n1["children"] != 2:
+            raise RuntimeError(f"Unexpected suggestion structure: {n1}.")
+        self.suggestions.append(
+            {"word": n1["word"], "infinitive": "".join(n1["infinitive"]).strip()}
+        )
+
+    def handle_data(self, data: str):
+        if not self.done:
+            self._text.append(data)
+
+    def handle_comment(self, data: str):
+        self._flush_text()
+
+    def _flush_text(self):
+        if not self._text:
+            return
+        data = "".join(self._text)
+        self._text = []
+        if not data.strip(ASCII_WHITESPACE):
+            # Same as BeautifulSoup, which the previous parser used: whitespace only strings become a single space or newline.
+            data = "\n" if "\n" in data else " "
+        depth = len(self._stack)
+
+        if self._header is not None:
+            self._header.append(data)
+
+        if self._p is not None:
+            self._p["text"].append(data)
+            if self._p["abbr"] is not None:
+                self._p["abbr"].append(data)
+            if self._p["excluded_depth"] is None:
+                self._p["words"].append(data)
+
+        if self._n1 is not None:
+            if depth == self._n1_depth:
+                if self._n1["a"] is not None:
+                    self._n1["infinitive"].append(data)
+                if not self._n1["text_child"]:
+                    # Text may arrive in several pieces, but it is a single child.
+                    self._n1["children"] += 1
+                    self._n1["text_child"] = True
+            elif depth == self._n1["a"] and isinstance(self._n1["word"], list):
+                self._n1["word"].append(data)
+
+    def close(self):
+        super().close()
+        self._flush_text()
+
+    def result(self) -> Dict:
+        """The parsed page, in the format returned by parse_page.
+
+        Raises:
+            RuntimeError: If the page has an exact match but no <article> or <header>, or approximate results but no suggestions.
+
+        Returns:
+            Dict: The case name under "case", plus "definitions" or "suggestions" when applicable.
+        """
+        if self.has_exact:
+            if not self._article_seen:
+                raise RuntimeError("Page has no <article> tag.")
+            if not self._header_seen:
+                raise RuntimeError(
+                    "article has no <header> tag and thus no first word can be found."
+                )
+            result = {"case": Case.EXACT_REQ_MATCH.name, "definitions": self.definitions}
+            if self.truncated:
+                result["truncated"] = True
+        elif self.has_item_list:
+            if not self.suggestions:
+                raise RuntimeError(
+                    "Attempted to handle the approx result case, but the page doesn't have any <div> tags with class n1."
+                )
+            result = {"case": Case.APPROX_MATCH.name, "suggestions": self.suggestions}
+        else:
+            result = {"case": Case.NO_MATCH.name}
+        logger.debug(f"Parsed page with case={result['case']}.")
+        return result
+
+
+def parse_chunks(chunks: Iterable[str], max_definitions: Optional[int] = None) -> Dict:
+    """Parses a DLE page as it arrives, without reading further than needed.
+
+    Args:
+        chunks (Iterable[str]): The page, in pieces (e.g. requests.Response.iter_content with decode_unicode=True).
+        max_definitions (Optional[int], optional): Stop once this many definitions were collected. Defaults to None, meaning all of them.
+
+    Returns:
+        Dict: The parsed page, see DLEPageParser.result. It has "truncated" set if definitions were left unread.
+    """
+    parser = DLEPageParser(max_definitions)
+    for chunk in chunks:
+        parser.feed(chunk)
+        if parser.done:
+            break
+    else:
+        parser.close()
+    return parser.result()
+
+
+def parse_page(html: str, max_definitions: Optional[int] = None) -> Dict:
+    """Parses a DLE page into plain data that can be cached and rendered later.
+
+    Args:
+        html (str): The page as returned by the DLE.
+        max_definitions (Optional[int], optional): Stop once this many definitions were collected. Defaults to None, meaning all of them.
+
+    Returns:
+        Dict: The case name under "case", plus "definitions" or "suggestions" when applicable.
+    """
+    return parse_chunks([html], max_definitions)
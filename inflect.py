@@ -0,0 +1,166 @@
+from typing import Iterable, List, Set
+
+NOMINAL_ABBRS = {"m.", "f.", "adj."}
+VERBAL_ABBRS = {"tr.", "intr.", "prnl.", "cop."}
+MIN_FORM_LENGTH = 3  # Shorter forms ("e", "va") are too likely to be other words.
+
+UNACCENT = str.maketrans("áéíóú", "aeiou")
+
+# Regular endings by conjugation, without the infinitive ending.
+ENDINGS = {
+    "ar": [
+        "o", "as", "a", "amos", "áis", "an",
+        "é", "aste", "ó", "asteis", "aron",
+        "aba", "abas", "ábamos", "abais", "aban",
+        "e", "es", "emos", "éis", "en",
+        "ara", "aras", "áramos", "arais", "aran",
+        "ase", "ases", "ásemos", "aseis", "asen",
+        "ad", "ando", "ado", "ada", "ados", "adas",
+    ],
+    "er": [
+        "o", "es", "e", "emos", "éis", "en",
+        "í", "iste", "ió", "imos", "isteis", "ieron",
+        "ía", "ías", "íamos", "íais", "ían",
+        "a", "as", "amos", "áis", "an",
+        "iera", "ieras", "iéramos", "ierais", "ieran",
+        "iese", "ieses", "iésemos", "ieseis", "iesen",
+        "ed", "iendo", "ido", "ida", "idos", "idas",
+    ],
+    "ir": [
+        "o", "es", "e", "imos", "ís", "en",
+        "í", "iste", "ió", "isteis", "ieron",
+        "ía", "ías", "íamos", "íais", "ían",
+        "a", "as", "amos", "áis", "an",
+        "iera", "ieras", "iéramos", "ierais", "ieran",
+        "iese", "ieses", "iésemos", "ieseis", "iesen",
+        "id", "iendo", "ido", "ida", "idos", "idas",
+    ],
+}
+FUTURE_ENDINGS = ["é", "ás", "á", "emos", "éis", "án", "ía", "ías", "íamos", "íais", "ían"]
+
+# Irregular and stem changing verbs, whose regular forms are mostly nouns instead ("sala" isn't salir, "jugo" isn't jugar). Verbs ending like one of them (contener, deshacer, despedir) are left out too. A regular verb that happens to end like them (presentar, agregar) just gets no forms either, so it is looked up online.
+IRREGULAR_VERBS = {
+    "acordar", "acostar", "advertir", "almorzar", "andar", "apretar", "atravesar", "caber", "calentar", "cerrar",
+    "colgar", "comenzar", "competir", "confesar", "contar", "convertir", "corregir", "costar", "decir", "defender",
+    "divertir", "doler", "dormir", "elegir", "empezar", "encender", "encontrar", "entender", "estar", "forzar",
+    "fregar", "freír", "gobernar", "haber", "herir", "hervir", "jugar", "llover", "medir", "mentir", "merendar",
+    "morder", "morir", "mostrar", "mover", "negar", "nevar", "oír", "oler", "pedir", "pensar", "perder", "poder",
+    "poner", "preferir", "probar", "querer", "recordar", "regar", "reír", "renovar", "reñir", "repetir", "requerir",
+    "rogar", "saber", "salir", "seguir", "sentar", "sentir", "servir", "soler", "soltar", "sonar", "soñar",
+    "temblar", "tender", "tener", "teñir", "torcer", "traer", "tropezar", "valer", "venir", "vestir", "volar",
+    "volver",
+}
+# Endings of verbs with irregular stems: conocer, conozco; conducir, conduzco; construir, construyo.
+IRREGULAR_ENDINGS = ("acer", "ecer", "ocer", "ucir", "uir")
+
+
+def plurals(word: str) -> List[str]:
+    """Regular plurals of a noun or adjective.
+
+    Args:
+        word (str): The singular.
+
+    Returns:
+        List[str]: The plurals, or an empty list if the word already looks plural or invariable (e.g. "lunes").
+    """
+    if " " in word or not word:
+        return []
+    last = word[-1]
+    if last in "aeiouáéó":
+        return [word + "s"]
+    if last in "íú":
+        return [word + "es", word + "s"]
+    if last in "sx":
+        return []
+    if last == "z":
+        return [word[:-1] + "ces"]
+    if last in "nlrdjy":
+        stem = word
+        if len(word) >= 2 and word[-2] in "áéíóú":
+            # Oxytones lose their written accent: camión, camiones.
+            stem = word[:-2] + word[-2].translate(UNACCENT) + word[-1]
+        return [stem + "es"]
+    return [word + "s"]
+
+
+# Spelling changes that keep the sound of the stem's last consonant, by conjugation and first letter of the ending.
+SPELLING_CHANGES = {
+    "ar": ("eé", [("c", "qu"), ("g", "gu"), ("z", "c")]),  # buscar: busqué; llegar: llegué; cazar: cacé.
+    "er": ("aáo", [("c", "z"), ("g", "j")]),  # vencer: venzo; coger: cojo.
+    "ir": ("aáo", [("gu", "g"), ("c", "z"), ("g", "j")]),  # distinguir: distingo; zurcir: zurzo; dirigir: dirijo.
+}
+
+
+def _join(stem: str, conjugation: str, ending: str) -> str:
+    letters, changes = SPELLING_CHANGES[conjugation]
+    if ending[:1] in letters:
+        for old, new in changes:
+            if stem.endswith(old):
+                return stem[: -len(old)] + new + ending
+    return stem + ending
+
+
+def is_irregular(verb: str) -> bool:
+    """Whether verb is, or looks like, an irregular or stem changing verb (see IRREGULAR_VERBS and IRREGULAR_ENDINGS)."""
+    if verb.endswith(IRREGULAR_ENDINGS) and not verb.endswith("guir"):
+        return True
+    return any(verb.endswith(irregular) for irregular in IRREGULAR_VERBS)
+
+
+def could_be_headword(form: str) -> bool:
+    """Whether a form, without its accents, has the shape of an entry of the DLE.
+
+    Entries are mostly singular words ending in a vowel or -d ("sala", "jugo", "salida", "verdad"). Many verb forms look the same ("casa" is also a form of casar), and the DLE may well have them as words of their own. Accents don't help, since lookups ignore them (see dle.lookup_key): "casó" would take the query "caso".
+
+    Args:
+        form (str): A generated form.
+
+    Returns:
+        bool: True if the form ends in a vowel, -y or -d once its accents are removed.
+    """
+    return form.translate(UNACCENT)[-1:] in "aeiouyd"
+
+
+def conjugations(verb: str) -> List[str]:
+    """Regular conjugated forms of a verb, leaving out those that could be entries of the DLE themselves (see could_be_headword) and the plurals they would have ("comas" is a form of comer, but first the plural of coma).
+
+    Irregular and stem changing verbs (see is_irregular) get no forms, as their regular forms are mostly other words ("sala", "vena", "poda").
+
+    Args:
+        verb (str): The infinitive.
+
+    Returns:
+        List[str]: The forms, or an empty list if verb doesn't look like a regular Spanish infinitive or its stem is too short to be regular (ir, ser, dar, ver).
+    """
+    conjugation = verb[-2:]
+    if " " in verb or conjugation not in ENDINGS or len(verb) < 4 or is_irregular(verb):
+        return []
+    stem = verb[:-2]
+    forms = [_join(stem, conjugation, ending) for ending in ENDINGS[conjugation]]
+    forms.extend(verb + ending for ending in FUTURE_ENDINGS)
+    singulars = {form.translate(UNACCENT) for form in forms if could_be_headword(form)}
+    return [
+        form
+        for form in forms
+        if not could_be_headword(form) and not (form.endswith("s") and form.translate(UNACCENT)[:-1] in singulars)
+    ]
+
+
+def inflections(word: str, abbrs: Iterable[str]) -> Set[str]:
+    """Regular inflected forms of a stored word, according to its grammatical category.
+
+    Args:
+        word (str): The stored word.
+        abbrs (Iterable[str]): The abbreviations of each of its definitions, as in the offline dataset. Their first abbreviation tells the category.
+
+    Returns:
+        Set[str]: The forms, without word itself and without forms shorter than MIN_FORM_LENGTH.
+    """
+    categories = {abbr.split()[0] for abbr in abbrs if abbr.split()}
+    forms = set()
+    if categories & NOMINAL_ABBRS:
+        forms.update(plurals(word))
+    if categories & VERBAL_ABBRS:
+        forms.update(conjugations(word))
+    forms.discard(word)
+    return {form for form in forms if len(form) >= MIN_FORM_LENGTH}
@@ -0,0 +1,95 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Iterable, Iterator, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class LookupCancelled(Exception):
+    """Raised inside a lookup once a newer one made it obsolete."""
+
+
+class LookupScheduler:
+    """Runs slow lookups in background threads, keeping only the latest one.
+
+    Every submit (or cancel) starts a new generation and makes all older lookups obsolete. Obsolete lookups that didn't start yet are skipped, running ones can stop early by checking the function they get (see cancellable), and the results of those that finish anyway are discarded.
+    """
+
+    def __init__(self, workers: int = 2):
+        """
+        Args:
+            workers (int, optional): Maximum amount of lookups running at once. More than 1 lets a new lookup start while an obsolete one is still waiting on the network. Defaults to 2.
+        """
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="lookup")
+        self._lock = threading.Lock()
+        self._generation = 0
+
+    def cancel(self) -> int:
+        """Makes every pending lookup obsolete.
+
+        Returns:
+            int: The new generation.
+        """
+        with self._lock:
+            self._generation += 1
+            return self._generation
+
+    def is_obsolete(self, generation: int) -> bool:
+        return generation != self._generation
+
+    def submit(self, lookup: Callable[[Callable[[], bool]], T], callback: Callable[[T], Any]) -> int:
+        """Schedules lookup, making every previous one obsolete.
+
+        Args:
+            lookup (Callable[[Callable[[], bool]], T]): The work to do. It gets a function returning True once the lookup is obsolete, and may raise LookupCancelled.
+            callback (Callable[[T], Any]): Called from the worker thread with the result of lookup, unless it became obsolete in the meantime.
+
+        Returns:
+            int: The generation of the lookup.
+        """
+        generation = self.cancel()
+
+        def obsolete() -> bool:
+            return self.is_obsolete(generation)
+
+        def run():
+            if obsolete():
+                logger.debug(f"Skipped obsolete lookup {generation}.")
+                return
+            try:
+                result = lookup(obsolete)
+            except LookupCancelled:
+                logger.debug(f"Cancelled obsolete lookup {generation}.")
+                return
+            except Exception:
+                logger.exception(f"Lookup {generation} failed.")
+                return
+            if obsolete():
+                logger.debug(f"Discarded result of obsolete lookup {generation}.")
+                return
+            callback(result)
+
+        self._executor.submit(run)
+        return generation
+
+
+def cancellable(chunks: Iterable[T], obsolete: Callable[[], bool]) -> Iterator[T]:
+    """Passes chunks through, until obsolete returns True.
+
+    Args:
+        chunks (Iterable[T]): E.g. a page as it downloads.
+        obsolete (Callable[[], bool]): Checked before each chunk.
+
+    Raises:
+        LookupCancelled: As soon as obsolete returns True.
+
+    Yields:
+        T: The chunks.
+    """
+    for chunk in chunks:
+        if obsolete():
+            raise LookupCancelled()
+        yield chunk
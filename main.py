@@ -1,32 +1,54 @@
+import functools
 import json
 import logging
+import threading
+import time
 from pathlib import Path
-from typing import List, Optional
-from enum import Enum, unique, auto
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional, Union
 
-import requests
-from bs4 import BeautifulSoup
-from bs4.element import NavigableString, PageElement, ResultSet, Tag
 from ulauncher.api.client.EventListener import EventListener
 from ulauncher.api.client.Extension import Extension
+from ulauncher.api.shared.Response import Response
 from ulauncher.api.shared.action.CopyToClipboardAction import CopyToClipboardAction
+from ulauncher.api.shared.action.DoNothingAction import DoNothingAction
+from ulauncher.api.shared.action.ExtensionCustomAction import ExtensionCustomAction
 from ulauncher.api.shared.action.HideWindowAction import HideWindowAction
 from ulauncher.api.shared.action.OpenUrlAction import OpenUrlAction
 from ulauncher.api.shared.action.RenderResultListAction import RenderResultListAction
 from ulauncher.api.shared.action.SetUserQueryAction import SetUserQueryAction
 from ulauncher.api.shared.event import (
+    ItemEnterEvent,
     KeywordQueryEvent,
     PreferencesEvent,
     PreferencesUpdateEvent,
 )
 from ulauncher.api.shared.item.ExtensionResultItem import ExtensionResultItem
 
-BASE_URL = "https://dle.rae.es"
-HEADERS = {
-    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/70.0.3538.77 Safari/537.36"
-}
-CHARACTERS_PER_LINE = 80
-NUMERIC_PREFERENCES = {"max_suggested_items", "max_shown_definitions"}
+from cache import CACHE_MAX_ENTRIES, CACHE_PATH, CACHE_TTL, DefinitionCache
+from circuit import CircuitBreaker
+from dle import BASE_URL, Case, is_plausible_query, make_session, parse_chunks
+from lookup import LookupCancelled, LookupScheduler, cancellable
+from offline_store import OFFLINE_SOURCE, OFFLINE_STORE_PATH, OfflineStore
+from prefetch import Prefetcher, Revalidator
+from stats import STATS_PATH, Stats, Stopwatch
+from suggest import SuggestionIndex
+from wrap import wrap
+
+if TYPE_CHECKING:
+    import requests
+
+NUMERIC_PREFERENCES = {"max_suggested_items", "max_shown_definitions", "prefetch_suggestions"}
+TIMEOUT_PREFERENCES = {"connect_timeout", "read_timeout"}
+LOOKUP_WORKERS = 2
+PREFETCH_WORKERS = 2
+OFFLINE_ITEMS_CACHE_SIZE = 256
+WARM_UP_DELAY = 1  # Seconds after startup before loading what the first lookups need, so it doesn't compete with registering the extension.
+MODE_ONLINE = "online"
+MODE_OFFLINE_FIRST = "offline_first"  # Serve stale cached copies right away and refresh them in the background.
+MODE_OFFLINE_ONLY = "offline_only"  # Never go to the DLE.
+BREAKER_FAILURES = 3
+BREAKER_COOLDOWN = 30
+STATS_STAGES = ["query", "offline check", "cache", "http", "download", "parse", "render", "search"]  # Order in which the stats keyword lists them.
 
 ROOT_EXTENSION_FOLDER = Path(__file__).resolve().parent
 
@@ -37,18 +59,7 @@ DEFAULT_PREFERENCES = {
     x["id"]: x["default_value"] for x in DEFAULT_MANIFEST["preferences"]
 }
 
-p = ROOT_EXTENSION_FOLDER / "top_words" / "top_1k_spanish_words.json"
-with p.open("r") as f:
-    STORED_DATA = json.load(f)
-
-
-@unique
-class Case(Enum):
-    NO_MATCH = auto()
-    APPROX_MATCH = auto()
-    EXACT_REQ_MATCH = auto()
-    EXACT_STORED_MATCH = auto()
-    EMPTY_WORD = auto()
+OFFLINE_STORE = OfflineStore(OFFLINE_SOURCE, OFFLINE_STORE_PATH)
 
 
 logger = logging.getLogger(__name__)
@@ -56,46 +67,29 @@ logger = logging.getLogger(__name__)
 # TODO: Check "saber"
 
 
-def chunkize_sentence(sentence: str, max_characters_per_chunk: int) -> List[str]:
-    """Splits a given sentence into chunks of at most max_characters_per_chunk, counting spaces.
-
-    The method guarantees that each element of the output is an intelligible sentence with whole words.
-
-    This is not the same as splitting into max_characters_per_chunk, because words could end up truncated.
-
-    Args:
-        sentence (str): Sentence to be split.
-        max_characters_per_chunk (int): Maximum number of characters allower per chunk, spaces included. Chunks could end up being significantly shorter, depending on the length of words.
-
-    Returns:
-        List[str]: List of chunks (i.e: lines) with length at most max_characters_per_chunk.
-    """
-    words = sentence.split(" ")
-    lines = []
-
-    word_idx, anchor = 1, 0
-    while anchor <= len(words):
-        partial = " ".join(words[anchor : anchor + word_idx])
-
-        if len(partial) > max_characters_per_chunk:
-            lines.append(" ".join(words[anchor : anchor + word_idx - 1]))
-            anchor += word_idx - 1
-            word_idx = 1
-            continue
-
-        if anchor + word_idx == len(words):
-            lines.append(partial)
-            break
-        word_idx += 1
-    return lines
-
-
 class RAE(Extension):
     def __init__(self):
         super().__init__()
+        self.cache = DefinitionCache(CACHE_PATH, ttl=CACHE_TTL, max_entries=CACHE_MAX_ENTRIES)
+        self._suggestion_index: Optional[SuggestionIndex] = None
+        self._session = None
+        self._session_lock = threading.Lock()
+        self.lookups = LookupScheduler(LOOKUP_WORKERS)
+        self.stats = Stats()
+        self.prefetcher = Prefetcher(
+            lambda word: self.fetch_online(word, int(self.preferences["max_shown_definitions"])),
+            PREFETCH_WORKERS,
+        )
+        self.breaker = CircuitBreaker(BREAKER_FAILURES, BREAKER_COOLDOWN)
+        self.revalidator = Revalidator(
+            lambda word: self.fetch_online(word, int(self.preferences["max_shown_definitions"]))
+        )
         self.subscribe(
             KeywordQueryEvent, KeywordQueryEventListener()
         )  # Handle user input via ulauncher.
+        self.subscribe(
+            ItemEnterEvent, ItemEnterEventListener()
+        )  # Handle the user asking for an online lookup from the offline suggestions.
         self.subscribe(
             PreferencesUpdateEvent, PreferencesUpdateListener()
         )  # Handle preferences update via UI.
@@ -103,6 +97,45 @@ class RAE(Extension):
             PreferencesEvent, PreferencesEventListener()
         )  # To force reset toggle to be off by default.
 
+    @property
+    def session(self) -> "requests.Session":
+        """Session for the DLE, created on first use so that importing requests doesn't delay startup.
+
+        It is kept for the whole session, so lookups reuse the open connections to the DLE.
+        """
+        with self._session_lock:
+            if self._session is None:
+                self._session = make_session(LOOKUP_WORKERS + PREFETCH_WORKERS)
+            return self._session
+
+    def warm_up(self):
+        """Load everything the first lookups need: the offline store (building it if needed), the suggestion index and requests with the session.
+
+        Each of these is loaded on first use anyway. Calling this in the background right after startup just keeps the first queries from paying for it.
+        """
+        start = time.perf_counter()
+        OFFLINE_STORE.connection  # Opens the store, building it if needed.
+        self.suggestion_index
+        self.session
+        logger.info(f"Warmed up in {time.perf_counter() - start:.3f} s.")
+
+    def start_warm_up(self, delay: float = WARM_UP_DELAY):
+        """Call warm_up in a background thread after delay seconds.
+
+        Args:
+            delay (float, optional): Seconds to wait. Defaults to WARM_UP_DELAY.
+        """
+        timer = threading.Timer(delay, self.warm_up)
+        timer.daemon = True
+        timer.start()
+
+    @property
+    def suggestion_index(self) -> SuggestionIndex:
+        """Index of the offline headwords, built on first use."""
+        if self._suggestion_index is None:
+            self._suggestion_index = SuggestionIndex(OFFLINE_STORE.headwords())
+        return self._suggestion_index
+
     @staticmethod
     def handle_empty_word() -> List[ExtensionResultItem]:
         """Returns the elements to display when an empty word is given to the extension.
@@ -130,7 +163,7 @@ class RAE(Extension):
         Returns:
             bool: True if it needs an online check.
         """
-        need = word is not None and word not in STORED_DATA["words"]
+        need = word is not None and OFFLINE_STORE.resolve(word) is None
         logger.debug(f"Need online Check for {word}: {need}.")
         return need
 
@@ -150,90 +183,74 @@ class RAE(Extension):
         logger.debug(f"Detect case for guaranteed offline word={word}.")
         if word is None:
             return Case.EMPTY_WORD
-        elif word in STORED_DATA["words"]:
+        elif word in OFFLINE_STORE:
             return Case.EXACT_STORED_MATCH
         else:
             raise RuntimeError(f"Non empty, non stored {word=} given.")
 
     @staticmethod
-    def detect_online_case(soup: BeautifulSoup) -> Case:
-        """Detects the case of the given soup, so that the program can process it accordingly.
-
-        The soup is evaluated in this order to determine the case:
-            1) A page that returns with at least 1 <p> with class=j is considered an exact definition. There might be more <p> tags with class=j or class=m to signal more definitions (those with class=m are for similar words, like the plural).
-            2) A page that returns with at least 1 <div> with class=item-list is considered an approximate result.
-            3) All other cases are handled as Case.NO_MATCH.
+    def handle_online_no_matches(word: str) -> List[ExtensionResultItem]:
+        """Handles the case where the word has no match online.
 
         Args:
-            soup (BeautifulSoup): The webpage soup.
+            word (str): The word to be defined.
 
         Returns:
-            Case: A Case.
+            List[ExtensionResultItem]: All elements to be shown by the extension. 
         """
-        logger.debug(f"Detect case for online word given soup.")
-        if soup.find("p", {"class": "j"}) is not None:
-            return Case.EXACT_REQ_MATCH
-        elif soup.find("div", {"class": "item-list"}) is not None:
-            return Case.APPROX_MATCH
-        else:
-            return Case.NO_MATCH
+        logger.debug(f"Handle online no matches for word={word}.")
+        return [
+            ExtensionResultItem(
+                icon="images/icon.png",
+                name="Sin palabras",
+                description="La RAE no tiene ni sugerencias para hacer. La dejaste SP.\nPresione ENTER para cerrar.\nPresione Alt+Enter para ir a la RAE.",
+                on_enter=HideWindowAction(),
+                on_alt_enter=OpenUrlAction(f"{BASE_URL}/{word}"),
+            )
+        ]
 
     @staticmethod
-    def handle_online_no_matches(word: str) -> List[ExtensionResultItem]:
-        """Handles the case where the word has no match online.
+    def handle_online_error(word: str, reason: str = "El DLE no respondió a tiempo.") -> List[ExtensionResultItem]:
+        """Handles the case where the DLE couldn't be reached or took too long to answer.
 
         Args:
             word (str): The word to be defined.
+            reason (str, optional): First line of the description. Defaults to "El DLE no respondió a tiempo.".
 
         Returns:
-            List[ExtensionResultItem]: All elements to be shown by the extension. 
+            List[ExtensionResultItem]: All elements to be shown by the extension.
         """
-        logger.debug(f"Handle online no matches for word={word}.")
+        logger.debug(f"Handle online error for word={word}.")
         return [
             ExtensionResultItem(
                 icon="images/icon.png",
-                name="Sin palabras",
-                description="La RAE no tiene ni sugerencias para hacer. La dejaste SP.\nPresione ENTER para cerrar.\nPresione Alt+Enter para ir a la RAE.",
+                name="Sin conexión con el DLE",
+                description=f"{reason}\nPresione ENTER para cerrar.\nPresione Alt+Enter para ir a la RAE.",
                 on_enter=HideWindowAction(),
                 on_alt_enter=OpenUrlAction(f"{BASE_URL}/{word}"),
             )
         ]
 
     def handle_online_approx_results(
-        self, soup: BeautifulSoup
+        self, suggestions: List[Dict[str, str]]
     ) -> List[ExtensionResultItem]:
         """All elements to be displayed by the extension when an approximate result is found (i.e.: no exact match for given word is found).
 
         Args:
-            soup (BeautifulSoup): Whole page soup.
+            suggestions (List[Dict[str, str]]): Suggestions as parsed by dle.parse_approx_results.
 
         Returns:
             List[ExtensionResultItem]: All elements to be shown by the extension.
         """
         logger.debug(f"Word has approx results.")
-        # approx_results = soup.find_all("a", {"data-acc": "LISTA APROX"})
-        # Example result:
-        #     <div class="n1"><a data-acc="LISTA APROX" data-cat="FETCH" data-eti="ad" href="/ad" title="Ir a la entrada">ad</a> (ad)</div>
         max_suggested_items = int(self.preferences["max_suggested_items"])
         logger.info(f"max_suggested_items={max_suggested_items}")
 
-        approx_results = soup.find_all("div", {"class": "n1"})
-
-        if len(approx_results) == 0:
-            raise RuntimeError(
-                "Attempted to handle the approx result case, but the soup doesn't have any <a> tags with 'data-acc'=='LISTA APROX'."
-            )
-
         seen = set()
+        shown = []
         items = []
-        for i in approx_results[:max_suggested_items]:
-            # Done this weird way because i.text would leave the <sup> tag as plaintext.
-            # The structure of these <a> tags is, for example:
-            #     <a data-acc="LISTA APROX" data-cat="FETCH" data-eti="saber" href="/saber" title="Ir a la entrada">saber<sup>1</sup></a>
-            # So children is always [word_of_interest, sup tag] or just [word_of_interest].
-            # Of note, the children is a NavigatableString which ulauncher doesn't like.
-            a, infinitive = i.children
-            display_name = str(next(a.children))
+        for suggestion in suggestions[:max_suggested_items]:
+            display_name = suggestion["word"]
 
             # Guarantee list of approx suggestions shows unique results.
             # On the web, the results are duplicated cause they link to different sections of the webpage, but the webpage is the same.
@@ -242,89 +259,73 @@ class RAE(Extension):
                 continue
             else:
                 seen.add(display_name)
+                shown.append(display_name)
 
-            # https://github.com/Ulauncher/Ulauncher/blob/dev/ulauncher/api/shared/action/SetUserQueryAction.py
-            new_query = f"{self.preferences['kw']} {display_name}"
-
+            # The DLE suggested this very word, so it is looked up as is, without offline suggestions (see ItemEnterEventListener).
             items.append(
                 ExtensionResultItem(
                     icon="images/icon.png",
-                    name=f"{display_name} ꞏ {infinitive.strip()}",
+                    name=f"{display_name} ꞏ {suggestion['infinitive']}",
                     description="Sugerencia RAE",
-                    on_enter=SetUserQueryAction(new_query),
+                    on_enter=ExtensionCustomAction({"word": display_name, "suggested": True}, keep_app_open=True),
                 )
             )
+        self.prefetch_suggestions(shown)
         return items
 
-    def parse_definition(self, word: str, p_tag: Tag) -> ExtensionResultItem:
-        abbrs = " ".join(abbr.text for abbr in p_tag.find_all("abbr"))
+    def prefetch_suggestions(self, words: List[str]):
+        """Fetch and cache the first prefetch_suggestions words in the background, so picking one of them is served from the cache.
 
-        # This is done this weird way cause they put words inside <mark> tags but whitespaces and puntcuations outside of them.
-        words = "".join(
-            child if isinstance(child, NavigableString) else child.get_text()
-            for child in p_tag.children
-            if child.name not in {"span", "abbr"}
-        )
-
-        words = words.strip()
-        chunks = chunkize_sentence(words, CHARACTERS_PER_LINE)
-        definition_in_lines = "\n".join(chunks)
+        Words in the offline data or already cached are left out, since they are served instantly anyway. Nothing is prefetched in offline only mode or while the DLE keeps failing.
 
-        code = p_tag["id"]
+        Args:
+            words (List[str]): Suggested words, in the order they are shown.
+        """
+        if self.preferences["mode"] == MODE_OFFLINE_ONLY or self.breaker.is_open:
+            return
+        amount = int(self.preferences["prefetch_suggestions"])
+        to_prefetch = []
+        for word in words:
+            if len(to_prefetch) >= amount:
+                break
+            if OFFLINE_STORE.resolve(word) is None and self.cache.get(word) is None:
+                to_prefetch.append(word)
+        if to_prefetch:
+            self.prefetcher.prefetch(to_prefetch)
 
+    @staticmethod
+    def parse_definition(entry: Dict[str, str]) -> ExtensionResultItem:
         return ExtensionResultItem(
                     icon="images/icon.png",
-                    name=f"{word} [{abbrs}]",
-                    description=definition_in_lines,
+                    name=f"{entry['word']} [{entry['abbrs']}]",
+                    description=wrap(entry["definition"]),
                     on_enter=CopyToClipboardAction(
-                        words
+                        entry["definition"]
                     ),  # https://github.com/Ulauncher/Ulauncher/blob/dev/ulauncher/api/shared/action/CopyToClipboardAction.py
                     on_alt_enter=OpenUrlAction(
-                        f"{BASE_URL}/{word}#{code}"
+                        f"{BASE_URL}/{entry['word']}#{entry['html_code']}"
                     ),  # https://github.com/Ulauncher/Ulauncher/blob/dev/ulauncher/api/shared/action/OpenUrlAction.py
         )
     
     def handle_online_exact_results(
-        self, soup: BeautifulSoup
+        self, definitions: List[Dict[str, str]]
     ) -> List[ExtensionResultItem]:
         """All elements to be displayed by the extension when an exact definition is found.
 
         Args:
-            soup (BeautifulSoup): Whole page soup.
+            definitions (List[Dict[str, str]]): Definitions as parsed by dle.parse_exact_results.
 
         Returns:
             List[ExtensionResultItem]: All elements to be shown by the extension.
         """
         logger.debug(f"Word has exact results.")
-        items = []
         max_shown_definitions = int(self.preferences["max_shown_definitions"])
         logger.info(f"max_shown_definitions={max_shown_definitions}")
 
-        # definitions = soup.find_all("p", {"class": "j"})
-
-        article = soup.find('article')
-        if not isinstance(article, Tag):
-            raise RuntimeError('soup has no <article> tag.')
-        
-        header = article.find('header')
-        if not isinstance(header, Tag):
-            raise RuntimeError('article has no <header> tag and thus no first word can be found.')
-        word = header.text
-
-        for definition in article.find_all('p'):
-            def_class = definition['class'][0]
-            if def_class in {'j', 'm'}:
-                item = self.parse_definition(word, definition)
-                items.append(item)
-
-                if len(items) == max_shown_definitions:
-                    break
-            elif def_class[0] == "k":
-                word = definition.text
-            else:
-                continue
-            
-        return items
+        return [
+            RAE.parse_definition(entry)
+            for entry in definitions[:max_shown_definitions]
+        ]
 
     def handle_offline(self, word: str) -> List[ExtensionResultItem]:
         """Handle the case where the word is stored in the offline database.
@@ -335,36 +336,181 @@ class RAE(Extension):
         Returns:
             List[ExtensionResultItem]: All elements to be shown by the extension. 
         """
-        case = RAE.detect_offline_case(word)
-        logger.debug(f"Handle word in offline databse with {case=}.")
-
         max_shown_definitions = int(self.preferences["max_shown_definitions"])
         logger.debug(f"{max_shown_definitions=}")
-        
-        if case == Case.EMPTY_WORD:
+
+        if word is None:
             return RAE.handle_empty_word()
-        elif case == Case.EXACT_STORED_MATCH:
+        headword = OFFLINE_STORE.resolve(word)
+        with self.stats.timer("render"):
+            items = RAE.offline_items(headword, max_shown_definitions)
+        if headword != word:
+            # Typed with other accents or case. It most likely means headword, but it could be another entry of the DLE.
+            logger.debug(f"{word=} resolved offline to {headword=}.")
+            items = items + [
+                RAE.online_lookup_item(word, f"Mostrando «{headword}» de los datos offline.")
+            ]
+        return items
+
+    @staticmethod
+    @functools.lru_cache(maxsize=OFFLINE_ITEMS_CACHE_SIZE)
+    def offline_items(word: str, max_shown_definitions: int) -> List[ExtensionResultItem]:
+        """Builds the elements to display for a word in the offline database, from the render-ready records of the store.
+
+        Results are kept in a bounded LRU, so typing a stored word again costs a dict lookup. PreferencesUpdateListener clears it, as the items depend on the preferences.
+
+        Args:
+            word (str): The word to define.
+            max_shown_definitions (int): Maximum amount of definitions to show.
+
+        Raises:
+            RuntimeError: If the word isn't stored.
+
+        Returns:
+            List[ExtensionResultItem]: All elements to be shown by the extension.
+        """
+        case = RAE.detect_offline_case(word)
+        logger.debug(f"Handle word in offline databse with {case=}.")
+        return [
+            ExtensionResultItem(
+                icon="images/icon.png",
+                name=entry["name"],
+                description=entry["description"],
+                on_enter=CopyToClipboardAction(entry["definition"]),
+                on_alt_enter=OpenUrlAction(entry["url"]),
+            )
+            for entry in OFFLINE_STORE.get(word, limit=max_shown_definitions)
+        ]
+
+    @staticmethod
+    def online_lookup_item(word: str, reason: str) -> ExtensionResultItem:
+        """An item to look the word up in the DLE, for when the offline data only has something close to it.
+
+        Args:
+            word (str): The word as typed by the user.
+            reason (str): First line of the description, telling why the offline data may not be what the user wants.
+
+        Returns:
+            ExtensionResultItem: The item. ENTER triggers an ItemEnterEvent handled by ItemEnterEventListener.
+        """
+        return ExtensionResultItem(
+            icon="images/icon.png",
+            name=f"Buscar «{word}» en el DLE",
+            description=f"{reason}\nPresione ENTER para consultar el DLE.",
+            on_enter=ExtensionCustomAction({"word": word}, keep_app_open=True),
+            on_alt_enter=OpenUrlAction(f"{BASE_URL}/{word}"),
+        )
+
+    @staticmethod
+    def handle_offline_only(word: str) -> List[ExtensionResultItem]:
+        """Handles a word that is neither offline nor cached while the mode preference forbids going to the DLE.
+
+        Args:
+            word (str): The word to be defined.
+
+        Returns:
+            List[ExtensionResultItem]: All elements to be shown by the extension.
+        """
+        logger.debug(f"Handle offline only mode for word={word}.")
+        return [
+            ExtensionResultItem(
+                icon="images/icon.png",
+                name=f"«{word}» no está disponible sin conexión",
+                description="Modo solo offline: la palabra no está en los datos offline ni en el caché.\nPresione ENTER para cerrar.\nPresione Alt+Enter para ir a la RAE.",
+                on_enter=HideWindowAction(),
+                on_alt_enter=OpenUrlAction(f"{BASE_URL}/{word}"),
+            )
+        ]
+
+    def handle_offline_suggestions(self, word: str) -> List[ExtensionResultItem]:
+        """Suggest offline headwords close to the given word, without going to the DLE.
+
+        The first item lets the user look the word up online anyway, since it may well exist in the DLE and not in the offline data.
+
+        Args:
+            word (str): The word to define.
+
+        Returns:
+            List[ExtensionResultItem]: All elements to be shown by the extension, or an empty list if no headword is close to the word.
+        """
+        max_suggested_items = int(self.preferences["max_suggested_items"])
+        suggestions = self.suggestion_index.suggest(word, max_suggested_items)
+        logger.debug(f"Offline suggestions for {word=}: {suggestions}.")
+        if not suggestions:
+            return []
+
+        items = [RAE.online_lookup_item(word, "Sin coincidencia exacta en los datos offline.")]
+        for suggestion in suggestions:
+            items.append(
+                ExtensionResultItem(
+                    icon="images/icon.png",
+                    name=suggestion,
+                    description="Sugerencia offline",
+                    on_enter=SetUserQueryAction(f"{self.preferences['kw']} {suggestion}"),
+                )
+            )
+        return items
+
+    def handle_search(self, query: Optional[str]) -> List[ExtensionResultItem]:
+        """Find offline words from a description of their meaning, e.g. "órgano de la vista" (see OfflineStore.search).
+
+        Args:
+            query (Optional[str]): Free text, as typed by the user.
+
+        Returns:
+            List[ExtensionResultItem]: All elements to be shown by the extension.
+        """
+        if not query:
             return [
                 ExtensionResultItem(
                     icon="images/icon.png",
-                    name=f"{word} [{entry['abbrs']}]",
-                    description=entry["definition"],
-                    on_enter=CopyToClipboardAction(entry["definition"],),
-                    on_alt_enter=OpenUrlAction(
-                        f"{BASE_URL}/{word}#{entry['html_code']}"
-                    ),
+                    name="Búsqueda inversa vacía",
+                    description="Describa la palabra que busca para encontrarla en las definiciones offline.",
+                    on_enter=DoNothingAction(),
                 )
-                for entry in STORED_DATA["words"][word][:max_shown_definitions]
             ]
-        else:
-            logger.debug(f"Handle offline got case={case} when only compatible cases are Case.EMPTY_WORD and Case.EXACT_STORED_MATCH")
-            raise RuntimeError(f"Handle offline got case={case} when only compatible cases are Case.EMPTY_WORD and Case.EXACT_STORED_MATCH")
+        max_suggested_items = int(self.preferences["max_suggested_items"])
+        with self.stats.timer("search"):
+            results = OFFLINE_STORE.search(query, max_suggested_items)
+        logger.debug(f"Reverse search for {query=}: {[word for word, _ in results]}.")
+        if not results:
+            return [
+                ExtensionResultItem(
+                    icon="images/icon.png",
+                    name="Sin resultados",
+                    description="Ninguna definición offline coincide con la búsqueda.\nPresione ENTER para cerrar.",
+                    on_enter=HideWindowAction(),
+                )
+            ]
+        return [
+            ExtensionResultItem(
+                icon="images/icon.png",
+                name=word,
+                description=wrap(definition),
+                on_enter=SetUserQueryAction(f"{self.preferences['kw']} {word}"),
+                on_alt_enter=OpenUrlAction(f"{BASE_URL}/{word}"),
+            )
+            for word, definition in results
+        ]
 
-    def handle_online(self, word: str) -> List[ExtensionResultItem]:
-        """Handle the case where the word needs a checkup with the online RAE DLE. This method will handle the request.
+    def handle_online(
+        self,
+        word: str,
+        offline_suggestions: bool = True,
+        event: Optional[Union[KeywordQueryEvent, ItemEnterEvent]] = None,
+        guard: bool = True,
+    ) -> List[ExtensionResultItem]:
+        """Handle the case where the word needs a checkup with the online RAE DLE. This method will handle the request, unless a fresh parsed copy of the page is cached or (if enabled) there are offline headwords close enough to suggest.
+
+        If event is given, the request is made in the background: a placeholder is returned right away, and the results are sent as the response to event once ready (unless a newer query made them obsolete).
+
+        An expired cached copy is served as is, without waiting for the DLE, in the offline first and offline only modes (see the mode preference) and while the DLE keeps failing (see CircuitBreaker). Except in offline only mode, it is then refreshed in the background for the next lookup. In online mode, it is refreshed right away with a conditional request (see fetch_online), and never replaced by offline suggestions. In offline only mode, words that aren't cached are never requested.
 
         Args:
             word (str): The word to define.
+            offline_suggestions (bool, optional): Whether offline suggestions may replace the request. Defaults to True.
+            event (Optional[Union[KeywordQueryEvent, ItemEnterEvent]], optional): The event to answer asynchronously. Defaults to None, meaning the request blocks.
+            guard (bool, optional): Whether to skip the request for queries that can't be in the DLE (see dle.is_plausible_query), offering it as an item instead. Defaults to True.
 
         Raises:
             RuntimeError: If the case detection fails, raise this exception. This probably means that RAE changed the page structure or that there is a new edge case that wasn't considered before.
@@ -372,21 +518,314 @@ class RAE(Extension):
         Returns:
             List[ExtensionResultItem]: All elements to be shown by the extension. 
         """
-        req = requests.get(f"{BASE_URL}/{word}", headers=HEADERS)
-        soup = BeautifulSoup(req.text, "html.parser")
-        case = RAE.detect_online_case(soup)
-
-        if case == Case.NO_MATCH:
-            # ! Bit of a catchall. Beware of this line, as it tries to handle all unforseen cases and give the user the ability to open the website.
-            items = RAE.handle_online_no_matches(word)
-        elif case == Case.APPROX_MATCH:
-            items = self.handle_online_approx_results(soup)
-        elif case == Case.EXACT_REQ_MATCH:
-            items = self.handle_online_exact_results(soup)
-        else:
-            raise RuntimeError(f"Got {case=}, which doesn't belong to class Case.")
+        max_shown_definitions = int(self.preferences["max_shown_definitions"])
+        mode = self.preferences["mode"]
+        with self.stats.timer("cache"):
+            entry = self.cache.get_entry(word)
+        if entry is not None:
+            insufficient = (
+                entry.result.get("truncated")
+                and len(entry.result["definitions"]) < max_shown_definitions
+            )
+            if not insufficient and not self.cache.expired(entry):
+                logger.info(f"{word=} served from cache.")
+                self.stats.count("cache_hit")
+                self.prefetcher.claim(word)
+                return self.render_online(word, entry.result)
+            if mode != MODE_ONLINE or self.breaker.is_open:
+                logger.info(f"Stale {word=} served from cache.")
+                self.stats.count("stale_hit")
+                if mode != MODE_OFFLINE_ONLY:
+                    self.revalidator.revalidate(word)
+                return self.render_online(word, entry.result)
+            if insufficient:
+                logger.info(f"Cached {word=} has fewer definitions than {max_shown_definitions=}.")
+        self.stats.count("cache_miss")
+        # A word cached before was looked up on purpose. It is refreshed, with a conditional request, rather than replaced by suggestions.
+        if offline_suggestions and entry is None and self.preferences["offline_suggestions"] == "Sí":
+            items = self.handle_offline_suggestions(word)
+            if items:
+                return items
+
+        if guard and not is_plausible_query(word):
+            logger.info(f"{word=} can't be in the DLE. Not looking it up.")
+            self.stats.count("guarded")
+            return [RAE.online_lookup_item(word, "Consulta muy corta o con caracteres que el DLE no usa.")]
+        with self.stats.timer("cache"):
+            known_miss = self.cache.is_miss(word)
+        if known_miss:
+            logger.info(f"{word=} had no match in the DLE recently.")
+            self.stats.count("negative_hit")
+            return RAE.handle_online_no_matches(word)
+        if mode == MODE_OFFLINE_ONLY:
+            return RAE.handle_offline_only(word)
+
+        if event is None:
+            return self.lookup_online(word)
+        self.lookups.submit(
+            lambda obsolete: self.lookup_online(word, obsolete),
+            lambda items: self._client.send(Response(event, RenderResultListAction(items))),
+        )
+        return RAE.handle_searching(word)
+
+    @staticmethod
+    def handle_searching(word: str) -> List[ExtensionResultItem]:
+        """Placeholder shown while the DLE is being queried in the background.
+
+        Args:
+            word (str): The word being defined.
+
+        Returns:
+            List[ExtensionResultItem]: All elements to be shown by the extension.
+        """
+        return [
+            ExtensionResultItem(
+                icon="images/icon.png",
+                name=f"Buscando «{word}»…",
+                description="Consultando el DLE.\nPresione Alt+Enter para ir a la RAE.",
+                on_enter=DoNothingAction(),
+                on_alt_enter=OpenUrlAction(f"{BASE_URL}/{word}"),
+            )
+        ]
+
+    def stats_extra(self) -> Dict:
+        """Stats kept outside of self.stats: the prefetcher and revalidator counters, the cache size and the circuit breaker state."""
+        return {
+            "prefetch": self.prefetcher.stats,
+            "revalidate": dict(self.revalidator.counters),
+            "cache_entries": len(self.cache),
+            "breaker_open": self.breaker.is_open,
+        }
+
+    def handle_stats(self) -> List[ExtensionResultItem]:
+        """Elements shown for the stats keyword: the query mix, then the latency of each stage.
+
+        Returns:
+            List[ExtensionResultItem]: All elements to be shown by the extension. ENTER on the first one dumps the stats to STATS_PATH, on any other it copies them as JSON.
+        """
+        snapshot = self.stats.snapshot(self.stats_extra())
+        as_json = json.dumps(snapshot, indent=4, ensure_ascii=False)
+        counters = snapshot["counters"]
+
+        def percent(ratio: Optional[float]) -> str:
+            return "-" if ratio is None else f"{ratio:.0%}"
+
+        items = [
+            ExtensionResultItem(
+                icon="images/icon.png",
+                name=f"{counters.get('offline', 0) + counters.get('online', 0)} búsquedas: {percent(snapshot['ratios']['offline'])} offline",
+                description=(
+                    f"Caché: {percent(snapshot['ratios']['cache_hit'])} de aciertos, {snapshot['cache_entries']} palabras. "
+                    f"Prefetch: {snapshot['prefetch']['hit_rate']:.0%} usado. "
+                    f"Consultas evitadas: {counters.get('negative_hit', 0) + counters.get('guarded', 0)}. "
+                    f"Copias vencidas servidas: {counters.get('stale_hit', 0)}. "
+                    f"Errores: {counters.get('online_error', 0)}{' (DLE en pausa)' if snapshot['breaker_open'] else ''}.\n"
+                    f"Presione ENTER para guardar las estadísticas en {STATS_PATH}."
+                ),
+                on_enter=ExtensionCustomAction({"dump_stats": True}, keep_app_open=True),
+            )
+        ]
+        for stage in STATS_STAGES:
+            if stage not in snapshot["stages"]:
+                continue
+            summary = snapshot["stages"][stage]
+            items.append(
+                ExtensionResultItem(
+                    icon="images/icon.png",
+                    name=f"{stage}: p50 {summary['p50']:.1f} ms · p95 {summary['p95']:.1f} ms · p99 {summary['p99']:.1f} ms",
+                    description=f"{summary['count']} mediciones, máximo {summary['max']:.1f} ms.\nPresione ENTER para copiar las estadísticas.",
+                    on_enter=CopyToClipboardAction(as_json),
+                )
+            )
+        return items
+
+    def handle_stats_dump(self) -> List[ExtensionResultItem]:
+        """Dump the stats to STATS_PATH.
+
+        Returns:
+            List[ExtensionResultItem]: All elements to be shown by the extension.
+        """
+        path = self.stats.dump(STATS_PATH, self.stats_extra())
+        return [
+            ExtensionResultItem(
+                icon="images/icon.png",
+                name="Estadísticas guardadas",
+                description=f"{path}\nPresione ENTER para copiar la ruta.",
+                on_enter=CopyToClipboardAction(str(path)),
+            )
+        ]
+
+    def lookup_online(
+        self, word: str, obsolete: Optional[Callable[[], bool]] = None
+    ) -> List[ExtensionResultItem]:
+        """Fetch the word from the DLE and render the result, or an error item if the DLE can't be reached.
+
+        If the DLE can't be reached but an expired copy of the page is cached, that copy is shown instead, after an item to try again.
+
+        Args:
+            word (str): The word to define.
+            obsolete (Optional[Callable[[], bool]], optional): Returns True once the lookup is no longer needed, to stop the download early. Defaults to None.
+
+        Raises:
+            LookupCancelled: If obsolete returned True before the page was fully read.
+
+        Returns:
+            List[ExtensionResultItem]: All elements to be shown by the extension.
+        """
+        import requests
+
+        max_shown_definitions = int(self.preferences["max_shown_definitions"])
+        if self.prefetcher.wait(word, timeout=float(self.preferences["read_timeout"])):
+            # The word was being prefetched. If that went well, it is cached now.
+            result = self.cache.get(word)
+            if result is not None:
+                self.prefetcher.claim(word)
+                return self.render_online(word, result)
+        try:
+            result = self.fetch_online(word, max_shown_definitions, obsolete)
+        except requests.RequestException as e:
+            logger.warning(f"Online lookup for {word=} failed: {e!r}.")
+            self.stats.count("online_error")
+            stale = self.cache.get_entry(word)
+            if stale is not None:
+                self.stats.count("stale_hit")
+                return [
+                    RAE.online_lookup_item(word, "Sin conexión con el DLE: se muestra la copia guardada.")
+                ] + self.render_online(word, stale.result)
+            if self.breaker.is_open:
+                return RAE.handle_online_error(
+                    word, f"El DLE falló varias veces seguidas. Se reintentará en {self.breaker.retry_in:.0f} s."
+                )
+            return RAE.handle_online_error(word)
+        return self.render_online(word, result)
+
+    def render_online(self, word: str, result: Dict) -> List[ExtensionResultItem]:
+        """Turn a parsed DLE page into the elements to display.
+
+        Args:
+            word (str): The word to define.
+            result (Dict): The parsed page, as returned by dle.parse_chunks.
+
+        Raises:
+            RuntimeError: If the page has an unknown case.
+
+        Returns:
+            List[ExtensionResultItem]: All elements to be shown by the extension.
+        """
+        case = Case[result["case"]]
+        with self.stats.timer("render"):
+            if case == Case.NO_MATCH:
+                # ! Bit of a catchall. Beware of this line, as it tries to handle all unforseen cases and give the user the ability to open the website.
+                items = RAE.handle_online_no_matches(word)
+            elif case == Case.APPROX_MATCH:
+                items = self.handle_online_approx_results(result["suggestions"])
+            elif case == Case.EXACT_REQ_MATCH:
+                items = self.handle_online_exact_results(result["definitions"])
+            else:
+                raise RuntimeError(f"Got {case=}, which doesn't belong to class Case.")
         return items
 
+    def fetch_online(
+        self,
+        word: str,
+        max_definitions: Optional[int] = None,
+        obsolete: Optional[Callable[[], bool]] = None,
+    ) -> Dict:
+        """Get the parsed DLE page for the given word from the DLE, and cache it.
+
+        The page is parsed as it downloads, and parsing stops as soon as max_definitions definitions were read. The rest of the page is still read and dropped, so the connection stays open for the next request.
+        If an expired copy of the page is cached, the request is conditional (If-None-Match / If-Modified-Since), and a 304 Not Modified answer just renews the cached copy.
+
+        The time until the response headers arrive is recorded as the "http" stage, the time waiting for the body as "download", and the rest of the time spent reading the page, which includes detecting its case, as "parse".
+
+        Requests go through self.breaker: after BREAKER_FAILURES failures in a row (connection errors, timeouts, 5xx answers) the DLE isn't requested for BREAKER_COOLDOWN seconds.
+
+        Only successful responses with definitions or suggestions are cached. Case.NO_MATCH is a catchall that could hide a changed page structure or a transient error, so it is only remembered for the shorter negative TTL of the cache (see DefinitionCache.add_miss).
+
+        Args:
+            word (str): The word to define.
+            max_definitions (Optional[int], optional): Stop once this many definitions were read. Defaults to None, meaning all of them.
+            obsolete (Optional[Callable[[], bool]], optional): Returns True once the page is no longer needed. It is checked before the request and between downloaded chunks. Defaults to None.
+
+        Raises:
+            requests.RequestException: If the DLE can't be reached, doesn't answer within the connect_timeout and read_timeout preferences, answers with a server error, or failed too often recently (see CircuitBreaker).
+            LookupCancelled: If obsolete returned True before the page was fully read. Nothing is cached then.
+
+        Returns:
+            Dict: The parsed page, as returned by dle.parse_chunks.
+        """
+        import requests
+
+        headers = {}
+        stale = self.cache.get_entry(word)
+        if stale is not None and not (
+            stale.result.get("truncated")
+            and max_definitions is not None
+            and len(stale.result["definitions"]) < max_definitions
+        ):
+            if stale.etag:
+                headers["If-None-Match"] = stale.etag
+            if stale.last_modified:
+                headers["If-Modified-Since"] = stale.last_modified
+
+        if obsolete is not None and obsolete():
+            raise LookupCancelled()
+        timeout = (
+            float(self.preferences["connect_timeout"]),
+            float(self.preferences["read_timeout"]),
+        )
+        if not self.breaker.allow():
+            self.stats.count("breaker_open")
+            raise requests.ConnectionError(
+                f"The DLE failed {self.breaker.failures} times in a row. Not requesting it for {self.breaker.retry_in:.0f} s."
+            )
+        try:
+            with self.stats.timer("http"):
+                req = self.session.get(
+                    f"{BASE_URL}/{word}", headers=headers, timeout=timeout, stream=True
+                )
+            with req:
+                if req.status_code >= 500:
+                    req.raise_for_status()
+                if req.status_code == 304 and headers:
+                    result = None
+                else:
+                    if req.encoding is None:
+                        req.encoding = "utf-8"
+                    download = Stopwatch()
+                    chunks = download.iterate(req.iter_content(chunk_size=8192, decode_unicode=True))
+                    if obsolete is not None:
+                        chunks = cancellable(chunks, obsolete)
+                    try:
+                        with Stopwatch() as reading:
+                            result = parse_chunks(chunks, max_definitions)
+                    except LookupCancelled:
+                        req.raw.drain_conn()
+                        raise
+                    # Closing a response with unread data drops its connection. Reading the rest of the page, after the early stop, lets it go back to the pool.
+                    req.raw.drain_conn()
+        except requests.RequestException:
+            self.breaker.record_failure()
+            raise
+        self.breaker.record_success()
+        if result is None:
+            logger.info(f"Cached {word=} not modified since it was stored.")
+            self.stats.count("not_modified")
+            self.cache.touch(word)
+            return stale.result
+        self.stats.record("download", download.elapsed)
+        self.stats.record("parse", reading.elapsed - download.elapsed)
+        if req.ok and result["case"] != Case.NO_MATCH.name:
+            self.cache.set(
+                word,
+                result,
+                etag=req.headers.get("ETag"),
+                last_modified=req.headers.get("Last-Modified"),
+            )
+        elif result["case"] == Case.NO_MATCH.name and (req.ok or req.status_code == 404):
+            self.cache.add_miss(word)
+        return result
+
 
 class KeywordQueryEventListener(EventListener):
     def on_event(
@@ -402,19 +841,59 @@ class KeywordQueryEventListener(EventListener):
             RenderResultListAction: Results ready to be displayed by ulauncher.
         """
 
+        if event.get_keyword() == extension.preferences["stats_kw"]:
+            return RenderResultListAction(extension.handle_stats())
+        if event.get_keyword() == extension.preferences["search_kw"]:
+            extension.lookups.cancel()
+            return RenderResultListAction(extension.handle_search(event.get_argument()))
+
         word = event.get_argument()
         logger.info(f"event with word={word}")
 
-        if not RAE.need_online_check(word):
-            logger.info(f"{word=} doesn't need online check.")
-            items = extension.handle_offline(word)
-        else:
-            logger.info(f"{word=} needs online check.")
-            items = extension.handle_online(word)
+        extension.lookups.cancel()  # Results for the previous query are no longer wanted.
+        with extension.stats.timer("query"):
+            with extension.stats.timer("offline check"):
+                need_online_check = RAE.need_online_check(word)
+            if not need_online_check:
+                logger.info(f"{word=} doesn't need online check.")
+                extension.stats.count("offline")
+                items = extension.handle_offline(word)
+            else:
+                logger.info(f"{word=} needs online check.")
+                extension.stats.count("online")
+                items = extension.handle_online(word, event=event)
 
         return RenderResultListAction(items)
 
 
+class ItemEnterEventListener(EventListener):
+    def on_event(self, event: ItemEnterEvent, extension: RAE) -> RenderResultListAction:
+        """Look a word up in the DLE when the user chooses to skip the offline suggestions or picks a suggestion of the DLE, or dump the stats when asked from the stats keyword.
+
+        A picked suggestion that is a headword of the offline data is served from it.
+
+        Args:
+            event (ItemEnterEvent): The ItemEnterEvent triggered by an ExtensionCustomAction (docs.ulauncher.io/en/latest/extensions/events.html?highlight=ItemEnterEvent#itementerevent).
+            extension (RAE): The Extension.
+
+        Returns:
+            RenderResultListAction: Results ready to be displayed by ulauncher.
+        """
+        data = event.get_data()
+        if data.get("dump_stats"):
+            return RenderResultListAction(extension.handle_stats_dump())
+        word = data["word"]
+        extension.lookups.cancel()
+        if data.get("suggested") and word in OFFLINE_STORE:
+            logger.info(f"Suggested {word=} served offline.")
+            extension.stats.count("offline")
+            return RenderResultListAction(extension.handle_offline(word))
+        logger.info(f"Online lookup requested for {word=}.")
+        return RenderResultListAction(
+            extension.handle_online(word, offline_suggestions=False, event=event, guard=False)
+        )
+
+
 class PreferencesEventListener(EventListener):
     def on_event(self, event: PreferencesEvent, extension: Extension):
         """Set this session's preferences to those of the last session, except for the reset toggle, which is reset to the default.
@@ -436,6 +915,7 @@ class PreferencesUpdateListener(EventListener):
             event (PreferencesUpdateEvent): The PreferencesUpdateEvent triggered when the user clicks SAVE in the Extension preference's page (docs.ulauncher.io/en/latest/extensions/events.html?highlight=PreferencesUpdateEvent#preferencesupdateevent).
             extension (Extension): The extension.
         """
+        RAE.offline_items.cache_clear()  # Built items may depend on the old preferences.
         if event.id in NUMERIC_PREFERENCES:
             if float(event.new_value).is_integer():
                 # Don't do the typical try/catch cause 4.2 (not "4.2") would be truncated to 4 and silently change the value to 4, instead of throwing an error.
@@ -448,6 +928,21 @@ class PreferencesUpdateListener(EventListener):
                 logger.info(
                     f"{event.id} failed to change. Reverting to previous value of {event.old_value}. Given: {event.new_value}. Try an integer."
                 )
+        elif event.id in TIMEOUT_PREFERENCES:
+            try:
+                new_value = float(event.new_value)
+            except ValueError:
+                new_value = 0
+            if new_value > 0:
+                extension.preferences[event.id] = new_value
+                logger.info(
+                    f"{event.id} changed from {event.old_value} to {event.new_value}."
+                )
+            else:
+                extension.preferences[event.id] = float(event.old_value)
+                logger.info(
+                    f"{event.id} failed to change. Reverting to previous value of {event.old_value}. Given: {event.new_value}. Try a positive number of seconds."
+                )
         elif event.id == "reset_to_default" and event.new_value == "Reset":
             for id_, val in DEFAULT_PREFERENCES.items():
                 old_val = extension.preferences[id_]
@@ -463,4 +958,6 @@ class PreferencesUpdateListener(EventListener):
 
 
 if __name__ == "__main__":
-    RAE().run()
+    extension = RAE()
+    extension.start_warm_up()
+    extension.run()
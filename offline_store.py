@@ -0,0 +1,357 @@
+import logging
+import os
+import re
+import sqlite3
+import sys
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+
+from cache import CACHE_FOLDER
+from compact import load_dataset
+from dle import BASE_URL, fold, lookup_key, normalize_key
+from inflect import inflections
+from wrap import wrap
+
+STORE_VERSION = 8  # Bump whenever the schema changes, so stale stores get rebuilt.
+OFFLINE_SOURCE = Path(__file__).resolve().parent / "top_words" / "top_1k_spanish_words.json"
+OFFLINE_STORE_PATH = CACHE_FOLDER / "top_1k_spanish_words.sqlite3"
+STORE_MMAP_SIZE = 256 * 1024 * 1024  # Upper bound; only the file size is actually mapped.
+SEARCH_ROWS_PER_WORD = 4  # Definitions read per word asked for, as several definitions of a word may match.
+SEARCH_MIN_PREFIX = 3  # A shorter last word is matched whole, as a prefix that short matches most of the corpus.
+SEARCH_MAX_TERM_SHARE = 0.02  # Terms in more definitions than this share are too common to search for any of the words.
+SEARCH_MAX_RANKED = 2000  # Matches ranked at most per query. Ranking costs about 2 µs per match.
+# Too common in definitions to tell words apart. Left out of queries, so a query made only of these finds nothing (see search_terms).
+SEARCH_STOPWORDS = {
+    "a", "al", "con", "de", "del", "el", "en", "es", "la", "las", "lo", "los", "o", "para", "por", "que", "se", "su", "sus", "u", "un", "una", "y",
+}
+
+logger = logging.getLogger(__name__)
+
+
+class OfflineStore:
+    """Indexed, read-only view of the offline dataset (top_words/top_1k_spanish_words.json).
+
+    The JSON source is converted once into a SQLite file with one row per definition, indexed by word. Lookups then read only the rows they need instead of keeping the whole dataset in memory.
+    Rows are render-ready: the item name, the wrapped definition and the URL of the definition in the DLE are built with the store, not on every lookup.
+    An alias table maps accent and case insensitive keys (see dle.lookup_key) to the one word that has them, so "Arbol" or "ÁRBOL" find "árbol" without going online.
+    A forms table does the same for inflected forms: those the corpus builder saw the DLE resolve to a stored word, and the regular plurals and conjugations of stored words (see inflect.inflections), so "casas" finds "casa".
+    A full text index over the definitions (SQLite FTS5, accent and case insensitive) finds words from what they mean, see search.
+    Nothing is read at construction time: the SQLite file is opened on the first lookup and (re)built from the JSON only if it is missing, older than the JSON or from another STORE_VERSION.
+    """
+
+    def __init__(self, source: Path, path: Path):
+        """
+        Args:
+            source (Path): The JSON or compact dataset (see compact.py).
+            path (Path): Where the indexed copy is kept. Parent folders are created as needed.
+        """
+        self.source = source
+        self.path = path
+        self._connection: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        with self._lock:
+            if self._connection is None:
+                if (
+                    not self.path.exists()
+                    or self.path.stat().st_mtime < self.source.stat().st_mtime
+                ):
+                    build_store(self.source, self.path)
+                connection = self._open()
+                (version,) = connection.execute("PRAGMA user_version").fetchone()
+                if version != STORE_VERSION:
+                    logger.info(f"Offline store has version {version}, expected {STORE_VERSION}.")
+                    connection.close()
+                    build_store(self.source, self.path)
+                    connection = self._open()
+                self._connection = connection
+                logger.debug(f"Opened offline store at {self.path}.")
+        return self._connection
+
+    def _open(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(
+            f"file:{self.path}?mode=ro", uri=True, check_same_thread=False
+        )
+        # Reads go straight to the page cache of the OS instead of being copied to SQLite's own, so the full text index costs nothing until it is queried.
+        connection.execute(f"PRAGMA mmap_size = {STORE_MMAP_SIZE}")
+        try:
+            # Document frequency of each term of the full text index. Temporary, so it works on the read-only file.
+            connection.execute("CREATE VIRTUAL TABLE temp.search_vocab USING fts5vocab(main, search, 'row')")
+        except sqlite3.OperationalError as e:
+            logger.debug(f"No full text search vocabulary: {e!r}.")
+        return connection
+
+    def __contains__(self, word: str) -> bool:
+        row = self.connection.execute(
+            "SELECT 1 FROM words WHERE word = ?", (word,)
+        ).fetchone()
+        return row is not None
+
+    def resolve(self, word: str) -> Optional[str]:
+        """Finds the stored word a query refers to: the query itself if it is stored, or else the query trimmed and casefolded (see dle.normalize_key) if that is stored, or else the only stored word with the same dle.lookup_key, or else the only stored word the query is a form of.
+
+        Args:
+            word (str): The word as typed by the user.
+
+        Returns:
+            Optional[str]: The stored word, or None if there is none or the key is shared by several stored words.
+        """
+        if word in self:
+            return word
+        key = normalize_key(word)
+        if key in self:
+            return key
+        lookup = lookup_key(word)
+        row = self.connection.execute(
+            "SELECT word FROM aliases WHERE key = ?", (lookup,)
+        ).fetchone()
+        if row is None:
+            row = self.connection.execute(
+                "SELECT word FROM forms WHERE key = ?", (lookup,)
+            ).fetchone()
+        return row[0] if row is not None else None
+
+    def get(self, word: str, limit: int = -1) -> List[Dict[str, str]]:
+        """Returns the stored definitions of word, in page order.
+
+        Args:
+            word (str): The word to define.
+            limit (int, optional): Maximum amount of definitions to read. Defaults to -1, meaning all of them.
+
+        Returns:
+            List[Dict[str, str]]: Definitions with the same keys as in the JSON dataset, plus the headword under "word" (which older datasets don't record, so it defaults to word), the display name under "name", the definition already wrapped for display (see wrap.wrap) under "description" and its DLE URL under "url". Empty if the word isn't stored or has no definitions.
+        """
+        rows = self.connection.execute(
+            "SELECT headword, abbrs, definition, html_code, name, description, url FROM definitions WHERE word = ? ORDER BY position LIMIT ?",
+            (word, limit),
+        )
+        return [
+            {
+                "word": headword,
+                "abbrs": abbrs,
+                "definition": definition,
+                "html_code": html_code,
+                "name": name,
+                "description": description,
+                "url": url,
+            }
+            for headword, abbrs, definition, html_code, name, description, url in rows
+        ]
+
+    def search(self, query: str, limit: int = 10) -> List[Tuple[str, str]]:
+        """Finds stored words from the text of their definitions, e.g. "órgano de la vista" finds "ojo".
+
+        The words of the query are matched ignoring accents and case, the last one as a prefix since it may be half typed (see search_terms). Definitions are ranked by BM25, and each word by its best definition.
+        Words in more than SEARCH_MAX_TERM_SHARE of the definitions are left out, like stopwords, unless every word of the query is. Words with a definition that has every remaining word come first. If there aren't enough of them, definitions with any of the rarest words follow.
+        Ranking reads every match, so a query with more than SEARCH_MAX_RANKED matches gets them in store order instead. On a 50k word synthetic corpus (see benchmarks/reverse_search.py) that keeps the p50 at about 2 ms and the p95 at about 7 ms. The slowest queries are a short, common half typed word on its own ("par"), at about 15 ms.
+
+        Args:
+            query (str): Free text.
+            limit (int, optional): Maximum amount of words to return. Defaults to 10.
+
+        Returns:
+            List[Tuple[str, str]]: Stored words and their best matching definition, best first. Empty if nothing matches or the store has no full text index (SQLite without FTS5).
+        """
+        terms = search_terms(query)
+        if not terms:
+            return []
+        best: Dict[str, str] = {}
+        try:
+            frequencies = self._term_frequencies(terms)
+            if any(frequencies[term] <= SEARCH_MAX_TERM_SHARE * self.definitions for term in terms):
+                terms = [term for term in terms if frequencies[term] <= SEARCH_MAX_TERM_SHARE * self.definitions]
+            matches = [(" AND ".join(terms), min(frequencies[term] for term in terms))]
+            if len(terms) > 1:
+                either = []
+                for term in sorted(terms, key=frequencies.get):
+                    if either and sum(frequencies[other] for other in either) + frequencies[term] > SEARCH_MAX_RANKED:
+                        break
+                    either.append(term)
+                matches.append((" OR ".join(either), sum(frequencies[term] for term in either)))
+            for match, candidates in matches:
+                if len(best) >= limit:
+                    break
+                # Ranking reads every match, so past SEARCH_MAX_RANKED of them, they are taken in store order instead.
+                order = "ORDER BY rank" if candidates <= SEARCH_MAX_RANKED else ""
+                rows = self.connection.execute(
+                    f"SELECT word, definition FROM search WHERE search MATCH ? {order} LIMIT ?",
+                    (match, limit * SEARCH_ROWS_PER_WORD),
+                )
+                for word, definition in rows:
+                    best.setdefault(word, definition)
+        except sqlite3.OperationalError as e:
+            logger.warning(f"Full text search for {query=} failed: {e!r}.")
+            return []
+        return list(best.items())[:limit]
+
+    def _term_frequencies(self, terms: List[str]) -> Dict[str, int]:
+        """Amount of definitions with each term, prefixes included."""
+        frequencies = {}
+        for term in terms:
+            token = fold(term.strip('"*'))
+            if term.endswith("*"):
+                query = "SELECT COALESCE(SUM(doc), 0) FROM search_vocab WHERE term >= ? AND term < ?"
+                (frequencies[term],) = self.connection.execute(query, (token, token + "\uffff")).fetchone()
+            else:
+                query = "SELECT COALESCE(SUM(doc), 0) FROM search_vocab WHERE term = ?"
+                (frequencies[term],) = self.connection.execute(query, (token,)).fetchone()
+        return frequencies
+
+    def headwords(self) -> List[str]:
+        """Every stored word, in no particular order."""
+        return [word for (word,) in self.connection.execute("SELECT word FROM words")]
+
+    @property
+    def definitions(self) -> int:
+        """Amount of stored definitions."""
+        (value,) = self.connection.execute(
+            "SELECT value FROM meta WHERE key = 'definitions'"
+        ).fetchone()
+        return int(value)
+
+    @property
+    def last_checked(self) -> float:
+        (value,) = self.connection.execute(
+            "SELECT value FROM meta WHERE key = 'last_checked'"
+        ).fetchone()
+        return float(value)
+
+
+def build_store(source: Path, path: Path):
+    """Converts the dataset, JSON or compact (see compact.py), into the indexed SQLite file used by OfflineStore.
+
+    Words without definitions (datasets compiled before the corpus builder left them out have some) are skipped, so they aren't found offline and go online instead.
+
+    The file is written next to its final location and then renamed over it, so concurrent readers never see a half built store.
+
+    Args:
+        source (Path): The JSON or compact dataset.
+        path (Path): Destination SQLite file. Parent folders are created as needed.
+    """
+    logger.info(f"Building offline store {path} from {source}.")
+    data = load_dataset(source)
+    data = {**data, "words": {word: entries for word, entries in data["words"].items() if entries}}
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    if tmp_path.exists():
+        tmp_path.unlink()
+
+    connection = sqlite3.connect(str(tmp_path))
+    connection.executescript(
+        """
+        CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+        CREATE TABLE words (word TEXT PRIMARY KEY) WITHOUT ROWID;
+        CREATE TABLE aliases (key TEXT PRIMARY KEY, word TEXT NOT NULL) WITHOUT ROWID;
+        CREATE TABLE forms (key TEXT PRIMARY KEY, word TEXT NOT NULL) WITHOUT ROWID;
+        CREATE TABLE definitions (
+            word TEXT NOT NULL,
+            position INTEGER NOT NULL,
+            headword TEXT NOT NULL,
+            abbrs TEXT NOT NULL,
+            definition TEXT NOT NULL,
+            html_code TEXT NOT NULL,
+            name TEXT NOT NULL,
+            description TEXT NOT NULL,
+            url TEXT NOT NULL,
+            PRIMARY KEY (word, position)
+        ) WITHOUT ROWID;
+        """
+    )
+    connection.execute(f"PRAGMA user_version = {STORE_VERSION}")
+    connection.execute(
+        "INSERT INTO meta (key, value) VALUES ('last_checked', ?), ('definitions', ?)",
+        (str(data["last_checked"]), str(sum(len(entries) for entries in data["words"].values()))),
+    )
+    connection.executemany(
+        "INSERT INTO words (word) VALUES (?)", ((word,) for word in data["words"])
+    )
+    words_by_key: Dict[str, List[str]] = {}
+    for word in data["words"]:
+        words_by_key.setdefault(lookup_key(word), []).append(word)
+    # Keys shared by several words are ambiguous, so those queries still go online.
+    connection.executemany(
+        "INSERT INTO aliases (key, word) VALUES (?, ?)",
+        ((key, words[0]) for key, words in words_by_key.items() if len(words) == 1),
+    )
+    connection.executemany("INSERT INTO forms (key, word) VALUES (?, ?)", form_index(data).items())
+    connection.executemany(
+        "INSERT INTO definitions (word, position, headword, abbrs, definition, html_code, name, description, url) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        (
+            (
+                word,
+                position,
+                entry.get("word", word),
+                entry["abbrs"],
+                entry["definition"],
+                entry["html_code"],
+                f"{entry.get('word', word)} [{entry['abbrs']}]",
+                wrap(entry["definition"]),
+                f"{BASE_URL}/{word}#{entry['html_code']}",
+            )
+            for word, entries in data["words"].items()
+            for position, entry in enumerate(entries)
+        ),
+    )
+    try:
+        connection.execute(
+            "CREATE VIRTUAL TABLE search USING fts5(word UNINDEXED, definition, tokenize = 'unicode61 remove_diacritics 2')"
+        )
+    except sqlite3.OperationalError as e:
+        logger.warning(f"SQLite has no full text search, the offline store won't support it: {e!r}.")
+    else:
+        connection.execute("INSERT INTO search (word, definition) SELECT word, definition FROM definitions")
+        connection.execute("INSERT INTO search (search) VALUES ('optimize')")
+    connection.commit()
+    connection.execute("VACUUM")
+    connection.close()
+    os.replace(tmp_path, path)
+
+
+def search_terms(query: str) -> List[str]:
+    """Turns free text into FTS5 terms. Join them with " AND " or " OR " to make an FTS5 query.
+
+    Each word is a quoted string, so FTS5 operators typed by the user (AND, NEAR...) are searched as words. The last one is a prefix if it has at least SEARCH_MIN_PREFIX characters. SEARCH_STOPWORDS are left out, so a query made only of them has no terms.
+
+    Args:
+        query (str): Free text, as typed by the user.
+
+    Returns:
+        List[str]: The terms, or an empty list if the text has no words but stopwords.
+    """
+    tokens = re.findall(r"\w+", query.casefold())
+    terms = [f'"{token}"' for token in dict.fromkeys(tokens) if token not in SEARCH_STOPWORDS]
+    if terms and terms[-1] == f'"{tokens[-1]}"' and len(tokens[-1]) >= SEARCH_MIN_PREFIX:
+        terms[-1] += "*"
+    return terms
+
+
+def form_index(data: Dict) -> Dict[str, str]:
+    """Maps lookup keys of inflected forms to the stored word whose definitions they should show.
+
+    Lemmas observed by the corpus builder ("patatas" was answered with the entry of "patata") map to the stored word, as do the regular inflections of every stored word. Generated forms are only those that can't be entries of the DLE themselves (see inflect.conjugations), so a query like "sala" is looked up online instead of showing salir. A key that several stored words generate is ambiguous and left out, and observed lemmas take precedence over generated forms. Keys of stored words are left out too, as those match exactly.
+
+    Args:
+        data (Dict): The JSON dataset.
+
+    Returns:
+        Dict[str, str]: Stored word by lookup key.
+    """
+    stored = {lookup_key(word) for word in data["words"]}
+    generated: Dict[str, Set[str]] = {}
+    for word, entries in data["words"].items():
+        for form in inflections(word, (entry["abbrs"] for entry in entries)):
+            generated.setdefault(lookup_key(form), set()).add(word)
+    index = {key: words.pop() for key, words in generated.items() if len(words) == 1}
+    for form, lemma in data.get("forms", {}).items():
+        if form in data["words"]:
+            index[lookup_key(lemma)] = form
+    return {key: word for key, word in index.items() if key not in stored}
+
+
+if __name__ == "__main__":
+    # Usage: python offline_store.py SOURCE_JSON DESTINATION_SQLITE
+    build_store(Path(sys.argv[1]), Path(sys.argv[2]))
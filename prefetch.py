@@ -0,0 +1,163 @@
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError
+from typing import Callable, Dict, Iterable, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+
+class Prefetcher:
+    """Fetches words in the background before the user asks for them, e.g. the suggestions of an approximate result.
+
+    At most workers fetches run at once. A new batch supersedes the previous one: words that didn't start yet and aren't in the new batch are skipped, so the queue never grows beyond the last batch.
+
+    Counters (see stats) tell how many prefetched words were later used, via claim.
+    """
+
+    def __init__(self, fetch: Callable[[str], object], workers: int = 1):
+        """
+        Args:
+            fetch (Callable[[str], object]): Fetches and caches a word. Its result is ignored.
+            workers (int, optional): Maximum amount of fetches running at once. Defaults to 1.
+        """
+        self.fetch = fetch
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="prefetch")
+        self._lock = threading.Lock()
+        self._wanted: Set[str] = set()
+        self._pending: Dict[str, Future] = {}
+        self._prefetched: Set[str] = set()
+        self.counters = {"submitted": 0, "fetched": 0, "failed": 0, "skipped": 0, "used": 0}
+
+    def prefetch(self, words: Iterable[str]):
+        """Schedules words to be fetched, superseding the previous batch.
+
+        Args:
+            words (Iterable[str]): Words to fetch, most likely first. Callers should leave out those that are already available.
+        """
+        words = list(words)
+        with self._lock:
+            self._wanted = set(words)
+            for word in words:
+                if word in self._pending or word in self._prefetched:
+                    continue
+                self._pending[word] = self._executor.submit(self._run, word)
+                self.counters["submitted"] += 1
+        logger.debug(f"Prefetch of {words} scheduled.")
+
+    def _run(self, word: str):
+        try:
+            if word not in self._wanted:
+                with self._lock:
+                    self.counters["skipped"] += 1
+                return
+            try:
+                self.fetch(word)
+            except Exception as e:
+                logger.debug(f"Prefetch of {word=} failed: {e!r}.")
+                with self._lock:
+                    self.counters["failed"] += 1
+                return
+            with self._lock:
+                self._prefetched.add(word)
+                self.counters["fetched"] += 1
+        finally:
+            with self._lock:
+                self._pending.pop(word, None)
+
+    def wait(self, word: str, timeout: Optional[float] = None) -> bool:
+        """Waits for a running prefetch of word, so the caller doesn't fetch it a second time. A prefetch of word that didn't start yet is dropped instead, so the caller doesn't wait behind other prefetches.
+
+        Args:
+            word (str): The word about to be fetched.
+            timeout (Optional[float], optional): Maximum seconds to wait. Defaults to None, meaning no limit.
+
+        Returns:
+            bool: True if word was being prefetched and the prefetch is over.
+        """
+        with self._lock:
+            future = self._pending.get(word)
+            if future is None:
+                return False
+            if future.cancel():
+                del self._pending[word]
+                self.counters["skipped"] += 1
+                return False
+        try:
+            future.result(timeout)
+        except TimeoutError:
+            return False
+        return True
+
+    def claim(self, word: str) -> bool:
+        """Records that word was served from what a prefetch stored. Each prefetch is counted once.
+
+        Args:
+            word (str): The word being served.
+
+        Returns:
+            bool: True if word had been prefetched.
+        """
+        with self._lock:
+            if word not in self._prefetched:
+                return False
+            self._prefetched.discard(word)
+            self.counters["used"] += 1
+        logger.info(f"Prefetched {word=} used. {self.stats}")
+        return True
+
+    @property
+    def stats(self) -> Dict[str, float]:
+        """The counters, plus the share of fetched words that were used under "hit_rate"."""
+        with self._lock:
+            stats = dict(self.counters)
+        stats["hit_rate"] = stats["used"] / stats["fetched"] if stats["fetched"] else 0.0
+        return stats
+
+
+class Revalidator:
+    """Refreshes stale copies of words in the background, so the next lookup of them is fresh (stale-while-revalidate).
+
+    Each word is refreshed at most once at a time, and at most workers words at once.
+    """
+
+    def __init__(self, fetch: Callable[[str], object], workers: int = 1):
+        """
+        Args:
+            fetch (Callable[[str], object]): Fetches and caches a word. Its result is ignored.
+            workers (int, optional): Maximum amount of fetches running at once. Defaults to 1.
+        """
+        self.fetch = fetch
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="revalidate")
+        self._lock = threading.Lock()
+        self._pending: Set[str] = set()
+        self.counters = {"submitted": 0, "refreshed": 0, "failed": 0}
+
+    def revalidate(self, word: str) -> bool:
+        """Schedules a refresh of word, unless one is already pending.
+
+        Args:
+            word (str): The word to refresh.
+
+        Returns:
+            bool: True if a refresh was scheduled.
+        """
+        with self._lock:
+            if word in self._pending:
+                return False
+            self._pending.add(word)
+            self.counters["submitted"] += 1
+        self._executor.submit(self._run, word)
+        logger.debug(f"Revalidation of {word=} scheduled.")
+        return True
+
+    def _run(self, word: str):
+        try:
+            self.fetch(word)
+        except Exception as e:
+            logger.debug(f"Revalidation of {word=} failed: {e!r}.")
+            outcome = "failed"
+        else:
+            outcome = "refreshed"
+        with self._lock:
+            self._pending.discard(word)
+            self.counters[outcome] += 1
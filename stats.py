@@ -0,0 +1,139 @@
+import json
+import logging
+import threading
+import time
+from collections import Counter, deque
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Deque, Dict, Iterable, Iterator, Optional, TypeVar
+
+from cache import CACHE_FOLDER
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+STATS_WINDOW = 1000  # Samples kept per stage.
+STATS_PATH = CACHE_FOLDER / "stats.json"
+
+
+class Histogram:
+    """Rolling window with the last samples of a stage, in milliseconds."""
+
+    def __init__(self, window: int = STATS_WINDOW):
+        self.samples: Deque[float] = deque(maxlen=window)
+        self.count = 0  # Samples ever recorded, including those already out of the window.
+
+    def add(self, milliseconds: float):
+        self.samples.append(milliseconds)
+        self.count += 1
+
+    def summary(self) -> Dict[str, float]:
+        """Nearest-rank p50, p95 and p99 and the maximum of the samples in the window, and the total amount of samples."""
+        ordered = sorted(self.samples)
+        summary = {"count": self.count}
+        for p in (50, 95, 99):
+            summary[f"p{p}"] = ordered[min(len(ordered) - 1, len(ordered) * p // 100)] if ordered else 0.0
+        summary["max"] = ordered[-1] if ordered else 0.0
+        return summary
+
+
+class Stopwatch:
+    """Accumulates the time spent in several with blocks or iterations, in seconds."""
+
+    def __init__(self):
+        self.elapsed = 0.0
+
+    def __enter__(self) -> "Stopwatch":
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.elapsed += time.perf_counter() - self._start
+
+    def iterate(self, iterable: Iterable[T]) -> Iterator[T]:
+        """Passes iterable through, adding the time spent waiting for each item.
+
+        Wrapping the chunks of a download tells apart the time spent waiting for the network from the time spent parsing.
+        """
+        iterator = iter(iterable)
+        while True:
+            with self:
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    return
+            yield item
+
+
+class Stats:
+    """Per-stage timings and counters of the extension, safe to update from the lookup and prefetch threads.
+
+    Timings go to a rolling Histogram per stage. Counters (cache hits and misses, online and offline queries...) only go up.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.histograms: Dict[str, Histogram] = {}
+        self.counters: Counter = Counter()
+        self.started_at = time.time()
+
+    def record(self, stage: str, seconds: float):
+        with self._lock:
+            if stage not in self.histograms:
+                self.histograms[stage] = Histogram()
+            self.histograms[stage].add(seconds * 1e3)
+
+    @contextmanager
+    def timer(self, stage: str) -> Iterator[None]:
+        """Records the time spent in the with block under stage, even if it raises."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(stage, time.perf_counter() - start)
+
+    def count(self, name: str, amount: int = 1):
+        with self._lock:
+            self.counters[name] += amount
+
+    def ratio(self, name: str, other: str) -> Optional[float]:
+        """Share of the name counter in name + other, e.g. the cache hit ratio. None if both are 0."""
+        with self._lock:
+            total = self.counters[name] + self.counters[other]
+            return self.counters[name] / total if total else None
+
+    def snapshot(self, extra: Optional[Dict] = None) -> Dict:
+        """Everything recorded so far, as plain data.
+
+        Args:
+            extra (Optional[Dict], optional): More data to include, e.g. the prefetcher stats. Defaults to None.
+
+        Returns:
+            Dict: The uptime in seconds, the summary of each stage under "stages", the counters under "counters" and the cache hit and offline ratios under "ratios".
+        """
+        ratios = {
+            "cache_hit": self.ratio("cache_hit", "cache_miss"),
+            "offline": self.ratio("offline", "online"),
+        }
+        with self._lock:
+            data = {
+                "uptime": time.time() - self.started_at,
+                "stages": {stage: h.summary() for stage, h in self.histograms.items()},
+                "counters": dict(self.counters),
+                "ratios": ratios,
+            }
+        data.update(extra or {})
+        return data
+
+    def dump(self, path: Path = STATS_PATH, extra: Optional[Dict] = None) -> Path:
+        """Writes snapshot(extra) to path as JSON.
+
+        Returns:
+            Path: path.
+        """
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with path.open("w") as f:
+            json.dump(self.snapshot(extra), f, indent=4, ensure_ascii=False)
+        logger.info(f"Stats dumped to {path}.")
+        return path
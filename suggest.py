@@ -0,0 +1,161 @@
+import bisect
+import logging
+from collections import defaultdict
+from typing import Dict, Iterable, List, Set
+
+from dle import fold
+
+logger = logging.getLogger(__name__)
+
+
+def deletes(word: str, max_distance: int) -> Set[str]:
+    """All strings obtained by deleting up to max_distance characters from word, word included.
+
+    Args:
+        word (str): The word.
+        max_distance (int): Maximum amount of deletions.
+
+    Returns:
+        Set[str]: The deletion variants.
+    """
+    variants = {word}
+    frontier = {word}
+    for _ in range(max_distance):
+        frontier = {w[:i] + w[i + 1 :] for w in frontier for i in range(len(w))}
+        variants |= frontier
+    return variants
+
+
+def edit_distance(a: str, b: str, max_distance: int) -> int:
+    """Optimal string alignment distance between a and b (Levenshtein plus adjacent transpositions).
+
+    The common prefix and suffix are skipped and only cells within max_distance of the diagonal are computed, so the cost is O(max_distance * len) instead of O(len(a) * len(b)).
+
+    Args:
+        a (str): First string.
+        b (str): Second string.
+        max_distance (int): Once the distance is known to exceed this, max_distance + 1 is returned early.
+
+    Returns:
+        int: The distance, capped at max_distance + 1.
+    """
+    too_far = max_distance + 1
+    if abs(len(a) - len(b)) > max_distance:
+        return too_far
+
+    start = 0
+    while start < len(a) and start < len(b) and a[start] == b[start]:
+        start += 1
+    end_a, end_b = len(a), len(b)
+    while end_a > start and end_b > start and a[end_a - 1] == b[end_b - 1]:
+        end_a -= 1
+        end_b -= 1
+    a, b = a[start:end_a], b[start:end_b]
+    if not a or not b:
+        return min(max(len(a), len(b)), too_far)
+
+    previous2: List[int] = []
+    previous = [j if j <= max_distance else too_far for j in range(len(b) + 1)]
+    for i in range(1, len(a) + 1):
+        current = [too_far] * (len(b) + 1)
+        if i <= max_distance:
+            current[0] = i
+        for j in range(max(1, i - max_distance), min(len(b), i + max_distance) + 1):
+            cost = a[i - 1] != b[j - 1]
+            value = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                value = min(value, previous2[j - 2] + 1)
+            current[j] = min(value, too_far)
+        if min(current) > max_distance:
+            return too_far
+        previous2, previous = previous, current
+    return previous[-1]
+
+
+class SuggestionIndex:
+    """In-memory index of headwords for offline suggestions, insensitive to accents and case.
+
+    Prefix matches come from a sorted array of folded headwords, searched with bisect. Misspellings are found SymSpell style: every headword prefix is indexed under all its variants with up to max_distance deletions, so candidates for a query are a handful of dict lookups away and only those are checked with edit_distance.
+    """
+
+    def __init__(self, words: Iterable[str], max_distance: int = 2, prefix_length: int = 7):
+        """
+        Args:
+            words (Iterable[str]): The headwords.
+            max_distance (int, optional): Maximum edit distance of fuzzy suggestions. Defaults to 2.
+            prefix_length (int, optional): Only this many leading characters are indexed for fuzzy matching, which bounds the index size. Defaults to 7.
+        """
+        self.max_distance = max_distance
+        self.prefix_length = prefix_length
+
+        self._originals: Dict[str, List[str]] = defaultdict(list)
+        for word in words:
+            self._originals[fold(word)].append(word)
+        self._sorted = sorted(self._originals)
+
+        self._deletes: Dict[str, List[str]] = defaultdict(list)
+        for folded in self._sorted:
+            for variant in deletes(folded[:prefix_length], max_distance):
+                self._deletes[variant].append(folded)
+        logger.debug(f"Suggestion index with {len(self._sorted)} words and {len(self._deletes)} deletion variants.")
+
+    def __len__(self) -> int:
+        return len(self._sorted)
+
+    def prefix(self, query: str, limit: int) -> List[str]:
+        """Folded headwords that start with the folded query, alphabetically.
+
+        Args:
+            query (str): The query.
+            limit (int): Maximum amount of results.
+
+        Returns:
+            List[str]: The folded headwords.
+        """
+        folded = fold(query)
+        start = bisect.bisect_left(self._sorted, folded)
+        matches = []
+        for candidate in self._sorted[start : start + limit]:
+            if not candidate.startswith(folded):
+                break
+            matches.append(candidate)
+        return matches
+
+    def fuzzy(self, query: str, limit: int) -> List[str]:
+        """Folded headwords within max_distance edits of the folded query (fewer for short queries), closest first.
+
+        Args:
+            query (str): The query.
+            limit (int): Maximum amount of results.
+
+        Returns:
+            List[str]: The folded headwords.
+        """
+        folded = fold(query)
+        # Short words are a couple of edits away from lots of unrelated words, so allow 1 edit per 3 characters.
+        max_distance = min(self.max_distance, len(folded) // 3)
+        candidates = set()
+        for variant in deletes(folded[: self.prefix_length], max_distance):
+            candidates.update(self._deletes.get(variant, ()))
+
+        scored = []
+        for candidate in candidates:
+            distance = edit_distance(folded, candidate, max_distance)
+            if distance <= max_distance:
+                scored.append((distance, candidate))
+        return [candidate for _, candidate in sorted(scored)[:limit]]
+
+    def suggest(self, query: str, limit: int) -> List[str]:
+        """Headwords that the query is probably meant to be: prefix matches first (the user may still be typing), then misspellings.
+
+        Args:
+            query (str): The query.
+            limit (int): Maximum amount of suggestions.
+
+        Returns:
+            List[str]: Headwords, with their original accents and case. Empty if nothing is close.
+        """
+        folded = self.prefix(query, limit)
+        if len(folded) < limit:
+            folded = list(dict.fromkeys(folded + self.fuzzy(query, limit)))
+        return [word for key in folded for word in self._originals[key]][:limit]
@@ -0,0 +1,43 @@
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+FIXTURES = Path(__file__).resolve().parent / "fixtures"
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT / "benchmarks"))
+
+from fixture_server import FixtureServer  # noqa: E402
+
+
+class Clock:
+    """Replaces time.time, so expiry can be tested without waiting."""
+
+    def __init__(self, now: float):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+    def advance(self, seconds: float):
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch) -> Clock:
+    clock = Clock(time.time())
+    monkeypatch.setattr(time, "time", clock)
+    return clock
+
+
+@pytest.fixture
+def fixture_server():
+    """FixtureServer serving the pages in tests/fixtures."""
+    with FixtureServer(FIXTURES) as server:
+        yield server
+
+
+def read_fixture(name: str) -> str:
+    return (FIXTURES / f"{name}.html").read_text()
@@ -0,0 +1,59 @@
+import pytest
+
+import batch
+from cache import DefinitionCache
+from conftest import read_fixture
+from dle import Case, parse_page
+from fixture_server import FixtureServer
+from offline_store import OFFLINE_SOURCE, OfflineStore
+from top_words.corpus_builder import TokenBucket
+
+
+@pytest.fixture(scope="module")
+def store(tmp_path_factory) -> OfflineStore:
+    return OfflineStore(OFFLINE_SOURCE, tmp_path_factory.mktemp("store") / "store.sqlite3")
+
+
+def test_define(store, tmp_path, fixture_server):
+    cache = DefinitionCache(tmp_path / "cache.sqlite3", ttl=60, max_entries=10)
+    words = ["Árbol", "casae", "qzxwvjk"]
+    bucket = TokenBucket(1000, 1000)
+    records = {record["word"]: record for record in batch.define(words, store, cache, 2, bucket, fixture_server.url, backoff=0)}
+    assert records["Árbol"]["source"] == "offline"
+    assert records["casae"]["result"]["case"] == Case.APPROX_MATCH.name
+    # The DLE answers words it doesn't have with 404 and a no match page. That is a result, not an error.
+    assert records["qzxwvjk"] == {"word": "qzxwvjk", "source": "online", "result": {"case": Case.NO_MATCH.name}}
+    assert cache.is_miss("qzxwvjk")
+    assert fixture_server.requests == 2
+
+    records = {record["word"]: record for record in batch.define(words, store, cache, 2, bucket, fixture_server.url, backoff=0)}
+    assert records["casae"]["source"] == records["qzxwvjk"]["source"] == "cache"
+    assert fixture_server.requests == 2
+
+
+def test_main_exits_0_for_words_without_match(tmp_path, fixture_server, capsys):
+    words = tmp_path / "words.txt"
+    words.write_text("qzxwvjk\nasdfgh\n")
+    assert batch.main([str(words), "--base-url", fixture_server.url, "--no-cache", "--backoff", "0"]) == 0
+    assert '"error"' not in capsys.readouterr().out
+
+
+def test_nouns_are_not_defined_as_verbs(store, tmp_path, fixture_server):
+    cache = DefinitionCache(tmp_path / "cache.sqlite3", ttl=60, max_entries=10)
+    bucket = TokenBucket(1000, 1000)
+    records = list(batch.define(["sala", "jugo"], store, cache, 2, bucket, fixture_server.url, backoff=0))
+    assert [record["source"] for record in records] == ["online", "online"]
+
+
+def test_truncated_cached_pages_are_fetched_again(store, tmp_path):
+    cache = DefinitionCache(tmp_path / "cache.sqlite3", ttl=60, max_entries=10)
+    truncated = parse_page(read_fixture("casa"), max_definitions=3)
+    assert truncated["truncated"]
+    cache.set("xqzpalabra", truncated)  # As the extension stores it with max_shown_definitions 3.
+
+    (tmp_path / "xqzpalabra.html").write_text(read_fixture("casa"))
+    with FixtureServer(tmp_path) as server:
+        [record] = batch.define(["xqzpalabra"], store, cache, 2, TokenBucket(1000, 1000), server.url, backoff=0)
+    assert record["source"] == "online"
+    assert len(record["result"]["definitions"]) == 9 and "truncated" not in record["result"]
+    assert "truncated" not in cache.get("xqzpalabra")
@@ -0,0 +1,125 @@
+import pytest
+
+from cache import ACCESS_RESOLUTION, DefinitionCache
+from conftest import read_fixture
+from dle import Case, parse_page
+from top_words.corpus_builder import TokenBucket, fetch_all
+
+
+@pytest.fixture
+def cache(tmp_path) -> DefinitionCache:
+    return DefinitionCache(tmp_path / "cache.sqlite3", ttl=60, max_entries=3)
+
+
+@pytest.mark.parametrize(
+    "fixture, case",
+    [
+        ("casa", Case.EXACT_REQ_MATCH),
+        ("casae", Case.APPROX_MATCH),
+        ("_no_match", Case.NO_MATCH),
+    ],
+)
+def test_parsed_pages_round_trip(cache, fixture, case):
+    result = parse_page(read_fixture(fixture))
+    assert result["case"] == case.name
+    cache.set(fixture, result)
+    assert cache.get(fixture) == result
+
+
+def test_exact_page_keeps_k_and_m_headwords():
+    definitions = parse_page(read_fixture("casa"))["definitions"]
+    assert [d["word"] for d in definitions] == ["casa"] * 6 + ["casa de baños"] + ["casa de citas"] * 2
+    assert definitions[1] == {
+        "word": "casa",
+        "abbrs": "f. Arq.",
+        "definition": "Edificio de uno o pocos pisos, destinado a vivienda unifamiliar, en oposición a piso.",
+        "html_code": "7nLZ4kF",
+    }
+    assert definitions[-1]["abbrs"] == "f. desus."
+
+
+def test_approx_page_suggestions():
+    suggestions = parse_page(read_fixture("casae"))["suggestions"]
+    assert suggestions[2] == {"word": "case", "infinitive": "(casar)"}
+    assert [s["word"] for s in suggestions] == ["casa", "casa", "case", "cáseo"]
+
+
+def test_keys_are_normalized(cache):
+    cache.set("  Casa ", parse_page(read_fixture("casa")))
+    assert cache.get("CASA") is not None
+    assert cache.get("casá") is None
+
+
+def test_ttl_expiry(cache, clock):
+    cache.set("casa", parse_page(read_fixture("casa")))
+    clock.advance(59)
+    assert cache.get("casa") is not None
+    clock.advance(2)
+    assert cache.get("casa") is None
+    # Expired entries are kept for conditional requests.
+    entry = cache.get_entry("casa")
+    assert entry is not None and cache.expired(entry)
+    cache.touch("casa")
+    assert cache.get("casa") is not None
+
+
+def test_lru_eviction_at_max_entries(cache, clock):
+    result = parse_page(read_fixture("casae"))
+    for word in ["uno", "dos", "tres"]:
+        cache.set(word, result)
+        clock.advance(ACCESS_RESOLUTION + 1)
+    assert cache.get_entry("uno") is not None  # Now the most recently used, even if expired.
+    clock.advance(ACCESS_RESOLUTION + 1)
+    cache.set("cuatro", result)
+    assert len(cache) == 3
+    assert cache.get_entry("dos") is None
+    assert all(cache.get_entry(word) is not None for word in ["uno", "tres", "cuatro"])
+
+
+def test_misses_expire_and_are_cleared_by_set(cache, clock):
+    cache.add_miss("qzxwvjk")
+    assert cache.is_miss("QZXWVJK")
+    clock.advance(cache.negative_ttl + 1)
+    assert not cache.is_miss("qzxwvjk")
+    cache.add_miss("casa")
+    cache.set("casa", parse_page(read_fixture("casa")))
+    assert not cache.is_miss("casa")
+
+
+def test_cache_is_shared_between_instances(cache, tmp_path):
+    cache.set("casa", parse_page(read_fixture("casa")))
+    other = DefinitionCache(tmp_path / "cache.sqlite3", ttl=60, max_entries=3)
+    assert other.get("casa") == cache.get("casa")
+
+
+def test_corpus_builder_refetches_truncated_entries(cache, fixture_server):
+    cache.set("casa", parse_page(read_fixture("casa"), max_definitions=3))
+    cache.set("casae", parse_page(read_fixture("casae")))
+    bucket = TokenBucket(1000, 1000)
+    results = dict(fetch_all(["casa", "casae"], 2, bucket, fixture_server.url, cache=cache))
+    assert fixture_server.requests == 1
+    assert len(results["casa"]["definitions"]) == 9
+    assert "truncated" not in cache.get("casa")
+
+
+def test_extension_refetches_truncated_entries(tmp_path, fixture_server, monkeypatch):
+    pytest.importorskip("ulauncher")
+    import main
+
+    monkeypatch.setattr(main, "BASE_URL", fixture_server.url)
+    extension = main.RAE()
+    extension.preferences.update(main.DEFAULT_PREFERENCES)
+    extension.preferences["max_shown_definitions"] = "3"
+    extension.cache = DefinitionCache(tmp_path / "cache.sqlite3", ttl=60, max_entries=10)
+
+    extension.handle_online("casa", offline_suggestions=False)
+    assert extension.cache.get("casa")["truncated"]
+    assert len(extension.cache.get("casa")["definitions"]) == 3
+    extension.handle_online("casa", offline_suggestions=False)
+    assert fixture_server.requests == 1
+
+    extension.preferences["max_shown_definitions"] = "20"
+    items = extension.handle_online("casa", offline_suggestions=False)
+    assert fixture_server.requests == 2
+    assert len(items) == 9
+    assert "truncated" not in extension.cache.get("casa")
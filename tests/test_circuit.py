@@ -0,0 +1,74 @@
+from circuit import CircuitBreaker
+from conftest import Clock
+
+
+def make_breaker():
+    clock = Clock(1000)
+    return CircuitBreaker(failures=3, cooldown=30, clock=clock), clock
+
+
+def test_opens_after_consecutive_failures():
+    breaker, clock = make_breaker()
+    for _ in range(2):
+        assert breaker.allow()
+        breaker.record_failure()
+    assert not breaker.is_open
+    breaker.record_failure()
+    assert breaker.is_open
+    assert not breaker.allow()
+    assert breaker.retry_in == 30
+    clock.advance(10)
+    assert not breaker.allow()
+    assert breaker.retry_in == 20
+
+
+def test_success_resets_the_failure_count():
+    breaker, _ = make_breaker()
+    breaker.record_failure()
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    breaker.record_failure()
+    assert not breaker.is_open
+    assert breaker.retry_in == 0
+
+
+def test_half_open_allows_a_single_trial():
+    breaker, clock = make_breaker()
+    for _ in range(3):
+        breaker.record_failure()
+    clock.advance(30)
+    assert breaker.allow()
+    assert not breaker.allow()  # Only one trial per cooldown.
+
+    breaker.record_success()
+    assert not breaker.is_open
+    assert breaker.allow() and breaker.allow()
+
+
+def test_failed_trial_keeps_it_open_for_another_cooldown():
+    breaker, clock = make_breaker()
+    for _ in range(3):
+        breaker.record_failure()
+    clock.advance(30)
+    assert breaker.allow()
+    clock.advance(5)
+    breaker.record_failure()
+    assert breaker.is_open
+    assert breaker.retry_in == 30
+    clock.advance(29)
+    assert not breaker.allow()
+    clock.advance(1)
+    assert breaker.allow()
+
+
+def test_abandoned_trial_allows_another_after_the_cooldown():
+    breaker, clock = make_breaker()
+    for _ in range(3):
+        breaker.record_failure()
+    clock.advance(30)
+    assert breaker.allow()  # The trial never reports back, e.g. it was cancelled.
+    clock.advance(29)
+    assert not breaker.allow()
+    clock.advance(1)
+    assert breaker.allow()
@@ -0,0 +1,67 @@
+import json
+
+import pytest
+
+import compact
+from compact import CompactDataset, normalize_dataset, write_compact
+from offline_store import OFFLINE_SOURCE, OfflineStore
+from top_words.corpus_builder import compile_dataset, entries_hash, read_dataset
+
+ENTRIES = [
+    {"word": "casa", "abbrs": "f.", "definition": "Edificio para habitar.", "html_code": "7nKIsUA"},
+    {"word": "casa de baños", "abbrs": "f.", "definition": "Establecimiento de baños.", "html_code": "7nS1Exm"},
+]
+
+
+@pytest.fixture
+def builder_dataset(tmp_path):
+    """A one word dataset as written by the corpus builder: every definition has its "word", and it has "meta" and an empty "forms"."""
+    output = tmp_path / "dataset.json"
+    records = {"casa": {"word": "casa", "entries": ENTRIES, "fetched_at": 1700000000.5, "hash": entries_hash(ENTRIES)}}
+    compile_dataset(records, output)
+    return output
+
+
+@pytest.mark.parametrize("compress", [True, False])
+def test_builder_dataset_round_trips(builder_dataset, tmp_path, compress):
+    data = json.loads(builder_dataset.read_text())
+    assert data["forms"] == {} and data["words"]["casa"][0]["word"] == "casa"
+    write_compact(data, tmp_path / "dataset.rdle", compress=compress)
+    loaded = CompactDataset(tmp_path / "dataset.rdle")
+    assert loaded.to_dict() == normalize_dataset(data)
+    assert loaded.meta() == {"casa": {"last_checked": 1700000000.5, "hash": entries_hash(ENTRIES)}}
+    assert [definition.word for definition in loaded["casa"]] == ["casa", "casa de baños"]
+
+
+def test_converter_accepts_builder_datasets(builder_dataset, tmp_path):
+    compact.main([str(builder_dataset), str(tmp_path / "dataset.rdle")])
+    # The per word metadata the refresh mode needs survives the conversion.
+    (tmp_path / "back.json").write_text(json.dumps(CompactDataset(tmp_path / "dataset.rdle").to_dict()))
+    assert read_dataset(tmp_path / "back.json")["casa"]["fetched_at"] == 1700000000.5
+    assert read_dataset(tmp_path / "back.json")["casa"]["hash"] == entries_hash(ENTRIES)
+
+
+def test_shipped_dataset_round_trips(tmp_path):
+    compact.main([str(OFFLINE_SOURCE), str(tmp_path / "dataset.rdle")])
+
+
+def test_normalize_dataset():
+    data = {
+        "last_checked": 1,
+        "words": {"casa": ENTRIES},
+        "forms": {},
+        "meta": {},
+    }
+    assert normalize_dataset(data) == {
+        "last_checked": 1,
+        "words": {"casa": [{k: v for k, v in ENTRIES[0].items() if k != "word"}, ENTRIES[1]]},
+    }
+    assert normalize_dataset(normalize_dataset(data)) == normalize_dataset(data)
+
+
+def test_store_from_compact_dataset(tmp_path):
+    write_compact(json.loads(OFFLINE_SOURCE.read_text()), tmp_path / "dataset.rdle")
+    from_json = OfflineStore(OFFLINE_SOURCE, tmp_path / "json.sqlite3")
+    from_compact = OfflineStore(tmp_path / "dataset.rdle", tmp_path / "compact.sqlite3")
+    assert sorted(from_compact.headwords()) == sorted(from_json.headwords())
+    assert from_compact.get("árbol") == from_json.get("árbol")
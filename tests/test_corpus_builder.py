@@ -0,0 +1,85 @@
+import json
+import random
+
+import pytest
+
+from conftest import read_fixture
+from dle import make_session
+from fixture_server import FixtureServer
+from top_words import corpus_builder
+
+
+def build(tmp_path, server, *words: str) -> int:
+    words_file = tmp_path / "words.txt"
+    words_file.write_text("\n".join(words))
+    return corpus_builder.main(
+        [
+            "--checkpoint", str(tmp_path / "checkpoint.jsonl"),
+            "--output", str(tmp_path / "dataset.json"),
+            "--base-url", server.url,
+            "--rate", "1000",
+            "--backoff", "0",
+            "--no-cache",
+            "build",
+            "--words", str(words_file),
+        ]
+    )
+
+
+def test_build_leaves_words_without_definitions_out(tmp_path, fixture_server):
+    assert build(tmp_path, fixture_server, "casa", "casae", "qzx") == 0
+    data = json.loads((tmp_path / "dataset.json").read_text())
+    assert list(data["words"]) == ["casa"]
+    assert list(data["meta"]) == ["casa"]
+    assert len(data["words"]["casa"]) == 9
+
+    checkpointed = corpus_builder.read_checkpoint(tmp_path / "checkpoint.jsonl")
+    assert set(checkpointed) == {"casa", "casae", "qzx"}
+    assert build(tmp_path, fixture_server, "casa", "casae", "qzx") == 0
+    assert fixture_server.requests == 3
+
+
+def test_old_datasets_lose_words_without_definitions(tmp_path, fixture_server):
+    (tmp_path / "dataset.json").write_text(
+        json.dumps({"last_checked": 1, "words": {"niña": [], "sabe": []}})
+    )
+    assert build(tmp_path, fixture_server, "casa") == 0
+    data = json.loads((tmp_path / "dataset.json").read_text())
+    assert list(data["words"]) == ["casa"]
+
+
+def test_fetch_word_parses_404_pages(fixture_server):
+    session = make_session()
+    bucket = corpus_builder.TokenBucket(1000, 1000)
+    assert corpus_builder.fetch_word(session, "qzxwvjk", bucket, fixture_server.url) == {"case": "NO_MATCH"}
+    assert corpus_builder.fetch_word(session, "casae", bucket, fixture_server.url)["case"] == "APPROX_MATCH"
+
+
+def test_fetch_word_retries_server_errors(fixture_server):
+    fixture_server.error_rate = 1
+    bucket = corpus_builder.TokenBucket(1000, 1000)
+    with pytest.raises(corpus_builder.FetchError):
+        corpus_builder.fetch_word(make_session(), "casa", bucket, fixture_server.url, retries=2, backoff=0)
+    assert fixture_server.requests == 3
+
+
+def test_fetch_word_retries_until_the_dle_answers(fixture_server):
+    random.seed(9)  # Shared by the server's injected errors and the backoff jitter, so the attempts are always the same.
+    fixture_server.error_rate = 0.5
+    bucket = corpus_builder.TokenBucket(1000, 1000)
+    result = corpus_builder.fetch_word(make_session(), "casa", bucket, fixture_server.url, retries=10, backoff=0)
+    assert len(result["definitions"]) == 9
+    assert fixture_server.requests == 2
+
+
+def test_pages_the_parser_fails_on_are_skipped(tmp_path):
+    fixtures = tmp_path / "fixtures"
+    fixtures.mkdir()
+    (fixtures / "casa.html").write_text(read_fixture("casa"))
+    # Suggestions without any suggestion: dle.parse_page raises RuntimeError.
+    (fixtures / "rara.html").write_text('<html><body><div class="item-list"><p>x</p></div></body></html>')
+    with FixtureServer(fixtures) as server:
+        assert build(tmp_path, server, "rara", "casa") == 1
+        assert server.requests == 2  # Not retried.
+    assert set(corpus_builder.read_checkpoint(tmp_path / "checkpoint.jsonl")) == {"casa"}
+    assert list(json.loads((tmp_path / "dataset.json").read_text())["words"]) == ["casa"]
@@ -0,0 +1,44 @@
+from pathlib import Path
+
+import pytest
+
+from conftest import FIXTURES, ROOT
+from dle import is_plausible_query, parse_chunks, parse_page
+from parse_dle import legacy_parse_page
+
+PAGES = sorted(FIXTURES.glob("*.html")) + sorted((ROOT / "benchmarks" / "fixtures").glob("*.html"))
+
+
+@pytest.mark.parametrize("page", PAGES, ids=lambda page: f"{page.parent.name}/{page.name}")
+def test_same_result_as_legacy_parser(page: Path):
+    html = page.read_text()
+    expected = legacy_parse_page(html)
+    assert parse_page(html) == expected
+    # Chunks may split tags, character references and text anywhere.
+    assert parse_chunks(html[i : i + 7] for i in range(0, len(html), 7)) == expected
+
+
+@pytest.mark.parametrize("page", PAGES, ids=lambda page: f"{page.parent.name}/{page.name}")
+def test_max_definitions(page: Path):
+    html = page.read_text()
+    expected = legacy_parse_page(html, max_definitions=3)
+    result = parse_page(html, max_definitions=3)
+    assert result.get("definitions") == expected.get("definitions")
+    # A page with exactly 3 definitions may be marked as truncated too, as the rest of the page wasn't read.
+    if len(legacy_parse_page(html).get("definitions", [])) > 3:
+        assert result["truncated"]
+
+
+def test_fixture_corpus_covers_every_case():
+    cases = {legacy_parse_page(page.read_text())["case"] for page in PAGES}
+    assert cases == {"EXACT_REQ_MATCH", "APPROX_MATCH", "NO_MATCH"}
+
+
+@pytest.mark.parametrize("query", ["casa", "Árbol", "ñu", "a fin de", "ex-ministro", "o'clock", "  cigüeña "])
+def test_plausible_queries(query):
+    assert is_plausible_query(query)
+
+
+@pytest.mark.parametrize("query", ["", "a", " b ", "casa2", "@rbol", "casa?", "3", "árbol_"])
+def test_implausible_queries(query):
+    assert not is_plausible_query(query)
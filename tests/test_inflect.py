@@ -0,0 +1,40 @@
+import pytest
+
+from inflect import conjugations, inflections, is_irregular, plurals
+
+
+@pytest.mark.parametrize("verb", ["salir", "venir", "poder", "morir", "jugar", "obtener", "conocer", "construir"])
+def test_irregular_verbs_get_no_forms(verb):
+    assert is_irregular(verb)
+    assert conjugations(verb) == []
+
+
+def test_regular_verbs():
+    assert not is_irregular("hablar") and not is_irregular("distinguir")
+    forms = conjugations("hablar")
+    assert {"hablamos", "habláis", "hablan", "hablaron", "hablábamos", "hablarían"} <= set(forms)
+    assert "distinguen" in conjugations("distinguir")
+    assert "busquemos" in conjugations("buscar")
+
+
+@pytest.mark.parametrize(
+    "verb, form",
+    [
+        ("casar", "casa"),  # The noun.
+        ("casar", "caso"),
+        ("casar", "casó"),  # Lookups ignore accents, so it would take "caso".
+        ("comer", "comas"),  # Plural of coma.
+        ("comer", "comida"),
+        ("pesar", "pesas"),
+        ("llegar", "llegada"),
+        ("cantar", "cantad"),
+    ],
+)
+def test_forms_that_could_be_entries_are_left_out(verb, form):
+    assert form not in conjugations(verb)
+
+
+def test_inflections():
+    assert inflections("casa", ["f."]) == {"casas"}
+    assert "hablan" in inflections("hablar", ["intr.", "tr."])
+    assert inflections("hablar", ["m."]) == set(plurals("hablar"))
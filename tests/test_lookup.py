@@ -0,0 +1,69 @@
+import threading
+
+import pytest
+
+from lookup import LookupCancelled, LookupScheduler, cancellable
+
+
+def test_only_the_latest_lookup_is_answered():
+    scheduler = LookupScheduler(workers=2)
+    started, release, done = threading.Event(), threading.Event(), threading.Event()
+    answered = []
+
+    def slow(obsolete):
+        started.set()
+        release.wait(5)
+        return "slow"
+
+    def fast(obsolete):
+        return "fast"
+
+    scheduler.submit(slow, answered.append)
+    assert started.wait(5)
+    scheduler.submit(fast, lambda result: (answered.append(result), done.set()))
+    assert done.wait(5)
+    release.set()
+    scheduler._executor.shutdown(wait=True)
+    assert answered == ["fast"]  # The slow one finished, but it was obsolete by then.
+
+
+def test_obsolete_lookups_that_did_not_start_are_skipped():
+    scheduler = LookupScheduler(workers=1)
+    release = threading.Event()
+    ran = []
+    scheduler.submit(lambda obsolete: release.wait(5), lambda result: None)
+    scheduler.submit(lambda obsolete: ran.append("second"), lambda result: None)
+    scheduler.cancel()
+    release.set()
+    scheduler._executor.shutdown(wait=True)
+    assert ran == []
+
+
+def test_running_lookups_stop_once_obsolete():
+    scheduler = LookupScheduler(workers=1)
+    cancelled = threading.Event()
+    answered = []
+
+    def lookup(obsolete):
+        try:
+            for _ in cancellable(iter(lambda: "chunk", None), obsolete):
+                pass
+        except LookupCancelled:
+            cancelled.set()
+            raise
+
+    scheduler.submit(lookup, answered.append)
+    scheduler.cancel()
+    assert cancelled.wait(5)
+    scheduler._executor.shutdown(wait=True)
+    assert answered == []
+
+
+def test_cancellable():
+    obsolete = False
+    chunks = cancellable(["a", "b", "c"], lambda: obsolete)
+    assert next(chunks) == "a"
+    obsolete = True
+    with pytest.raises(LookupCancelled):
+        next(chunks)
+    assert list(cancellable(["a", "b"], lambda: False)) == ["a", "b"]
@@ -0,0 +1,182 @@
+import shutil
+import threading
+import time
+
+import pytest
+
+pytest.importorskip("ulauncher")
+
+import main  # noqa: E402
+from cache import DefinitionCache  # noqa: E402
+from circuit import CircuitBreaker  # noqa: E402
+from conftest import FIXTURES, Clock  # noqa: E402
+from fixture_server import FixtureServer  # noqa: E402
+from ulauncher.api.shared.event import ItemEnterEvent  # noqa: E402
+
+
+class CustomAction:
+    """Stands in for ExtensionCustomAction, keeping the data the ItemEnterEvent would carry."""
+
+    def __init__(self, data, keep_app_open=False):
+        self.data = data
+
+
+class Client:
+    """Stands in for the connection to Ulauncher, keeping the responses sent asynchronously."""
+
+    def __init__(self):
+        self.sent = threading.Event()
+        self.responses = []
+
+    def send(self, response):
+        self.responses.append(response)
+        self.sent.set()
+
+    def wait(self):
+        assert self.sent.wait(5), "No response was sent."
+        return self.responses[-1].action
+
+
+@pytest.fixture
+def server(tmp_path):
+    """FixtureServer with the pages in tests/fixtures, plus a copy of casa.html as the page of "case"."""
+    fixtures = tmp_path / "fixtures"
+    shutil.copytree(FIXTURES, fixtures)
+    shutil.copy(fixtures / "casa.html", fixtures / "case.html")
+    with FixtureServer(fixtures) as server:
+        yield server
+
+
+@pytest.fixture
+def extension(tmp_path, server, monkeypatch) -> main.RAE:
+    monkeypatch.setattr(main, "BASE_URL", server.url)
+    extension = main.RAE()
+    extension.preferences.update(main.DEFAULT_PREFERENCES)
+    extension.preferences["max_shown_definitions"] = "20"
+    extension.cache = DefinitionCache(tmp_path / "cache.sqlite3", ttl=60, max_entries=10)
+    extension._client = Client()
+    monkeypatch.setattr(main, "ExtensionCustomAction", CustomAction)
+    return extension
+
+
+def pick(extension: main.RAE, item) -> list:
+    """Press ENTER on an item with an ExtensionCustomAction, returning the items shown in the end."""
+    assert isinstance(item.on_enter, CustomAction)
+    action = main.ItemEnterEventListener().on_event(ItemEnterEvent(item.on_enter.data), extension)
+    if action.args and action.args[0] and action.args[0][0].name.startswith("Buscando"):
+        action = extension._client.wait()
+    return action.args[0]
+
+
+@pytest.mark.parametrize("prefetch", ["0", "3"])
+def test_dle_suggestions_are_looked_up_exactly(extension, server, prefetch):
+    extension.preferences["prefetch_suggestions"] = prefetch
+    items = extension.handle_online("casae", offline_suggestions=False)
+    assert [item.name for item in items] == ["casa ꞏ (casa)", "case ꞏ (casar)", "cáseo ꞏ (cáseo, a)"]
+
+    # "case" isn't in the offline data and, with prefetch 0, not in the cache either. Offline suggestions for it must not replace its definitions.
+    definitions = pick(extension, items[1])
+    assert len(definitions) == 9
+    assert all(item.description != "Sugerencia offline" for item in definitions)
+    assert extension.cache.get("case")["case"] == "EXACT_REQ_MATCH"
+
+    # "casa" is an offline headword, so it is served from the offline data.
+    extension.prefetcher._executor.shutdown(wait=True)
+    requests = server.requests
+    definitions = pick(extension, items[0])
+    assert definitions and all("casa" in item.name for item in definitions)
+    assert server.requests == requests
+
+
+def test_expired_words_are_revalidated_instead_of_suggested(extension, server, clock):
+    assert extension.preferences["mode"] == main.MODE_ONLINE
+    assert extension.suggestion_index.suggest("case", 5)  # Offline suggestions would replace the lookup of an uncached "case".
+    assert len(extension.handle_online("case", offline_suggestions=False)) == 9
+
+    clock.advance(61)
+    items = extension.handle_online("case")
+    assert len(items) == 9
+    assert server.requests == 2
+    assert extension.stats.counters["not_modified"] == 1
+    assert not extension.cache.expired(extension.cache.get_entry("case"))
+
+
+def test_connections_are_reused_after_the_early_stop(extension, server):
+    # Long enough that the first chunks have all the definitions shown, like the pages of the DLE.
+    page = (FIXTURES / "casa.html").read_text()
+    footer = page.rindex("</body>")
+    (server.fixtures / "casa.html").write_text(page[:footer] + "<p>pie de página</p>" * 20000 + page[footer:])
+    extension.preferences["max_shown_definitions"] = "3"
+
+    for _ in range(6):
+        extension.cache.clear()
+        result = extension.fetch_online("casa", 3)
+        assert result["truncated"] and len(result["definitions"]) == 3
+    assert server.requests == 6
+    assert server.connections == 1
+
+
+@pytest.fixture
+def breaker_clock(extension) -> Clock:
+    """Replaces the circuit breaker of extension with one on a fake clock."""
+    clock = Clock(1000)
+    extension.breaker = CircuitBreaker(main.BREAKER_FAILURES, main.BREAKER_COOLDOWN, clock)
+    return clock
+
+
+def test_breaker_opens_when_the_dle_keeps_failing(extension, server, breaker_clock):
+    extension.preferences["prefetch_suggestions"] = "0"  # Only the requests of the lookups themselves are counted.
+    server.error_rate = 1.0
+    for word in ["casae", "case", "cáseo"]:
+        [item] = extension.handle_online(word, offline_suggestions=False)
+        assert item.name == "Sin conexión con el DLE"
+    assert extension.breaker.is_open
+    assert server.requests == 3
+
+    # Refused without a request until the cooldown is over.
+    [item] = extension.handle_online("casae", offline_suggestions=False)
+    assert "Se reintentará en 30 s" in item.description
+    assert server.requests == 3
+    assert extension.stats.counters["breaker_open"] == 1
+
+    # Then a single trial goes through, and closes the circuit once the DLE is back.
+    server.error_rate = 0
+    breaker_clock.advance(main.BREAKER_COOLDOWN)
+    items = extension.handle_online("casae", offline_suggestions=False)
+    assert server.requests == 4
+    assert not extension.breaker.is_open
+    assert items[0].description == "Sugerencia RAE"
+
+
+def test_stale_copies_are_served_while_the_breaker_is_open(extension, server, breaker_clock, clock):
+    assert len(extension.handle_online("case", offline_suggestions=False)) == 9
+    clock.advance(61)
+    server.error_rate = 1.0
+    for _ in range(main.BREAKER_FAILURES):
+        extension.breaker.record_failure()
+
+    items = extension.handle_online("case", offline_suggestions=False)
+    assert len(items) == 9
+    assert extension.stats.counters["stale_hit"] == 1
+    assert server.requests == 1
+    # The background refresh is refused by the breaker as well.
+    deadline = time.monotonic() + 5
+    while extension.revalidator.counters["failed"] < 1 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert extension.revalidator.counters == {"submitted": 1, "refreshed": 0, "failed": 1}
+    assert server.requests == 1
+
+
+def test_timeouts_fall_back_to_the_stale_copy(extension, server, breaker_clock, clock):
+    assert len(extension.handle_online("case", offline_suggestions=False)) == 9
+    clock.advance(61)
+    server.latency = 0.5
+    extension.preferences["read_timeout"] = "0.1"
+
+    items = extension.handle_online("case", offline_suggestions=False)
+    assert items[0].name == "Buscar «case» en el DLE"
+    assert len(items) == 1 + 9
+    [item] = extension.handle_online("casae", offline_suggestions=False)
+    assert item.name == "Sin conexión con el DLE"
+    assert extension.stats.counters["online_error"] == 2
+    assert extension.breaker._consecutive_failures == 2
@@ -0,0 +1,83 @@
+import json
+
+import pytest
+
+from offline_store import OFFLINE_SOURCE, OfflineStore, search_terms
+
+# Stored in the shipped dataset without definitions, as the DLE only had suggestions for them when it was built.
+WITHOUT_DEFINITIONS = ["niña", "señora", "tía"]
+
+
+@pytest.fixture(scope="module")
+def store(tmp_path_factory) -> OfflineStore:
+    return OfflineStore(OFFLINE_SOURCE, tmp_path_factory.mktemp("store") / "store.sqlite3")
+
+
+def test_variants_resolve_to_stored_words(store):
+    assert store.resolve("Árbol") == "árbol"
+    assert store.resolve("ARBOL") == "árbol"
+    assert store.resolve(" Casa ") == "casa"
+    assert store.resolve("casas") == "casa"
+    assert store.resolve("ano") is None  # "año" is another word.
+
+
+@pytest.mark.parametrize("word", WITHOUT_DEFINITIONS)
+def test_words_without_definitions_are_not_stored(store, word):
+    with OFFLINE_SOURCE.open("r") as f:
+        assert json.load(f)["words"][word] == []
+    assert word not in store
+    assert word not in store.headwords()
+    for query in [word, word.capitalize(), word.upper(), word.replace("í", "i"), word + "s"]:
+        assert store.resolve(query) is None, query
+
+
+def test_empty_words_do_not_make_keys_ambiguous(tmp_path):
+    source = tmp_path / "dataset.json"
+    entry = {"word": "tío, a", "abbrs": "m. y f.", "definition": "Hermano del padre.", "html_code": "a1"}
+    source.write_text(json.dumps({"last_checked": 1, "words": {"tío": [entry], "tio": []}}))
+    store = OfflineStore(source, tmp_path / "store.sqlite3")
+    assert store.resolve("TIO") == "tío"
+    assert store.resolve("tio") == "tío"
+    assert store.headwords() == ["tío"]
+    assert store.definitions == 1
+
+
+def test_extension_looks_words_without_definitions_up_online(store, monkeypatch):
+    pytest.importorskip("ulauncher")
+    import main
+
+    monkeypatch.setattr(main, "OFFLINE_STORE", store)
+    for word in WITHOUT_DEFINITIONS + ["tia", "Niña", "TÍA"]:
+        assert main.RAE.need_online_check(word), word
+    assert not main.RAE.need_online_check("Árbol")
+
+
+def test_stopwords_are_not_searched(store):
+    assert search_terms("lo contrario de alegría") == ['"contrario"', '"alegría"*']
+    assert search_terms("de la") == []
+    assert store.search("de la") == []
+
+
+@pytest.mark.parametrize(
+    "query, word",
+    [("órgano de la vista", "ojo"), ("Órgano de la VIS", "ojo"), ("sin compañía", "solitario"), ("miedo", "susto")],
+)
+def test_search(store, query, word):
+    assert store.search(query, 5)[0][0] == word
+
+
+def test_search_without_rare_words(store):
+    # Every word is too common to rank its matches. They still come, unranked.
+    assert len(store.search("cosa que", 5)) == 5
+
+
+@pytest.mark.parametrize("word", ["sala", "vena", "poda", "mora", "jugo", "salas", "pesa", "llegada", "odio", "pago"])
+def test_nouns_do_not_resolve_to_verbs(store, word):
+    # Regular forms of stored verbs (salir, venir, poder, morir, jugar, pesar, llegar, odiar, pagar) that are entries of the DLE of their own.
+    assert store.resolve(word) is None
+
+
+def test_forms_resolve_to_stored_words(store):
+    assert store.resolve("hablaron") == "hablar"
+    assert store.resolve("Comían") == "comer"
+    assert store.resolve("árboles") == "árbol"
@@ -0,0 +1,84 @@
+import threading
+import time
+
+from prefetch import Prefetcher, Revalidator
+
+
+class Fetcher:
+    """Records fetched words. Words in blocked wait for release, words in failing raise."""
+
+    def __init__(self, blocked=(), failing=()):
+        self.blocked = set(blocked)
+        self.failing = set(failing)
+        self.release = threading.Event()
+        self.started = threading.Event()
+        self.fetched = []
+
+    def __call__(self, word: str):
+        if word in self.blocked:
+            self.started.set()
+            self.release.wait(5)
+        if word in self.failing:
+            raise ConnectionError(word)
+        self.fetched.append(word)
+
+
+def settle(revalidator: Revalidator):
+    deadline = time.monotonic() + 5
+    counters = revalidator.counters
+    while counters["refreshed"] + counters["failed"] < counters["submitted"] and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+
+def test_prefetched_words_count_once_claimed():
+    fetcher = Fetcher(failing={"c"})
+    prefetcher = Prefetcher(fetcher, workers=1)
+    prefetcher.prefetch(["a", "b", "c"])
+    prefetcher._executor.shutdown(wait=True)
+    assert fetcher.fetched == ["a", "b"]
+    assert prefetcher.claim("a")
+    assert not prefetcher.claim("a")
+    assert not prefetcher.claim("c")
+    stats = prefetcher.stats
+    assert (stats["submitted"], stats["fetched"], stats["failed"], stats["used"]) == (3, 2, 1, 1)
+    assert stats["hit_rate"] == 0.5
+
+
+def test_new_batches_supersede_pending_words():
+    fetcher = Fetcher(blocked={"a"})
+    prefetcher = Prefetcher(fetcher, workers=1)
+    prefetcher.prefetch(["a", "b"])
+    assert fetcher.started.wait(5)
+    prefetcher.prefetch(["c"])
+    fetcher.release.set()
+    prefetcher._executor.shutdown(wait=True)
+    assert fetcher.fetched == ["a", "c"]  # "a" was already running. "b" is no longer wanted.
+    assert prefetcher.stats["skipped"] == 1
+
+
+def test_wait_for_a_running_prefetch():
+    fetcher = Fetcher(blocked={"a"})
+    prefetcher = Prefetcher(fetcher, workers=1)
+    prefetcher.prefetch(["a", "b"])
+    assert fetcher.started.wait(5)
+    assert not prefetcher.wait("a", timeout=0.01)
+    # "b" didn't start, so it is dropped instead of making the caller wait behind "a".
+    assert not prefetcher.wait("b")
+    assert not prefetcher.wait("z")
+    fetcher.release.set()
+    assert prefetcher.wait("a", timeout=5)
+    prefetcher._executor.shutdown(wait=True)
+    assert fetcher.fetched == ["a"]
+
+
+def test_revalidations_are_not_duplicated():
+    fetcher = Fetcher(blocked={"a"}, failing={"b"})
+    revalidator = Revalidator(fetcher, workers=1)
+    assert revalidator.revalidate("a")
+    assert fetcher.started.wait(5)
+    assert not revalidator.revalidate("a")
+    assert revalidator.revalidate("b")
+    fetcher.release.set()
+    settle(revalidator)
+    assert revalidator.counters == {"submitted": 2, "refreshed": 1, "failed": 1}
+    assert revalidator.revalidate("a")  # Done, so it can be refreshed again.
@@ -0,0 +1,45 @@
+from suggest import SuggestionIndex, deletes, edit_distance
+
+WORDS = ["árbol", "arboleda", "casa", "casar", "cosa", "caso", "Casandra", "niño", "ñoño", "año", "ano", "tristeza"]
+
+
+def test_deletes():
+    assert deletes("abc", 1) == {"abc", "bc", "ac", "ab"}
+    assert "" in deletes("ab", 2)
+
+
+def test_edit_distance():
+    assert edit_distance("casa", "casa", 2) == 0
+    assert edit_distance("casa", "cosa", 2) == 1
+    assert edit_distance("casa", "csaa", 2) == 1  # Transposition.
+    assert edit_distance("casa", "casas", 2) == 1
+    assert edit_distance("tristeza", "trsiteaz", 2) == 2
+    assert edit_distance("casa", "tristeza", 2) == 3  # Capped at max_distance + 1.
+
+
+def test_prefix_matches_come_first():
+    index = SuggestionIndex(WORDS)
+    assert index.suggest("arbo", 2) == ["árbol", "arboleda"]
+    assert index.suggest("ÁRBO", 2) == ["árbol", "arboleda"]
+    assert index.suggest("cas", 3) == ["casa", "Casandra", "casar"]
+
+
+def test_misspellings():
+    index = SuggestionIndex(WORDS)
+    assert index.suggest("tirsteza", 5) == ["tristeza"]
+    assert index.suggest("arvol", 5) == ["árbol"]
+    assert index.suggest("cass", 5) == ["casa", "caso"]  # "casar" is 2 edits away, only 1 is allowed for 4 characters.
+
+
+def test_short_queries_allow_fewer_edits():
+    index = SuggestionIndex(WORDS)
+    assert index.fuzzy("xy", 5) == []
+    assert index.fuzzy("cqsa", 5)[0] == "casa"
+    assert "cosa" not in index.fuzzy("caa", 5)  # 2 edits away, but only 1 is allowed for 3 characters.
+
+
+def test_accents_and_case_keep_their_original_spelling():
+    index = SuggestionIndex(WORDS)
+    assert index.suggest("ano", 5) == ["año", "ano"]
+    assert len(index) == len(WORDS) - 1  # "año" and "ano" fold to the same key.
+    assert index.suggest("zzzzzz", 5) == []
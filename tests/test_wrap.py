@@ -0,0 +1,62 @@
+import json
+
+import pytest
+
+from chunkize import legacy_chunkize_sentence
+from conftest import ROOT
+from wrap import chunkize_sentence, display_width, wrap
+
+WIDTHS = [20, 40, 80]
+
+
+def corpus_definitions():
+    with (ROOT / "top_words" / "top_1k_spanish_words.json").open("r") as f:
+        data = json.load(f)
+    # The legacy implementation kept runs of spaces as empty words, so it is only comparable on collapsed whitespace.
+    return [" ".join(entry["definition"].split()) for entries in data["words"].values() for entry in entries]
+
+
+DEFINITIONS = corpus_definitions()
+
+
+def long_texts(words_per_text: int):
+    words = " ".join(DEFINITIONS).split(" ")
+    return [" ".join(words[i : i + words_per_text]) for i in range(0, len(words) - words_per_text + 1, words_per_text)]
+
+
+@pytest.mark.parametrize("width", WIDTHS)
+def test_same_output_as_legacy(width):
+    for text in DEFINITIONS + long_texts(200):
+        assert chunkize_sentence(text, width) == legacy_chunkize_sentence(text, width), text
+
+
+@pytest.mark.parametrize("width", WIDTHS)
+def test_whitespace_runs_count_as_one_space(width):
+    for text in DEFINITIONS[:200]:
+        spaced = "  " + text.replace(" ", " \t  ").replace(",", ",\n") + " "
+        assert chunkize_sentence(spaced, width) == legacy_chunkize_sentence(text, width)
+
+
+def test_short_text_with_whitespace_runs():
+    assert chunkize_sentence("  casa   de\tcampo ", 80) == ["casa de campo"]
+    assert chunkize_sentence("", 80) == [""]
+
+
+def test_words_longer_than_the_width_are_split():
+    word = "x" * 200
+    assert chunkize_sentence(f"a {word} b", 80) == ["a", "x" * 80, "x" * 80, "x" * 40 + " b"]
+    assert chunkize_sentence(word, 80) == ["x" * 80, "x" * 80, "x" * 40]
+    assert chunkize_sentence("abcdef", 1) == list("abcdef")
+
+
+@pytest.mark.parametrize("width", WIDTHS)
+def test_lines_fit_and_keep_every_word(width):
+    text = " ".join(DEFINITIONS[:50]) + " " + "ñ" * 95 + " 漢字漢字漢字 " + "x" * 85
+    lines = chunkize_sentence(text, width)
+    assert all(display_width(line) <= width for line in lines)
+    assert "".join(text.split()) == "".join("".join(lines).split())
+
+
+def test_wide_characters_count_twice():
+    assert chunkize_sentence("漢字 漢字 漢字", 10) == ["漢字 漢字", "漢字"]
+    assert wrap("漢字漢字漢字", 5) == "漢字\n漢字\n漢字"
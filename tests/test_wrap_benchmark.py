@@ -0,0 +1,22 @@
+"""Benchmarks of chunkize_sentence against the implementation it replaced. Needs pytest-benchmark, and is skipped without it.
+
+Compare both implementations with:
+    python -m pytest tests/test_wrap_benchmark.py --benchmark-group-by=param:texts
+"""
+import pytest
+
+from chunkize import legacy_chunkize_sentence
+from test_wrap import DEFINITIONS, long_texts
+from wrap import chunkize_sentence
+
+pytest.importorskip("pytest_benchmark")
+
+WIDTH = 80
+TEXTS = {"definitions": DEFINITIONS, "200 words each": long_texts(200), "1000 words each": long_texts(1000)}
+
+
+@pytest.mark.parametrize("texts", TEXTS)
+@pytest.mark.parametrize("chunkize", [legacy_chunkize_sentence, chunkize_sentence], ids=["legacy", "linear"])
+def test_chunkize(benchmark, chunkize, texts):
+    expected = [legacy_chunkize_sentence(text, WIDTH) for text in TEXTS[texts]]
+    assert benchmark(lambda: [chunkize(text, WIDTH) for text in TEXTS[texts]]) == expected
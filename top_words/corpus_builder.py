@@ -0,0 +1,518 @@
+"""Builds the offline dataset by fetching words from the DLE.
+
+Fetches run on a bounded pool of workers and share a token bucket, so the DLE sees at most --rate requests per second regardless of --workers. Failed requests are retried with exponential backoff.
+Every fetched word is appended to a JSONL checkpoint as soon as it is parsed, so an interrupted build resumes where it stopped by running the same command again. Words without definitions are checkpointed too, but left out of the dataset.
+Each word in the dataset records when it was last fetched and a hash of its content, so refresh only refetches stale words and only rewrites those that changed.
+Pages are shared with the extension and batch.py through the definition cache (see cache.py): complete pages cached recently enough are used instead of fetching, and fetched pages are added to it. --no-cache turns that off.
+
+Usage (from the repository root):
+    python -m top_words.corpus_builder build [--words FILE] [--workers 4] [--rate 2]
+    python -m top_words.corpus_builder refresh [--max-age 30] [--max-requests 200] [--budget 600]
+
+Without --words, the Wiktionary list of the 1000 most common Spanish words is used. Use --words - to read from stdin.
+"""
+import argparse
+import hashlib
+import json
+import logging
+import random
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+import requests
+from bs4 import BeautifulSoup
+
+from cache import CACHE_MAX_ENTRIES, CACHE_PATH, CACHE_TTL, DefinitionCache
+from dle import BASE_URL, HEADERS, Case, lookup_key, make_session, parse_page
+
+TOP_WORDS_FOLDER = Path(__file__).resolve().parent
+DEFAULT_CHECKPOINT = TOP_WORDS_FOLDER / "checkpoint.jsonl"
+DEFAULT_OUTPUT = TOP_WORDS_FOLDER / "top_1k_spanish_words.json"
+WIKTIONARY_TOP_WORDS = "https://es.wiktionary.org/wiki/Ap%C3%A9ndice:1000_palabras_b%C3%A1sicas_en_espa%C3%B1ol"
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+logger = logging.getLogger(__name__)
+
+
+class TokenBucket:
+    """Thread safe token bucket rate limiter.
+
+    Tokens are added at rate per second up to capacity, and each acquire() takes one, blocking until it is available.
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        """
+        Args:
+            rate (float): Tokens added per second.
+            capacity (float): Maximum amount of tokens, i.e. the largest allowed burst.
+        """
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(
+                    self.capacity, self._tokens + (now - self._updated_at) * self.rate
+                )
+                self._updated_at = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+class FetchError(RuntimeError):
+    pass
+
+
+def fetch_word(
+    session: requests.Session,
+    word: str,
+    bucket: TokenBucket,
+    base_url: str = BASE_URL,
+    retries: int = 5,
+    backoff: float = 1,
+) -> Dict:
+    """Fetches and parses the DLE page of word, retrying transient failures.
+
+    The DLE answers words it doesn't have with 404 Not Found and a no match (or suggestions) page, which is parsed like any other page, as RAE.fetch_online does.
+    Connection errors and the statuses in RETRY_STATUSES are retried up to retries times, waiting backoff * 2**attempt seconds (plus jitter, or Retry-After when given) in between.
+
+    Args:
+        session (requests.Session): Session used for the request.
+        word (str): The word to fetch.
+        bucket (TokenBucket): Rate limiter shared by all workers.
+        base_url (str, optional): Root of the dictionary. Defaults to BASE_URL.
+        retries (int, optional): Amount of retries after the first attempt. Defaults to 5.
+        backoff (float, optional): Base wait in seconds between retries. Defaults to 1.
+
+    Raises:
+        FetchError: If the page couldn't be fetched, or parse_page failed on it.
+
+    Returns:
+        Dict: The parsed page, as returned by dle.parse_page.
+    """
+    for attempt in range(retries + 1):
+        bucket.acquire()
+        wait = backoff * 2 ** attempt * (1 + random.random())
+        try:
+            req = session.get(f"{base_url}/{word}", timeout=30)
+        except requests.RequestException as e:
+            logger.warning(f"{word=} attempt {attempt} failed: {e}")
+        else:
+            if req.ok or req.status_code == 404:
+                try:
+                    return parse_page(req.text)
+                except RuntimeError as e:
+                    # An odd page, which another attempt won't change.
+                    raise FetchError(f"{word=} page couldn't be parsed: {e}") from e
+            if req.status_code not in RETRY_STATUSES:
+                raise FetchError(f"{word=} got status {req.status_code}.")
+            logger.warning(f"{word=} attempt {attempt} got status {req.status_code}.")
+            retry_after = req.headers.get("Retry-After", "")
+            if retry_after.isdigit():
+                wait = float(retry_after)
+
+        if attempt < retries:
+            time.sleep(wait)
+    raise FetchError(f"{word=} failed after {retries + 1} attempts.")
+
+
+def word_entries(result: Dict) -> List[Dict[str, str]]:
+    """Definitions of a parsed page in the format of the offline dataset.
+
+    Args:
+        result (Dict): The parsed page.
+
+    Returns:
+        List[Dict[str, str]]: The definitions, or an empty list if the page had no exact match.
+    """
+    if result["case"] != Case.EXACT_REQ_MATCH.name:
+        return []
+    return result["definitions"]
+
+
+def observed_lemma(word: str, entries: List[Dict[str, str]]) -> Optional[str]:
+    """The lemma the DLE answered with when asked for word, if it isn't word itself.
+
+    The DLE serves the entry of the lemma for inflected forms ("casas" shows "casa"), and its header has the lemma as "casa", "hijo, ja" or "hijo1".
+
+    Args:
+        word (str): The word that was fetched.
+        entries (List[Dict[str, str]]): Its definitions, whose "word" is the headword they belong to.
+
+    Returns:
+        Optional[str]: The lemma, or None if it is the word itself or unknown (datasets from before headwords were recorded).
+    """
+    if not entries or not entries[0].get("word"):
+        return None
+    lemma = entries[0]["word"].split(",")[0].strip().rstrip("0123456789").strip()
+    if not lemma or lookup_key(lemma) == lookup_key(word):
+        return None
+    return lemma
+
+
+def entries_hash(entries: List[Dict[str, str]]) -> str:
+    """Content hash of a word's definitions, used to tell whether a refetch changed anything.
+
+    Args:
+        entries (List[Dict[str, str]]): The definitions.
+
+    Returns:
+        str: Hex SHA-1 of the canonical JSON of entries.
+    """
+    canonical = json.dumps(entries, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha1(canonical.encode("utf-8")).hexdigest()
+
+
+def read_checkpoint(path: Path) -> Dict[str, Dict]:
+    """Reads a JSONL checkpoint, folding all records of each word into one.
+
+    Records are applied in order. A record without "entries" only marks the word as checked at "fetched_at" with unchanged content.
+    A truncated last line, as left by a crash mid write, is ignored.
+
+    Args:
+        path (Path): The checkpoint.
+
+    Returns:
+        Dict[str, Dict]: Records by word.
+    """
+    records: Dict[str, Dict] = {}
+    if not path.exists():
+        return records
+    with path.open("r") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                logger.warning(f"Ignoring corrupt checkpoint line: {line!r}")
+                continue
+            records[record["word"]] = {**records.get(record["word"], {}), **record}
+    return records
+
+
+def read_dataset(path: Path) -> Dict[str, Dict]:
+    """Reads the offline dataset as records, in the same format as read_checkpoint.
+
+    Datasets written before per word metadata existed get the global "last_checked" for every word, and their hashes are computed.
+
+    Args:
+        path (Path): The dataset JSON. It may not exist yet.
+
+    Returns:
+        Dict[str, Dict]: Records by word.
+    """
+    if not path.exists():
+        return {}
+    with path.open("r") as f:
+        data = json.load(f)
+
+    meta = data.get("meta", {})
+    records = {}
+    for word, entries in data["words"].items():
+        word_meta = meta.get(word, {})
+        records[word] = {
+            "word": word,
+            "entries": entries,
+            "fetched_at": word_meta.get("last_checked", data["last_checked"]),
+            "hash": word_meta.get("hash") or entries_hash(entries),
+        }
+    return records
+
+
+class Checkpoint:
+    """Append-only JSONL log of fetched words, safe to write from several threads."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def append(self, record: Dict):
+        line = json.dumps(record, ensure_ascii=False)
+        with self._lock, self.path.open("a") as f:
+            f.write(line + "\n")
+            f.flush()
+
+
+def fetch_all(
+    words: Iterable[str],
+    workers: int,
+    bucket: TokenBucket,
+    base_url: str = BASE_URL,
+    retries: int = 5,
+    backoff: float = 1,
+    deadline: Optional[float] = None,
+    cache: Optional[DefinitionCache] = None,
+    max_age: Optional[float] = None,
+) -> Iterator[Tuple[str, Dict]]:
+    """Fetches words concurrently, yielding each parsed page as soon as it completes.
+
+    Words that fail, including pages the parser fails on, are logged and skipped. Once deadline passes, words not yet started are skipped too.
+    With a cache, complete pages cached less than max_age seconds ago and words recently without match (see DefinitionCache.is_miss) are yielded without fetching, and fetched pages are cached.
+
+    Args:
+        words (Iterable[str]): Words to fetch.
+        workers (int): Maximum amount of concurrent requests.
+        bucket (TokenBucket): Rate limiter shared by all workers.
+        base_url (str, optional): Root of the dictionary. Defaults to BASE_URL.
+        retries (int, optional): Retries per word. Defaults to 5.
+        backoff (float, optional): Base wait in seconds between retries. Defaults to 1.
+        deadline (Optional[float], optional): time.monotonic() after which no new fetch starts. Defaults to None, meaning no deadline.
+        cache (Optional[DefinitionCache], optional): Definition cache read before fetching and updated after. Defaults to None.
+        max_age (Optional[float], optional): Seconds after which a cached page is fetched again. Defaults to None, meaning the ttl of cache.
+
+    Yields:
+        Tuple[str, Dict]: The word and its parsed page, in completion order.
+    """
+    session = make_session(pool_size=workers)
+
+    def task(word: str) -> Optional[Dict]:
+        if deadline is not None and time.monotonic() > deadline:
+            return None
+        if cache is not None:
+            entry = cache.get_entry(word)
+            if (
+                entry is not None
+                and not entry.result.get("truncated")
+                and time.time() - entry.stored_at <= (cache.ttl if max_age is None else max_age)
+            ):
+                logger.debug(f"{word=} served from the definition cache.")
+                return entry.result
+            if cache.is_miss(word):
+                logger.debug(f"{word=} had no match in the DLE recently.")
+                return {"case": Case.NO_MATCH.name}
+        result = fetch_word(session, word, bucket, base_url, retries, backoff)
+        if cache is not None and result["case"] != Case.NO_MATCH.name:
+            cache.set(word, result)
+        elif cache is not None:
+            cache.add_miss(word)
+        return result
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(task, word): word for word in words}
+        for idx, future in enumerate(as_completed(futures), start=1):
+            word = futures[future]
+            try:
+                result = future.result()
+            except FetchError as e:
+                logger.error(str(e))
+                continue
+            if result is None:
+                continue
+            logger.info(f"{idx}/{len(futures)} {word}")
+            yield word, result
+
+
+def compile_dataset(records: Dict[str, Dict], output: Path):
+    """Writes the offline dataset from records.
+
+    Words without definitions (the DLE had no match, or only suggestions) are left out: stored offline, they would hide the online lookup of the word. Their records stay in the checkpoint, so build doesn't fetch them again.
+
+    Args:
+        records (Dict[str, Dict]): Records by word, as returned by read_dataset and read_checkpoint.
+        output (Path): Destination JSON.
+    """
+    records = {word: record for word, record in records.items() if record["entries"]}
+    data = {
+        "last_checked": max(
+            (record["fetched_at"] for record in records.values()), default=0
+        ),
+        "words": {word: record["entries"] for word, record in records.items()},
+        "meta": {
+            word: {"last_checked": record["fetched_at"], "hash": record["hash"]}
+            for word, record in records.items()
+        },
+        "forms": {},  # Form to lemma, as observed from the DLE answers.
+    }
+    for word, record in records.items():
+        lemma = observed_lemma(word, record["entries"])
+        if lemma is not None:
+            data["forms"][word] = lemma
+    tmp_output = output.with_suffix(".tmp")
+    with tmp_output.open("w") as f:
+        json.dump(data, f, indent=4)
+    tmp_output.replace(output)
+
+
+def read_records(args: argparse.Namespace) -> Dict[str, Dict]:
+    """The dataset with the checkpoint records applied on top of it.
+
+    A checkpoint record older than the dataset's copy of the same word is ignored, so an old checkpoint can't undo a newer dataset.
+    """
+    records = read_dataset(args.output)
+    for word, record in read_checkpoint(args.checkpoint).items():
+        if word in records and records[word]["fetched_at"] > record["fetched_at"]:
+            continue
+        record = {**records.get(word, {}), **record}
+        record.setdefault("hash", entries_hash(record["entries"]))
+        records[word] = record
+    return records
+
+
+def get_top_words() -> List[str]:
+    req = requests.get(WIKTIONARY_TOP_WORDS, headers=HEADERS)
+    soup = BeautifulSoup(req.text, "html.parser")
+
+    top_words = []
+    for item in soup.find("div", {"class": "mw-parser-output"}).children:
+        if item.name != "ul":
+            continue
+
+        for entry in item.find_all("li"):
+            # Handle synonyms.
+            top_words.extend([word.text for word in entry.find_all("a")])
+    return top_words
+
+
+def read_words(source: Optional[str]) -> List[str]:
+    """Reads the words to fetch, one per line, skipping blanks and duplicates.
+
+    Args:
+        source (Optional[str]): A file path, "-" for stdin, or None for the Wiktionary top 1000.
+
+    Returns:
+        List[str]: The words, in order of first appearance.
+    """
+    if source is None:
+        words = get_top_words()
+    elif source == "-":
+        words = sys.stdin.read().splitlines()
+    else:
+        words = Path(source).read_text().splitlines()
+    return list(dict.fromkeys(word.strip() for word in words if word.strip()))
+
+
+def open_cache(args: argparse.Namespace) -> Optional[DefinitionCache]:
+    """The definition cache shared with the extension, unless --no-cache was given."""
+    return None if args.no_cache else DefinitionCache(CACHE_PATH, CACHE_TTL, CACHE_MAX_ENTRIES)
+
+
+def build(args: argparse.Namespace) -> int:
+    checkpoint = Checkpoint(args.checkpoint)
+    done = read_records(args)
+    words = read_words(args.words)
+    pending = [word for word in words if word not in done]
+    logger.info(f"{len(done)} words already fetched, {len(pending)} pending.")
+
+    bucket = TokenBucket(args.rate, args.burst)
+    fetched = 0
+    for word, result in fetch_all(
+        pending, args.workers, bucket, args.base_url, args.retries, args.backoff, cache=open_cache(args)
+    ):
+        entries = word_entries(result)
+        checkpoint.append(
+            {
+                "word": word,
+                "entries": entries,
+                "fetched_at": datetime.now().timestamp(),
+                "hash": entries_hash(entries),
+            }
+        )
+        fetched += 1
+
+    compile_dataset(read_records(args), args.output)
+    if fetched < len(pending):
+        logger.error(f"{len(pending) - fetched} words failed and will be retried on the next run.")
+        return 1
+    return 0
+
+
+def refresh(args: argparse.Namespace) -> int:
+    """Refetches the stalest words, oldest first, and records only what changed.
+
+    Words checked less than --max-age days ago are left alone. At most --max-requests words are refetched, and no new fetch starts after --budget seconds.
+    A word whose content hash didn't change only gets a small "checked" record in the checkpoint; changed words get a full one.
+    """
+    checkpoint = Checkpoint(args.checkpoint)
+    records = read_records(args)
+    now = datetime.now().timestamp()
+    stale = sorted(
+        (record for record in records.values() if now - record["fetched_at"] > args.max_age * 24 * 60 * 60),
+        key=lambda record: record["fetched_at"],
+    )
+    if args.max_requests is not None:
+        stale = stale[: args.max_requests]
+    logger.info(f"{len(stale)} of {len(records)} words to refresh.")
+
+    bucket = TokenBucket(args.rate, args.burst)
+    deadline = time.monotonic() + args.budget if args.budget is not None else None
+    changed = unchanged = 0
+    for word, result in fetch_all(
+        (record["word"] for record in stale),
+        args.workers,
+        bucket,
+        args.base_url,
+        args.retries,
+        args.backoff,
+        deadline,
+        open_cache(args),
+        args.max_age * 24 * 60 * 60,
+    ):
+        entries = word_entries(result)
+        if not entries and records[word]["entries"]:
+            # Case.NO_MATCH is a catchall that may hide a changed page or a transient error. Keep the definitions and retry on the next refresh.
+            logger.warning(f"{word=} has no definitions anymore. Keeping the stored ones.")
+            continue
+        record = {
+            "word": word,
+            "fetched_at": datetime.now().timestamp(),
+            "hash": entries_hash(entries),
+        }
+        if record["hash"] == records[word]["hash"]:
+            unchanged += 1
+        else:
+            record["entries"] = entries
+            changed += 1
+        checkpoint.append(record)
+
+    logger.info(f"Refreshed {changed + unchanged} words: {changed} changed, {unchanged} unchanged.")
+    if changed + unchanged:
+        compile_dataset(read_records(args), args.output)
+    return 0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--checkpoint", type=Path, default=DEFAULT_CHECKPOINT)
+    parser.add_argument("--output", type=Path, default=DEFAULT_OUTPUT)
+    parser.add_argument("--base-url", default=BASE_URL)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--rate", type=float, default=2, help="Requests per second.")
+    parser.add_argument("--burst", type=float, default=4, help="Token bucket capacity.")
+    parser.add_argument("--retries", type=int, default=5)
+    parser.add_argument("--backoff", type=float, default=1, help="Base retry wait in seconds.")
+    parser.add_argument("--no-cache", action="store_true", help="Neither read nor update the definition cache.")
+    parser.add_argument("-v", "--verbose", action="store_true")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    build_parser = subparsers.add_parser("build", help="Fetch missing words and write the dataset.")
+    build_parser.add_argument("--words", help="Word list file, one per line, or - for stdin.")
+    build_parser.set_defaults(func=build)
+
+    refresh_parser = subparsers.add_parser("refresh", help="Refetch stale words, oldest first.")
+    refresh_parser.add_argument("--max-age", type=float, default=30, help="Days after which a word is stale.")
+    refresh_parser.add_argument("--max-requests", type=int, help="Refetch at most this many words.")
+    refresh_parser.add_argument("--budget", type=float, help="Seconds after which no new fetch starts.")
+    refresh_parser.set_defaults(func=refresh)
+
+    args = parser.parse_args(argv)
+    logging.basicConfig(
+        level=logging.DEBUG if args.verbose else logging.INFO,
+        format="%(asctime)s %(levelname)s %(message)s",
+    )
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
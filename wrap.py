@@ -0,0 +1,111 @@
+import unicodedata
+from typing import List
+
+CHARACTERS_PER_LINE = 80
+
+
+def is_narrow(text: str) -> bool:
+    """Whether every character of text takes exactly 1 column, judging by code points alone.
+
+    Latin-1 and Latin Extended (all of Spanish) have neither wide characters nor combining marks, which start at U+0300.
+    """
+    return text.isascii() or max(text) < "\u0300"
+
+
+def display_width(text: str) -> int:
+    """Amount of columns text takes on screen: wide (e.g. CJK) characters take 2, combining marks take none.
+
+    Args:
+        text (str): The text to measure.
+
+    Returns:
+        int: The width in columns.
+    """
+    if is_narrow(text):
+        return len(text)
+    width = 0
+    for c in text:
+        if unicodedata.combining(c):
+            continue
+        width += 2 if unicodedata.east_asian_width(c) in {"W", "F"} else 1
+    return width
+
+
+def split_word(word: str, max_width: int) -> List[str]:
+    """Splits a word wider than max_width into pieces of at most max_width columns.
+
+    Args:
+        word (str): The word to split.
+        max_width (int): Maximum width of each piece.
+
+    Returns:
+        List[str]: The pieces, in order.
+    """
+    pieces, piece, width = [], [], 0
+    for c in word:
+        c_width = display_width(c)
+        if width + c_width > max_width and piece:
+            pieces.append("".join(piece))
+            piece, width = [], 0
+        piece.append(c)
+        width += c_width
+    pieces.append("".join(piece))
+    return pieces
+
+
+def chunkize_sentence(sentence: str, max_characters_per_chunk: int) -> List[str]:
+    """Splits a given sentence into chunks of at most max_characters_per_chunk, counting spaces.
+
+    The method guarantees that each element of the output is an intelligible sentence with whole words, except for words longer than max_characters_per_chunk, which are split over as many chunks as needed.
+
+    This is not the same as splitting into max_characters_per_chunk, because words could end up truncated.
+
+    Runs of whitespace count as a single space, and characters are counted by their display width (see display_width). Each word is measured once, so the time is linear in the length of the sentence.
+
+    Args:
+        sentence (str): Sentence to be split.
+        max_characters_per_chunk (int): Maximum number of characters allower per chunk, spaces included. Chunks could end up being significantly shorter, depending on the length of words.
+
+    Returns:
+        List[str]: List of chunks (i.e: lines) with length at most max_characters_per_chunk.
+    """
+    narrow = is_narrow(sentence)
+    width_of = len if narrow else display_width
+    words = sentence.split()
+    if len(sentence) <= max_characters_per_chunk and width_of(sentence) <= max_characters_per_chunk:
+        return [" ".join(words)]
+
+    lines = []
+    line: List[str] = []
+    width = 0  # Of the current line, counting the spaces between its words.
+    for word in words:
+        word_width = len(word) if narrow or word.isascii() else display_width(word)
+        if word_width > max_characters_per_chunk:
+            if line:
+                lines.append(" ".join(line))
+            *pieces, last = split_word(word, max_characters_per_chunk)
+            lines.extend(pieces)
+            line, width = [last], width_of(last)
+        elif not line:
+            line, width = [word], word_width
+        elif width + 1 + word_width <= max_characters_per_chunk:
+            line.append(word)
+            width += 1 + word_width
+        else:
+            lines.append(" ".join(line))
+            line, width = [word], word_width
+    lines.append(" ".join(line))
+    return lines
+
+
+def wrap(text: str, max_characters_per_line: int = CHARACTERS_PER_LINE) -> str:
+    """The text split into lines by chunkize_sentence, joined with newlines.
+
+    Args:
+        text (str): Text to wrap.
+        max_characters_per_line (int, optional): Maximum width of each line. Defaults to CHARACTERS_PER_LINE.
+
+    Returns:
+        str: The wrapped text.
+    """
+    return "\n".join(chunkize_sentence(text, max_characters_per_line))